@@ -1,30 +1,92 @@
 from fastapi import Depends, HTTPException, Request, status
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from app.core.database import get_db
+from app.core.config import settings
+from app.core.database import get_async_db, get_db
 from app.models.user import User
+from app.utils.cache import TTLCache
 from app.utils.jwt import verify_token
+from app.utils.revocation import revocation_list
 
-def get_current_user(request: Request, db: Session = Depends(get_db)):
-    
+
+class CachedUser:
+    """Read-only copy of a User row, safe to share between requests and sessions."""
+
+    __slots__ = ("id", "first_name", "last_name", "email", "is_verified")
+
+    def __init__(self, user: User):
+        self.id = user.id
+        self.first_name = user.first_name
+        self.last_name = user.last_name
+        self.email = user.email
+        self.is_verified = user.is_verified
+
+
+# Token subject (email) -> CachedUser
+user_cache = TTLCache(maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_cached_user(email: str):
+    """Drops a user from the cache; call whenever a users row changes."""
+    user_cache.invalidate(email)
+
+
+def _token_subject(request: Request) -> str:
+    """Returns the email the access token cookie was issued for."""
     token = request.cookies.get("access_token")
-    print("token: ",token)
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
+    payload = verify_token(token)
+    if not payload:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication token")
+
+    email: str = payload.get("sub")
+    if email is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication token")
+
+    # In-memory check, no query; tokens issued before jti existed stay valid until they expire
+    jti = payload.get("jti")
+    if jti and revocation_list.is_revoked(jti):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token has been revoked")
+    return email
+
+
+def _remember(email: str, user: User) -> CachedUser:
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    cached_user = CachedUser(user)
+    user_cache.set(email, cached_user)
+    return cached_user
+
+
+def get_current_user(request: Request, db: Session = Depends(get_db)):
+    
+    email = _token_subject(request)
+
     try:
-        payload = verify_token(token)
-        if not payload:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication token")
+        cached_user = user_cache.get(email)
+        if cached_user is not None:
+            return cached_user
 
-        email: str = payload.get("sub")
-        if email is None:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication token")
+        return _remember(email, db.query(User).filter(User.email == email).first())
 
-        user = db.query(User).filter(User.email == email).first()
-        if not user:
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication token")
+
+
+async def get_current_user_async(request: Request, db = Depends(get_async_db)):
+    """get_current_user for the async routes (DB_ASYNC_MODE)."""
+
+    email = _token_subject(request)
+
+    try:
+        cached_user = user_cache.get(email)
+        if cached_user is not None:
+            return cached_user
 
-        return user
+        result = await db.execute(select(User).where(User.email == email))
+        return _remember(email, result.scalars().first())
 
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid authentication token")
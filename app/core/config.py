@@ -1,3 +1,6 @@
+import os
+
+from pydantic import validator
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,6 +13,99 @@ class Settings(BaseSettings):
     FRONTEND_URL: str
     JWT_SECRET_KEY: str
 
+    # Connection pool (size/overflow/timeout are ignored for SQLite)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # Pooled connections opened at startup, before the worker reports ready (capped at DB_POOL_SIZE)
+    DB_WARM_CONNECTIONS: int = 4
+    # Optional read replica for the read-only routes. A client's reads go to the primary for
+    # READ_YOUR_WRITES_SECONDS after its own writes, and all reads do while the replica is down
+    # (it is re-probed every READ_REPLICA_RETRY_SECONDS)
+    READ_DATABASE_URL: str | None = None
+    READ_YOUR_WRITES_SECONDS: float = 5
+    READ_REPLICA_RETRY_SECONDS: float = 30
+    # Serve the read routes from async handlers on an async engine. ASYNC_DATABASE_URL and
+    # ASYNC_READ_DATABASE_URL default to DATABASE_URL and READ_DATABASE_URL with their async
+    # driver (aiomysql / aiosqlite)
+    DB_ASYNC_MODE: bool = False
+    ASYNC_DATABASE_URL: str | None = None
+    ASYNC_READ_DATABASE_URL: str | None = None
+
+    # Resolved users cached by get_current_user (0 disables the cache)
+    USER_CACHE_TTL_SECONDS: int = 60
+    USER_CACHE_MAX_SIZE: int = 10000
+
+    # Log requests slower than this, with the queries that took longest (0 disables)
+    SLOW_REQUEST_MS: float = 0
+
+    # Rendered dashboard pages cached per (user, catalog version, page parameters); 0 disables
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 1000
+    DASHBOARD_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Observations a product needs before its fitted price elasticity replaces the heuristic forecast
+    ELASTICITY_MIN_OBSERVATIONS: int = 5
+
+    # Holt (double exponential) smoothing of the daily units_sold snapshots. A product with
+    # FORECAST_MIN_DAYS of snapshots in the last FORECAST_HISTORY_DAYS gets the level + trend
+    # projected FORECAST_HORIZON_DAYS ahead as its demand forecast
+    FORECAST_ALPHA: float = 0.5
+    FORECAST_BETA: float = 0.2
+    FORECAST_HISTORY_DAYS: int = 90
+    FORECAST_MIN_DAYS: int = 7
+    FORECAST_HORIZON_DAYS: int = 7
+
+    # Constrained catalog optimiser: price elasticity assumed for products without a fitted
+    # one, and how far (as a fraction of the selling price) a price may move in one run
+    OPTIMISER_DEFAULT_ELASTICITY: float = -1.5
+    OPTIMISER_MAX_CHANGE: float = 0.5
+
+    @validator("OPTIMISER_DEFAULT_ELASTICITY")
+    def check_default_elasticity(cls, value):
+        """Demand must fall as the price rises; the optimiser divides by this."""
+        if value >= 0:
+            raise ValueError("OPTIMISER_DEFAULT_ELASTICITY must be negative.")
+        return value
+
+    # bcrypt cost factor; hashes made with other rounds are upgraded on login
+    BCRYPT_ROUNDS: int = 12
+    # Worker processes for password hashing, and how many more jobs may wait for them
+    HASH_POOL_SIZE: int = os.cpu_count() or 1
+    HASH_QUEUE_LIMIT: int = 64
+    # Start every hashing worker at startup instead of on the first signups/logins
+    HASH_POOL_WARM: bool = True
+
+    # Revoked token ids are mirrored in memory (a bloom filter over an exact map) and
+    # re-synced from revoked_tokens this often, so other workers' revocations apply within it
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 5
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = 0.01
+
+    # Token-bucket throttling of login and signup: BURST attempts, refilled at PER_MINUTE.
+    # Buckets live in process memory unless RATE_LIMIT_REDIS_URL names a shared store
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_REDIS_URL: str | None = None
+    # Only behind a proxy that sets X-Forwarded-For; otherwise clients could pick their own IP
+    RATE_LIMIT_TRUST_FORWARDED_FOR: bool = False
+    LOGIN_IP_BURST: int = 20
+    LOGIN_IP_PER_MINUTE: float = 10
+    LOGIN_ACCOUNT_BURST: int = 5
+    LOGIN_ACCOUNT_PER_MINUTE: float = 2
+    SIGNUP_IP_BURST: int = 5
+    SIGNUP_IP_PER_MINUTE: float = 1
+
+    # SMTP options; leave EMAIL_PASSWORD empty to skip login (e.g. a local aiosmtpd)
+    SMTP_STARTTLS: bool = True
+    SMTP_TIMEOUT_SECONDS: float = 10
+    # Verification emails are queued in email_outbox and sent by a background worker
+    EMAIL_OUTBOX_ENABLED: bool = True
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 6
+    EMAIL_OUTBOX_BACKOFF_SECONDS: float = 30
+
     class Config:
         env_file = ".env"  
         
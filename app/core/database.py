@@ -1,19 +1,99 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.core.metrics import instrument_engine, timed_pool_class
 
 Base = declarative_base()
 
+# Async drivers for the sync drivers DATABASE_URL may name
+_ASYNC_DRIVERS = {"mysql": "aiomysql", "sqlite": "aiosqlite"}
 
-engine = create_engine(settings.DATABASE_URL)
+
+def _engine_options(url: str) -> dict:
+    """Pool settings from Settings; SQLite's pools don't take size/overflow/timeout."""
+    parsed = make_url(url)
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        # The dialect's usual pool, timed for the checkout-wait metric
+        "poolclass": timed_pool_class(parsed.get_dialect().get_pool_class(parsed)),
+    }
+    if parsed.get_backend_name() != "sqlite":
+        options.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        )
+    return options
+
+
+def _enforce_foreign_keys(engine):
+    """SQLite ignores FOREIGN KEY constraints (and their ON DELETE CASCADE) unless each connection turns them on."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    return parsed.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}").render_as_string(hide_password=False)
+
+
+engine = create_engine(settings.DATABASE_URL, **_engine_options(settings.DATABASE_URL))
+
+instrument_engine(engine)
+_enforce_foreign_keys(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Optional read replica; app/core/read_routing.py decides per request which one a read uses
+read_engine = None
+ReadSessionLocal = None
+if settings.READ_DATABASE_URL:
+    read_engine = create_engine(settings.READ_DATABASE_URL, **_engine_options(settings.READ_DATABASE_URL))
+    instrument_engine(read_engine)
+    _enforce_foreign_keys(read_engine)
+    ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+
+# Optional async engine for the read routes in app/routers/async_reads.py
+async_engine = None
+AsyncSessionLocal = None
+async_read_engine = None
+AsyncReadSessionLocal = None
+if settings.DB_ASYNC_MODE:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_database_url = settings.ASYNC_DATABASE_URL or _async_url(settings.DATABASE_URL)
+    async_engine = create_async_engine(async_database_url, **_engine_options(async_database_url))
+    instrument_engine(async_engine.sync_engine)
+    _enforce_foreign_keys(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    # The replica for the async read routes, chosen per request like the sync one
+    if settings.READ_DATABASE_URL:
+        async_read_database_url = settings.ASYNC_READ_DATABASE_URL or _async_url(settings.READ_DATABASE_URL)
+        async_read_engine = create_async_engine(async_read_database_url, **_engine_options(async_read_database_url))
+        instrument_engine(async_read_engine.sync_engine)
+        _enforce_foreign_keys(async_read_engine.sync_engine)
+        AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
 
 import app.models.user
 import app.models.product 
+import app.models.email_outbox
+import app.models.category_summary
+import app.models.price_history
+import app.models.revoked_token
+import app.models.forecast
 
 
 def get_db():
@@ -22,3 +102,8 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,256 @@
+"""
+In-process metrics in the Prometheus text format.
+
+MetricsMiddleware times every request by route template and counts in-flight requests.
+instrument_engine() hooks SQLAlchemy cursor events so each request also records how many
+queries it ran and how long they took, and timed_pool_class() wraps a pool class to
+measure how long connection checkouts wait. /metrics renders the registry.
+"""
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+# Statements listed in a slow-request log line
+SLOW_LOG_TOP_QUERIES = 5
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._lock = threading.Lock()
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, *label_values: str):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return self._header() + [f"{self.name}{_format_labels(self.labels, key)} {value}" for key, value in items]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, *label_values: str):
+        self.inc(-amount, *label_values)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items()]
+        lines = self._header()
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += bucket_count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """A counter or gauge whose value is read from a function at scrape time."""
+
+    def __init__(self, name, help_text, kind: str, read: Callable[[], float]):
+        super().__init__(name, help_text)
+        self.kind = kind
+        self._read = read
+
+    def render(self) -> List[str]:
+        return self._header() + [f"{self.name} {self._read()}"]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_requests = registry.register(Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template.", ("method", "route", "status")))
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served."))
+db_queries_per_request = registry.register(Histogram(
+    "http_request_db_queries", "Database queries issued per HTTP request.", ("route",), QUERY_COUNT_BUCKETS))
+db_time_per_request = registry.register(Histogram(
+    "http_request_db_seconds", "Time spent in database queries per HTTP request.", ("route",)))
+db_queries = registry.register(Counter(
+    "db_queries_total", "Database queries executed, including background work."))
+db_query_seconds = registry.register(Histogram(
+    "db_query_duration_seconds", "Database query latency."))
+db_pool_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", (), POOL_WAIT_BUCKETS))
+
+
+class RequestStats:
+    """Query statistics of the request being served, shared with its threadpool calls."""
+
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        # (seconds, statement), collected only when the slow request log is on
+        self.statements: List[Tuple[float, str]] = []
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    db_queries.inc()
+    db_query_seconds.observe(elapsed)
+
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if settings.SLOW_REQUEST_MS > 0:
+            stats.statements.append((elapsed, statement))
+
+
+def instrument_engine(engine):
+    """Records query counts and timings for a (sync) engine; pass async_engine.sync_engine for async."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def timed_pool_class(pool_class):
+    """Subclass of pool_class that records how long each connection checkout waited."""
+
+    class TimedPool(pool_class):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                db_pool_wait.observe(time.perf_counter() - start)
+
+    TimedPool.__name__ = f"Timed{pool_class.__name__}"
+    return TimedPool
+
+
+def _log_slow_request(method: str, route: str, elapsed: float, stats: RequestStats):
+    top = sorted(stats.statements, key=lambda item: item[0], reverse=True)[:SLOW_LOG_TOP_QUERIES]
+    details = "".join(f"\n  {seconds * 1000:.1f} ms  {' '.join(statement.split())[:300]}" for seconds, statement in top)
+    logger.warning(
+        "Slow request %s %s: %.1f ms, %d queries, %.1f ms in DB%s",
+        method, route, elapsed * 1000, stats.queries, stats.db_seconds * 1000, details,
+    )
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route latency, in-flight requests and per-request DB usage."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            http_in_flight.dec()
+            _request_stats.reset(token)
+
+            # Label by route template, not raw path, to keep the series count bounded
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_requests.observe(elapsed, scope["method"], route, str(status_code))
+            db_queries_per_request.observe(stats.queries, route)
+            db_time_per_request.observe(stats.db_seconds, route)
+
+            if 0 < settings.SLOW_REQUEST_MS <= elapsed * 1000:
+                _log_slow_request(scope["method"], route, elapsed, stats)
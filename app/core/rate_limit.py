@@ -0,0 +1,123 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.core.config import settings
+
+
+class MemoryBackend:
+    """
+    Token buckets in this process. Idle buckets are evicted least recently used first once
+    max_keys are held; an evicted bucket comes back full, which only errs on the lenient side.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        """Takes one token from the bucket; returns 0 if allowed, else seconds until one is available."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * refill_per_second)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / refill_per_second
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+# Atomic token bucket: KEYS[1] = bucket, ARGV = capacity, refill per second, now (seconds)
+_REDIS_TAKE = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBackend:
+    """
+    Token buckets shared by every worker, in Redis (or anything speaking its EVAL, such as a
+    local stand-in). `client` is a redis.asyncio client; buckets expire once they would be full.
+    """
+
+    def __init__(self, client, prefix: str = "ratelimit:"):
+        self.client = client
+        self.prefix = prefix
+
+    async def take(self, key: str, capacity: float, refill_per_second: float) -> float:
+        wait = await self.client.eval(_REDIS_TAKE, 1, self.prefix + key, capacity, refill_per_second, time.time())
+        return float(wait)
+
+
+def _create_backend():
+    if settings.RATE_LIMIT_REDIS_URL:
+        import redis.asyncio as redis
+
+        return RedisBackend(redis.from_url(settings.RATE_LIMIT_REDIS_URL))
+    return MemoryBackend()
+
+
+rate_limit_backend = _create_backend()
+
+
+def client_ip(request: Request) -> str:
+    """The caller's address; the first X-Forwarded-For entry when behind a trusted proxy."""
+    if settings.RATE_LIMIT_TRUST_FORWARDED_FOR:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce_rate_limit(key: str, burst: int, per_minute: float):
+    """
+    Takes a token from the `key` bucket (burst tokens, refilled at per_minute) or raises
+    429 with Retry-After. A non-positive burst or rate disables the limit.
+    """
+    if not settings.RATE_LIMIT_ENABLED or burst <= 0 or per_minute <= 0:
+        return
+    wait = await rate_limit_backend.take(key, burst, per_minute / 60)
+    if wait > 0:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, please retry later.",
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+
+
+async def limit_login(request: Request, email: Optional[str]):
+    await enforce_rate_limit(f"login:ip:{client_ip(request)}", settings.LOGIN_IP_BURST, settings.LOGIN_IP_PER_MINUTE)
+    if email:
+        await enforce_rate_limit(f"login:account:{email.strip().lower()}", settings.LOGIN_ACCOUNT_BURST, settings.LOGIN_ACCOUNT_PER_MINUTE)
+
+
+async def limit_signup(request: Request):
+    await enforce_rate_limit(f"signup:ip:{client_ip(request)}", settings.SIGNUP_IP_BURST, settings.SIGNUP_IP_PER_MINUTE)
@@ -0,0 +1,149 @@
+import logging
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import sessionmaker
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import HTTPConnection
+
+from app.core.config import settings
+from app.core.database import AsyncReadSessionLocal, AsyncSessionLocal, ReadSessionLocal, SessionLocal, async_read_engine, read_engine
+
+logger = logging.getLogger(__name__)
+
+# Cookie holding the time (epoch seconds) until which the client's reads go to the primary
+WRITE_COOKIE = "read_primary_until"
+
+_READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Set per request by ReadYourWritesMiddleware
+_recent_write: ContextVar[bool] = ContextVar("recent_write", default=False)
+
+
+class ReplicaHealth:
+    """
+    Whether reads may go to the replica. A failure (a failed probe, or a dropped connection
+    seen by the engine) takes it out of rotation; after READ_REPLICA_RETRY_SECONDS the next
+    read probes it again.
+    """
+
+    def __init__(self, engine, retry_seconds: float):
+        self.engine = engine
+        self.retry_seconds = retry_seconds
+        self.healthy = engine is not None
+        self._checked_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def mark_down(self, reason: str):
+        if self.healthy:
+            logger.warning("Read replica unavailable, reading from the primary: %s", reason)
+        self.healthy = False
+        self._checked_at = time.monotonic()
+
+    def available(self) -> bool:
+        if self.engine is None:
+            return False
+        if self.healthy or time.monotonic() - self._checked_at < self.retry_seconds:
+            return self.healthy
+        # One caller probes; the others keep using the primary meanwhile
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            self.healthy = True
+            logger.info("Read replica is back")
+        except Exception as e:
+            self.mark_down(str(e))
+        finally:
+            self._checked_at = time.monotonic()
+            self._lock.release()
+        return self.healthy
+
+
+replica_health = ReplicaHealth(read_engine, settings.READ_REPLICA_RETRY_SECONDS)
+
+
+def _replica_error(context):
+    if context.is_disconnect or context.connection is None:
+        replica_health.mark_down(str(context.original_exception))
+
+
+if read_engine is not None:
+    event.listen(read_engine, "handle_error", _replica_error)
+if async_read_engine is not None:
+    # The same server as read_engine, so its failures take both out of rotation
+    event.listen(async_read_engine.sync_engine, "handle_error", _replica_error)
+
+
+def read_session_factory() -> sessionmaker:
+    """
+    The sessionmaker the current request's reads should use: the replica when configured and
+    healthy, unless the client wrote within READ_YOUR_WRITES_SECONDS.
+    """
+    if ReadSessionLocal is None or _recent_write.get() or not replica_health.available():
+        return SessionLocal
+    return ReadSessionLocal
+
+
+def get_read_db():
+    """get_db for read-only routes."""
+    db = read_session_factory()()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def async_read_session_factory():
+    """read_session_factory for the async routes. A replica that is down is re-probed off the event loop."""
+    if AsyncReadSessionLocal is None or _recent_write.get():
+        return AsyncSessionLocal
+    if replica_health.healthy or await run_in_threadpool(replica_health.available):
+        return AsyncReadSessionLocal
+    return AsyncSessionLocal
+
+
+async def get_async_read_db():
+    """get_async_db for the async read routes."""
+    async with (await async_read_session_factory())() as db:
+        yield db
+
+
+class ReadYourWritesMiddleware:
+    """
+    After a successful write, sets a cookie that sends the client's reads to the primary for
+    READ_YOUR_WRITES_SECONDS, so they see their own change on any worker whatever the replica
+    lag. Pure ASGI, like MetricsMiddleware, and a no-op without a read replica.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or ReadSessionLocal is None:
+            await self.app(scope, receive, send)
+            return
+
+        if scope["method"] in _READ_METHODS:
+            try:
+                until = float(HTTPConnection(scope).cookies.get(WRITE_COOKIE, 0))
+            except ValueError:
+                until = 0
+            token = _recent_write.set(until > time.time())
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                _recent_write.reset(token)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                window = settings.READ_YOUR_WRITES_SECONDS
+                cookie = f"{WRITE_COOKIE}={time.time() + window:.3f}; Max-Age={int(window) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from sqlalchemy import text
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Filled in by create_app() and the lifespan hook; served by /health/ready
+startup_state = {
+    "ready": False,
+    "import_seconds": None,
+    "startup_seconds": None,
+    "steps": {},
+}
+
+
+def warm_database(engine, count: int) -> int:
+    """
+    Opens up to `count` pooled connections at once (capped at the pool size) and returns
+    them to the pool, so the first requests don't pay for connecting. Returns how many.
+    """
+    pool_size = getattr(engine.pool, "size", None)
+    if callable(pool_size):
+        count = min(count, pool_size())
+    connections = []
+    try:
+        for _ in range(count):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+async def warm_async_database(async_engine, count: int) -> int:
+    pool_size = getattr(async_engine.sync_engine.pool, "size", None)
+    if callable(pool_size):
+        count = min(count, pool_size())
+    connections = []
+    try:
+        for _ in range(count):
+            connection = await async_engine.connect()
+            connections.append(connection)
+            await connection.execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            await connection.close()
+    return len(connections)
+
+
+def warm_jwt() -> bool:
+    """Round-trips a token so python-jose loads its backends before the first request."""
+    from jose import jwt
+
+    from app.utils.jwt import ALGORITHM, SECRET_KEY, create_access_token
+
+    jwt.decode(create_access_token({"sub": "warm-up"}), SECRET_KEY, algorithms=[ALGORITHM])
+    return True
+
+
+def check_database() -> bool:
+    from app.core.database import engine
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+    return True
+
+
+async def _step(name: str, func, *args):
+    """Runs one warm-up step, recording its duration and result; failures are logged, not raised."""
+    started = time.perf_counter()
+    try:
+        if asyncio.iscoroutinefunction(func):
+            result = await func(*args)
+        else:
+            result = await asyncio.to_thread(func, *args)
+        ok = True
+    except Exception as e:
+        logger.exception("Startup step %s failed: %s", name, e)
+        result, ok = str(e), False
+    startup_state["steps"][name] = {"ok": ok, "result": result, "seconds": round(time.perf_counter() - started, 4)}
+    return ok
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warms the database pool, the hashing pool and JWT before the worker takes traffic,
+    starts the email outbox and the token revocation sync, and tears both pools down on shutdown.
+    The worker reports ready once the database answered.
+    """
+    from app.core.database import async_engine, async_read_engine, engine, read_engine
+    from app.utils.outbox import outbox_worker
+    from app.utils.revocation import revocation_sync
+    from app.utils.security import shutdown_hashing_executor, warm_hashing_pool
+
+    started = time.perf_counter()
+    warm_ups = [_step("database", warm_database, engine, settings.DB_WARM_CONNECTIONS), _step("jwt", warm_jwt)]
+    if read_engine is not None:
+        warm_ups.append(_step("read_database", warm_database, read_engine, settings.DB_WARM_CONNECTIONS))
+    if async_engine is not None:
+        warm_ups.append(_step("async_database", warm_async_database, async_engine, settings.DB_WARM_CONNECTIONS))
+    if async_read_engine is not None:
+        warm_ups.append(_step("async_read_database", warm_async_database, async_read_engine, settings.DB_WARM_CONNECTIONS))
+    if settings.HASH_POOL_WARM:
+        warm_ups.append(_step("hashing_pool", warm_hashing_pool))
+    # Loads the live revocations before the first request, then keeps them in sync
+    warm_ups.append(_step("token_revocations", revocation_sync.start))
+    results = await asyncio.gather(*warm_ups)
+
+    startup_state["startup_seconds"] = round(time.perf_counter() - started, 4)
+    startup_state["ready"] = results[0]
+    logger.info("Startup took %.3fs (imports %.3fs): %s",
+                startup_state["startup_seconds"], startup_state["import_seconds"] or 0, startup_state["steps"])
+
+    if settings.EMAIL_OUTBOX_ENABLED:
+        outbox_worker.start()
+    try:
+        yield
+    finally:
+        startup_state["ready"] = False
+        outbox_worker.stop()
+        revocation_sync.stop()
+        shutdown_hashing_executor()
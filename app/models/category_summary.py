@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, TIMESTAMP, func
+from app.core.database import Base
+
+class CategorySummary(Base):
+    """Per-user, per-category running totals over Product_Data, kept up to date by delta updates."""
+
+    __tablename__ = "category_summary"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    category = Column(String(25), primary_key=True)
+
+    sku_count = Column(Integer, nullable=False, default=0)
+    total_revenue = Column(Float, nullable=False, default=0)  # sum(selling_price * units_sold)
+    margin_sum = Column(Float, nullable=False, default=0)  # sum(selling_price - cost_price)
+    demand_forecast_sum = Column(Float, nullable=False, default=0)
+    stock_value = Column(Float, nullable=False, default=0)  # sum(cost_price * stock_available)
+
+    updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, TIMESTAMP, Index, func
+from app.core.database import Base
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String(10), nullable=False, default="pending")  # pending, sent or failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(500), nullable=True)
+    next_attempt_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp())
+
+    created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+    sent_at = Column(TIMESTAMP, nullable=True)
+
+    # The worker polls for due pending messages
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", status, next_attempt_at),
+    )
@@ -0,0 +1,39 @@
+from sqlalchemy import Column, Integer, Float, Date, ForeignKey, TIMESTAMP, Index, func
+from app.core.database import Base
+
+class ProductSalesDaily(Base):
+    """One units_sold snapshot per product per day; a later write the same day replaces it."""
+
+    __tablename__ = "product_sales_daily"
+
+    product_id = Column(Integer, ForeignKey("Product_Data.product_id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    units_sold = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_sales_daily_user_day", user_id, day),
+    )
+
+
+class ProductForecast(Base):
+    """
+    Cached time-series demand forecast. The row is deleted whenever a new snapshot arrives for
+    the product, so a missing row means the forecast must be recomputed; forecast is NULL when
+    the history is too short to fit.
+    """
+
+    __tablename__ = "product_forecast"
+
+    product_id = Column(Integer, ForeignKey("Product_Data.product_id", ondelete="CASCADE"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    forecast = Column(Float, nullable=True)
+    level = Column(Float, nullable=True)
+    trend = Column(Float, nullable=True)
+    days = Column(Integer, nullable=False, default=0)  # snapshots the fit used
+    last_day = Column(Date, nullable=True)
+    computed_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index("ix_product_forecast_user", user_id),
+    )
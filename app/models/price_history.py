@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, TIMESTAMP, Index, func
+from app.core.database import Base
+
+class PriceHistory(Base):
+    """Append-only log of (selling_price, units_sold) observations per product."""
+
+    __tablename__ = "product_price_history"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    product_id = Column(Integer, ForeignKey("Product_Data.product_id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    selling_price = Column(Float, nullable=False)
+    units_sold = Column(Integer, nullable=False)
+    recorded_at = Column(TIMESTAMP, server_default=func.current_timestamp())
+
+    __table_args__ = (
+        Index("ix_price_history_product_recorded", product_id, recorded_at),
+    )
+
+
+class ProductElasticity(Base):
+    """
+    Running sums of a per-product least-squares fit of ln(units_sold) on ln(selling_price).
+    Each observation adds to the sums, so the fit never needs the history again.
+    """
+
+    __tablename__ = "product_elasticity"
+
+    product_id = Column(Integer, ForeignKey("Product_Data.product_id", ondelete="CASCADE"), primary_key=True)
+    observations = Column(Integer, nullable=False, default=0)
+    sum_x = Column(Float, nullable=False, default=0)  # x = ln(selling_price)
+    sum_y = Column(Float, nullable=False, default=0)  # y = ln(units_sold)
+    sum_xx = Column(Float, nullable=False, default=0)
+    sum_xy = Column(Float, nullable=False, default=0)
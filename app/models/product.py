@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, TIMESTAMP, func
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, TIMESTAMP, Index, DDL, event, func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
@@ -16,10 +16,58 @@ class Product(Base):
     customer_rating = Column(Float, nullable=True)  
     demand_forecast = Column(Float, nullable=True)
     optimised_price = Column(Float, nullable=True)
+    # Set by POST /product/optimise; repricing and updates only recompute optimised_price
+    constrained_price = Column(Float, nullable=True)
     user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    # Incremented on every update; PATCH /product/update only applies if it is unchanged
+    version = Column(Integer, nullable=False, default=1, server_default="1")
 
     created_at = Column(TIMESTAMP, server_default=func.current_timestamp())
     updated_at = Column(TIMESTAMP, server_default=func.current_timestamp(), onupdate=func.current_timestamp())
 
     # Relationship with User 
     user = relationship("User", back_populates="products")
+
+    # Composite indexes backing keyset pagination of a user's catalog, one per sort key,
+    # and the search filters (name prefix, category, stock and demand ranges)
+    __table_args__ = (
+        Index("ix_product_data_user_product", user_id, product_id),
+        Index("ix_product_data_user_price", user_id, selling_price, product_id),
+        Index("ix_product_data_user_margin", user_id, (selling_price - cost_price), product_id),
+        Index("ix_product_data_user_updated", user_id, updated_at, product_id),
+        Index("ix_product_data_user_name", user_id, name).ddl_if(callable_=lambda *args, dialect, **kw: dialect.name != "sqlite"),
+        # SQLite's LIKE is case-insensitive, and only a NOCASE index can serve it
+        Index("ix_product_data_user_name_nocase", user_id, name.collate("NOCASE")).ddl_if(dialect="sqlite"),
+        Index("ix_product_data_user_category", user_id, category, product_id),
+        Index("ix_product_data_user_stock", user_id, stock_available, product_id),
+        Index("ix_product_data_user_demand", user_id, demand_forecast, product_id),
+        # Full-text search; SQLite gets the product_fts table below instead
+        Index("ix_product_data_fulltext", name, description, category, mysql_prefix="FULLTEXT").ddl_if(dialect="mysql"),
+    )
+
+
+# SQLite full-text search: an external-content FTS5 table over name, description and
+# category, kept in sync by triggers. Repricing doesn't touch these columns, so bulk
+# price updates don't reindex.
+SQLITE_SEARCH_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, description, category, content='Product_Data', content_rowid='product_id', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_insert AFTER INSERT ON "Product_Data" BEGIN
+        INSERT INTO product_fts(rowid, name, description, category)
+        VALUES (new.product_id, new.name, new.description, new.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_delete AFTER DELETE ON "Product_Data" BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, category)
+        VALUES ('delete', old.product_id, old.name, old.description, old.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_update AFTER UPDATE OF name, description, category ON "Product_Data" BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, category)
+        VALUES ('delete', old.product_id, old.name, old.description, old.category);
+        INSERT INTO product_fts(rowid, name, description, category)
+        VALUES (new.product_id, new.name, new.description, new.category);
+    END""",
+)
+
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(Product.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
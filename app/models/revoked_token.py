@@ -0,0 +1,16 @@
+from sqlalchemy import Column, String, TIMESTAMP, Index, func
+from app.core.database import Base
+
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)
+    # The token's own expiry; after it the row is useless and gets purged
+    expires_at = Column(TIMESTAMP, nullable=False)
+    revoked_at = Column(TIMESTAMP, nullable=False, server_default=func.current_timestamp())
+
+    # Workers sync entries revoked since their last pass, and purge expired ones
+    __table_args__ = (
+        Index("ix_revoked_tokens_revoked_at", revoked_at),
+        Index("ix_revoked_tokens_expires_at", expires_at),
+    )
@@ -6,12 +6,14 @@ class User(Base):
     __tablename__ = "users"
 
     id = Column(Integer, primary_key=True, index=True)
-    first_name = Column(String, nullable=False)
-    last_name = Column(String, nullable=False)
-    email = Column(String, unique=True, index=True, nullable=False)
-    hashed_password = Column(String, nullable=False)  
+    first_name = Column(String(255), nullable=False)
+    last_name = Column(String(255), nullable=False)
+    email = Column(String(255), unique=True, index=True, nullable=False)
+    hashed_password = Column(String(255), nullable=False)  
     is_verified = Column(Boolean, default=False)  
-    verification_token = Column(String, nullable=True) 
+    verification_token = Column(String(255), nullable=True, index=True)  # verify_email looks users up by it
+    # Bumped on every write to the user's products; dashboard ETags are derived from it
+    catalog_version = Column(Integer, nullable=False, default=0, server_default="0")
 
     
     products = relationship("Product", back_populates="user")
@@ -0,0 +1,199 @@
+"""
+Async versions of the read-only routes, mounted instead of their sync versions when
+DB_ASYNC_MODE is on. They await the async engine rather than holding a threadpool
+worker for every query, which is what limits concurrent dashboard polling. Like the sync
+routes, they read from the replica (ASYNC_READ_DATABASE_URL) when one is configured,
+except right after the client's own writes. Write routes stay on the sync engine.
+"""
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from fastapi.responses import StreamingResponse
+from app.core.auth_guard import get_current_user_async
+from app.core.read_routing import async_read_session_factory, get_async_read_db
+from app.models.user import User
+from app.schemas.product import CategoryAnalytics, ProductResponse, SimulationRequest
+from app.schemas.user import UserResponse
+from app.utils.analytics import category_analytics, summary_query
+from app.utils.export import stream_export_async
+from app.utils.product_reads import CatalogPage, check_last_id, check_simulated, export_download, last_id_query
+from app.utils.simulation import simulation_count_query, stream_simulation_async
+from typing import List, Optional
+
+router = APIRouter()
+
+
+@router.get("/product/dashboard", response_model=List[ProductResponse], tags=["Product"])
+async def get_dashboard(
+    request: Request,
+    page: int = Query(1, ge=1, description="Page number for pagination"),
+    limit: int = Query(20, ge=1, le=50, description="Limit per page (max 50)"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page; takes precedence over page"),
+    sort: str = Query("product_id", pattern="^(product_id|price|margin|updated_at)$", description="Sort key"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Sort direction"),
+    db = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Returns all products for the logged-in user with pagination.
+    When another page follows, its cursor is returned in the X-Next-Cursor header.
+    Pages carry an ETag derived from the user's catalog version; a matching
+    If-None-Match gets a 304 without reading Product_Data.
+    """
+
+    page_request = CatalogPage.dashboard(current_user.id, page, limit, after, sort, order)
+
+    try:
+        cached = page_request.cached(request.headers.get("if-none-match"), await db.scalar(page_request.version_query))
+        if cached is not None:
+            return cached
+        return page_request.render((await db.execute(page_request.rows_query(db.get_bind().dialect.name))).all())
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.get("/product/search", response_model=List[ProductResponse], tags=["Product"])
+async def search_products(
+    request: Request,
+    q: Optional[str] = Query(None, max_length=200, description="Words matched (as prefixes) against name, description and category"),
+    name_prefix: Optional[str] = Query(None, min_length=1, max_length=100, description="Name starts with"),
+    category: Optional[str] = Query(None, max_length=25, description="Exact category"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    min_margin: Optional[float] = Query(None, description="Minimum selling_price - cost_price"),
+    max_margin: Optional[float] = Query(None, description="Maximum selling_price - cost_price"),
+    min_stock: Optional[int] = Query(None, ge=0),
+    max_stock: Optional[int] = Query(None, ge=0),
+    min_demand: Optional[float] = Query(None, description="Minimum demand forecast"),
+    max_demand: Optional[float] = Query(None, description="Maximum demand forecast"),
+    limit: int = Query(20, ge=1, le=50, description="Limit per page (max 50)"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    sort: str = Query("product_id", pattern="^(product_id|price|margin|updated_at)$", description="Sort key"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Sort direction"),
+    db = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Searches the logged-in user's products. Full-text matching uses the FULLTEXT index on
+    MySQL and the product_fts table on SQLite; the other filters use the composite indexes.
+    Paginated with the same cursors and ETags as the dashboard.
+    """
+
+    page_request = CatalogPage.search(
+        current_user.id, limit, after, sort, order,
+        q=q, name_prefix=name_prefix, category=category,
+        min_price=min_price, max_price=max_price, min_margin=min_margin, max_margin=max_margin,
+        min_stock=min_stock, max_stock=max_stock, min_demand=min_demand, max_demand=max_demand,
+    )
+
+    try:
+        cached = page_request.cached(request.headers.get("if-none-match"), await db.scalar(page_request.version_query))
+        if cached is not None:
+            return cached
+        return page_request.render((await db.execute(page_request.rows_query(db.get_bind().dialect.name))).all())
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.get("/product/analytics", response_model=List[CategoryAnalytics], tags=["Product"])
+async def get_analytics(
+    db = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Returns per-category rollups of the user's catalog, read from the maintained summary table.
+    """
+
+    try:
+        return category_analytics((await db.scalars(summary_query(current_user.id))).all())
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.post("/product/simulate", tags=["Product"])
+async def simulate_prices(
+    simulation: SimulationRequest,
+    db = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    What-if pricing: streams NDJSON, one line per product, with demand, revenue and profit
+    at every candidate price, the most profitable candidate and the current optimised price.
+    """
+
+    try:
+        selection = {"product_ids": simulation.product_ids, "category": simulation.category}
+        check_simulated(await db.scalar(simulation_count_query(current_user.id, **selection)))
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+    user_id = current_user.id
+    session_factory = await async_read_session_factory()
+
+    async def lines():
+        # The request's session is closed before the body streams, so the generator opens its own
+        async with session_factory() as stream_db:
+            async for line in stream_simulation_async(stream_db, user_id, prices=simulation.prices, multipliers=simulation.multipliers, **selection):
+                yield line
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@router.get("/product/export", tags=["Product"])
+async def export_products(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson|parquet)$", description="csv, ndjson or parquet"),
+    columns: Optional[str] = Query(None, description="Comma-separated fields to include (default: all)"),
+    gzip: bool = Query(False, description="Gzip the file as it streams"),
+    current_user: User = Depends(get_current_user_async)
+):
+    """
+    Streams the logged-in user's whole catalog as a file download, in product_id order.
+    Rows are read from a server-side cursor and encoded batch by batch, so memory use
+    does not depend on catalog size. Parquet needs pyarrow installed.
+    """
+
+    fields, media_type, headers = export_download(export_format, columns, gzip)
+
+    user_id = current_user.id
+    session_factory = await async_read_session_factory()
+
+    async def chunks():
+        # Dependency sessions are closed before the body streams, so the export opens its own
+        async with session_factory() as export_db:
+            async for chunk in stream_export_async(export_db, user_id, export_format, fields, gzip):
+                yield chunk
+
+    return StreamingResponse(chunks(), media_type=media_type, headers=headers)
+
+
+@router.get("/product/last-id", response_model=int, tags=["Product"])
+async def get_last_product_id(
+    db = Depends(get_async_read_db),
+    current_user: User = Depends(get_current_user_async)
+):
+
+    try:
+        return check_last_id(await db.scalar(last_id_query(current_user.id)))
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.get("/profile/", response_model=UserResponse, tags=["User Profile"])
+async def get_profile(current_user: User = Depends(get_current_user_async)):
+    """Returns the authenticated user's profile."""
+    return current_user
@@ -1,16 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response, Request
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.core.database import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse
-from app.utils.security import hash_password
-from app.utils.email import send_verification_email
+from app.utils.security import HashingBusyError, hash_password_async, password_needs_rehash, verify_password_async
+from app.utils.email import enqueue_verification_email
+from app.utils.outbox import outbox_worker
 from app.utils.jwt import create_access_token,verify_token
-from app.utils.security import verify_password
+from app.utils.revocation import revocation_list, revoke_token
 import uuid
 from pydantic import BaseModel
-from app.core.auth_guard import get_current_user
+from app.core.auth_guard import get_current_user, invalidate_cached_user
+from app.core.rate_limit import limit_login, limit_signup
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import timedelta
 
@@ -19,11 +22,21 @@ router = APIRouter(
     tags=["Authentication"]
 )
 
+def _hashing_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Server is busy, please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
 @router.post("/signup/", response_model=UserResponse)
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, request: Request, db: Session = Depends(get_db)):
+    # Async so bcrypt can be awaited on the hashing pool; DB calls go to the threadpool
+    # Throttled first, so rejected attempts cost neither a query nor a hash
+    await limit_signup(request)
     try:
         # Check if email already exists
-        existing_user = db.query(User).filter(User.email == user.email).first()
+        existing_user = await run_in_threadpool(lambda: db.query(User).filter(User.email == user.email).first())
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -31,7 +44,7 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
             )
 
         # Hash the password and generate verification token
-        hashed_pw = hash_password(user.password)
+        hashed_pw = await hash_password_async(user.password)
         verification_token = str(uuid.uuid4())  
 
         new_user = User(
@@ -45,14 +58,20 @@ def register_user(user: UserCreate, db: Session = Depends(get_db)):
 
         
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
-
-        # Send verification email 
-        send_verification_email(user.email, verification_token)
+        # Queue the verification email in the same transaction; the outbox worker sends it
+        enqueue_verification_email(db, user.email, verification_token)
+        await run_in_threadpool(db.commit)
+        await run_in_threadpool(db.refresh, new_user)
+        outbox_worker.wake()
 
         return new_user
 
+    except HTTPException:
+        raise
+
+    except HashingBusyError:
+        raise _hashing_busy()
+
     except IntegrityError:
         db.rollback()  # Rollback changes if there's a DB integrity error
         raise HTTPException(
@@ -79,6 +98,7 @@ def verify_email(token: str, db: Session = Depends(get_db)):
         user.is_verified = True
         user.verification_token = None  
         db.commit()
+        invalidate_cached_user(user.email)
 
         return {"message": "Email verified successfully. You can now log in."}
 
@@ -91,16 +111,23 @@ class LoginRequest(BaseModel):
     password: str
 
 @router.post("/login/")
-def login(user_credentials: LoginRequest, response: Response, db: Session = Depends(get_db)):
+async def login(user_credentials: LoginRequest, response: Response, request: Request, db: Session = Depends(get_db)):
     """Handles user login and stores JWT in an HTTP-Only Cookie."""
+    # Per-IP and per-account token buckets, checked before any query or bcrypt work
+    await limit_login(request, user_credentials.email)
     try:
-        user = db.query(User).filter(User.email == user_credentials.email).first()
-        if not user or not verify_password(user_credentials.password, user.hashed_password):
+        user = await run_in_threadpool(lambda: db.query(User).filter(User.email == user_credentials.email).first())
+        if not user or not await verify_password_async(user_credentials.password, user.hashed_password):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password.")
 
         if not user.is_verified:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Please verify your email before logging in.")
 
+        # Upgrade the stored hash if BCRYPT_ROUNDS changed since it was made
+        if password_needs_rehash(user.hashed_password):
+            user.hashed_password = await hash_password_async(user_credentials.password)
+            await run_in_threadpool(db.commit)
+
         # Generate JWT Token
         access_token = create_access_token(data={"sub": user.email}, expires_delta=timedelta(minutes=30))
         refresh_token = create_access_token(data={"sub": user.email}, expires_delta=timedelta(days=7))
@@ -130,21 +157,40 @@ def login(user_credentials: LoginRequest, response: Response, db: Session = Depe
             }
         }
 
+    except HTTPException:
+        raise
+
+    except HashingBusyError:
+        raise _hashing_busy()
+
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))    
 
 
 @router.post("/logout/")
-def logout(response: Response):
-    """Clears JWT by removing cookie."""
-    response.delete_cookie("access_token")  
-    # response.delete_cookie("refresh_token") ## deleting refresh token on logout
+def logout(response: Response, request: Request, db: Session = Depends(get_db)):
+    """Clears JWT by removing cookie, and revokes both tokens so copies of them stop working."""
+    try:
+        for cookie in ("access_token", "refresh_token"):
+            token = request.cookies.get(cookie)
+            payload = verify_token(token) if token else None
+            if payload:
+                revoke_token(db, payload)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+    response.delete_cookie("access_token")
+    response.delete_cookie("refresh_token")
     return {"message": "Successfully logged out"}
 
 
 @router.post("/refresh/")
-def refresh_token(response: Response, request: Request):
-    """Refresh the access token using the refresh token stored in cookies."""
+def refresh_token(response: Response, request: Request, db: Session = Depends(get_db)):
+    """Refresh the access token using the refresh token stored in cookies.
+    The refresh token is rotated: the old one is revoked and a new one set, and so is
+    the access token presented with it, so a logout after a refresh revokes everything."""
     
     refresh_token = request.cookies.get("refresh_token")
     if not refresh_token:
@@ -156,15 +202,30 @@ def refresh_token(response: Response, request: Request):
         if email is None:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
-        
+        if payload.get("jti") and revocation_list.is_revoked(payload["jti"]):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Refresh token has been revoked")
+
+        revoke_token(db, payload)
+        access_token = request.cookies.get("access_token")
+        access_payload = verify_token(access_token) if access_token else None
+        if access_payload and access_payload.get("sub") == email:
+            revoke_token(db, access_payload)
+        db.commit()
+
         new_access_token = create_access_token(data={"sub": email}, expires_delta=timedelta(minutes=30))
+        new_refresh_token = create_access_token(data={"sub": email}, expires_delta=timedelta(days=7))
 
         
         response.set_cookie("access_token", new_access_token, httponly=True, samesite="Lax", max_age=1800)
+        response.set_cookie("refresh_token", new_refresh_token, httponly=False, samesite="Lax", max_age=604800)
 
         return {"message": "Access token refreshed"}
 
+    except HTTPException:
+        raise
+
     except:
+        db.rollback()
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token")
 
 @router.get("/get-token")
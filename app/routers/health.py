@@ -0,0 +1,33 @@
+from fastapi import APIRouter, status
+from fastapi.responses import JSONResponse
+from app.core.read_routing import replica_health
+from app.core.startup import check_database, startup_state
+
+router = APIRouter(
+    prefix="/health",
+    tags=["Monitoring"]
+)
+
+
+@router.get("/live")
+def liveness():
+    """The process is up and serving requests."""
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def readiness():
+    """
+    200 once startup warm-up has finished and the database answers, 503 before that.
+    A worker whose database was down at startup becomes ready as soon as it answers.
+    """
+    if not startup_state["ready"]:
+        try:
+            startup_state["ready"] = check_database()
+        except Exception:
+            pass
+
+    code = status.HTTP_200_OK if startup_state["ready"] else status.HTTP_503_SERVICE_UNAVAILABLE
+    # The replica is optional: reads fall back to the primary, so it doesn't affect readiness
+    replica = None if replica_health.engine is None else replica_health.available()
+    return JSONResponse(status_code=code, content={**startup_state, "read_replica_healthy": replica})
@@ -0,0 +1,18 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import CallbackMetric, registry
+from app.core.auth_guard import user_cache
+from app.utils.catalog import page_cache
+
+router = APIRouter(tags=["Monitoring"])
+
+registry.register(CallbackMetric("user_cache_hits_total", "get_current_user cache hits.", "counter", lambda: user_cache.hits))
+registry.register(CallbackMetric("user_cache_misses_total", "get_current_user cache misses.", "counter", lambda: user_cache.misses))
+registry.register(CallbackMetric("dashboard_page_cache_hits_total", "Rendered dashboard page cache hits.", "counter", lambda: page_cache.hits))
+registry.register(CallbackMetric("dashboard_page_cache_misses_total", "Rendered dashboard page cache misses.", "counter", lambda: page_cache.misses))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Prometheus scrape endpoint."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
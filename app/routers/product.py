@@ -1,35 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request
 from sqlalchemy.orm import Session
 from app.core.database import get_db
 from app.models.product import Product
-from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate, ProductResponseBody
+from app.models.price_history import PriceHistory, ProductElasticity
+from app.models.forecast import ProductForecast, ProductSalesDaily
+from sqlalchemy import delete, select, update
+from app.schemas.product import ProductCreate, ProductResponse, ProductUpdate, ProductResponseBody, ProductImportReport, RepriceReport, CategoryAnalytics, SimulationRequest, ProductBatchUpdate, ProductBatchReport, OptimiseRequest, OptimiseReport
 from app.core.auth_guard import get_current_user
+from app.core.read_routing import get_read_db, read_session_factory
+from app.utils.product_import import import_products, iter_csv_records, iter_ndjson_records
+from app.utils.pricing import calculate_demand_forecast, calculate_optimised_price, reprice_catalog
+from app.utils.pagination import PRODUCT_RESPONSE_COLUMNS
+from app.utils.analytics import category_analytics, get_summary, product_snapshot, record_product_change
+from app.utils.elasticity import record_observations
+from app.utils.forecast import record_sales
+from app.utils.optimiser import optimise_catalog
+from app.utils.simulation import simulation_count_query, stream_simulation
+from app.utils.product_reads import CatalogPage, check_last_id, check_simulated, export_download, last_id_query
+from app.utils.batch_update import UPDATE_READ_COLUMNS, BatchConflictError, apply_batch_update, apply_updates, check_update
+from app.utils.export import stream_export
+from app.utils.catalog import bump_catalog_version
 from datetime import datetime
-from typing import List
-from fastapi.responses import JSONResponse
+from typing import List, Optional
+from fastapi.responses import JSONResponse, StreamingResponse
 
 router = APIRouter(
     prefix="/product",
     tags=["Product"]
 )
 
-def calculate_demand_forecast(units_sold: int, selling_price: float) -> float:
-    if selling_price <= 0:
-        return 0  
-
-    base_demand = max(units_sold * 1.2, 10)  
-    price_factor = 1 - (selling_price / 1000)  
-    
-    return round(base_demand * price_factor, 2)
-
-def calculate_optimised_price(cost_price: float, selling_price: float, demand_forecast: float) -> float:
-
-    profit_margin = (selling_price - cost_price) / cost_price if cost_price > 0 else 0
-    price_adjustment = demand_forecast * 0.02  
-    
-    optimised_price = max(cost_price * (1 + profit_margin) + price_adjustment, cost_price)
-    return round(optimised_price, 2)
-
 @router.post("/add", response_model=ProductResponse)
 def add_new_product(
     product_data: ProductCreate,
@@ -60,6 +59,11 @@ def add_new_product(
         )
 
         db.add(new_product)
+        db.flush()
+        record_observations(db, [(new_product.product_id, current_user.id, new_product.selling_price, new_product.units_sold)])
+        record_sales(db, [(new_product.product_id, current_user.id, new_product.units_sold)])
+        record_product_change(db, current_user.id, new=product_snapshot(new_product))
+        bump_catalog_version(db, current_user.id)
         db.commit()
         db.refresh(new_product)
 
@@ -70,30 +74,241 @@ def add_new_product(
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.post("/import", response_model=ProductImportReport)
+def import_product_file(
+    file: UploadFile = File(..., description="CSV file with a header row, or NDJSON with one product per line"),
+    file_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$", description="Defaults to the file extension"),
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Bulk-imports products from a CSV or NDJSON upload.
+    The file is parsed incrementally and inserted in batches; invalid rows are reported, not inserted.
+    """
+
+    if file_format is None:
+        filename = (file.filename or "").lower()
+        file_format = "ndjson" if filename.endswith((".ndjson", ".jsonl")) else "csv"
+
+    try:
+        records = iter_ndjson_records(file.file) if file_format == "ndjson" else iter_csv_records(file.file)
+        return import_products(db, current_user.id, records)
+
+    except UnicodeDecodeError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="File must be UTF-8 encoded.")
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.post("/reprice", response_model=RepriceReport)
+def reprice_products(
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Recomputes demand forecast and optimised price for the user's whole catalog in one pass.
+    """
+
+    try:
+        return reprice_catalog(db, current_user.id)
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.post("/optimise", response_model=OptimiseReport)
+def optimise_products(
+    request: OptimiseRequest,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Optimises the prices of the user's catalog, or one category, together: maximises expected
+    profit under per-category margin targets, a price floor and stock limits, and writes the
+    result to constrained_price.
+    """
+
+    try:
+        report = optimise_catalog(
+            db, current_user.id, request.category, request.margin_targets, request.default_margin_target,
+            request.min_margin, request.max_change, write=not request.dry_run,
+        )
+        if report is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No products found for the user.")
+        return report
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.get("/analytics", response_model=List[CategoryAnalytics])
+def get_analytics(
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Returns per-category rollups of the user's catalog, read from the maintained summary table.
+    """
+
+    try:
+        return category_analytics(get_summary(db, current_user.id))
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.post("/simulate")
+def simulate_prices(
+    simulation: SimulationRequest,
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    What-if pricing: streams NDJSON, one line per product, with demand, revenue and profit
+    at every candidate price, the most profitable candidate and the current optimised price.
+    """
+
+    try:
+        selection = {"product_ids": simulation.product_ids, "category": simulation.category}
+        check_simulated(db.scalar(simulation_count_query(current_user.id, **selection)))
+
+    except HTTPException:
+        raise
+
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+    user_id = current_user.id
+    session_factory = read_session_factory()
+
+    def lines():
+        # The request's session is closed before the body streams, so the generator opens its own
+        stream_db = session_factory()
+        try:
+            yield from stream_simulation(stream_db, user_id, prices=simulation.prices, multipliers=simulation.multipliers, **selection)
+        finally:
+            stream_db.close()
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.get("/dashboard", response_model=List[ProductResponse])
 def get_dashboard(
+    request: Request,
     page: int = Query(1, ge=1, description="Page number for pagination"),
     limit: int = Query(20, ge=1, le=50, description="Limit per page (max 50)"),
-    db: Session = Depends(get_db),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page; takes precedence over page"),
+    sort: str = Query("product_id", pattern="^(product_id|price|margin|updated_at)$", description="Sort key"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Sort direction"),
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     """
     Returns all products for the logged-in user with pagination.
+    When another page follows, its cursor is returned in the X-Next-Cursor header.
+    Pages carry an ETag derived from the user's catalog version; a matching
+    If-None-Match gets a 304 without reading Product_Data.
     """
 
+    page_request = CatalogPage.dashboard(current_user.id, page, limit, after, sort, order)
+
     try:
-        skip = (page - 1) * limit  # Calculate offset
-        products = db.query(Product).filter(Product.user_id == current_user.id).offset(skip).limit(limit).all()
+        cached = page_request.cached(request.headers.get("if-none-match"), db.scalar(page_request.version_query))
+        if cached is not None:
+            return cached
+        return page_request.render((db.execute(page_request.rows_query(db.get_bind().dialect.name))).all())
 
-        if not products:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No products found for the user.")
+    except HTTPException:
+        raise
 
-        return products
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
+@router.get("/search", response_model=List[ProductResponse])
+def search_products(
+    request: Request,
+    q: Optional[str] = Query(None, max_length=200, description="Words matched (as prefixes) against name, description and category"),
+    name_prefix: Optional[str] = Query(None, min_length=1, max_length=100, description="Name starts with"),
+    category: Optional[str] = Query(None, max_length=25, description="Exact category"),
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    min_margin: Optional[float] = Query(None, description="Minimum selling_price - cost_price"),
+    max_margin: Optional[float] = Query(None, description="Maximum selling_price - cost_price"),
+    min_stock: Optional[int] = Query(None, ge=0),
+    max_stock: Optional[int] = Query(None, ge=0),
+    min_demand: Optional[float] = Query(None, description="Minimum demand forecast"),
+    max_demand: Optional[float] = Query(None, description="Maximum demand forecast"),
+    limit: int = Query(20, ge=1, le=50, description="Limit per page (max 50)"),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    sort: str = Query("product_id", pattern="^(product_id|price|margin|updated_at)$", description="Sort key"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Sort direction"),
+    db: Session = Depends(get_read_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Searches the logged-in user's products. Full-text matching uses the FULLTEXT index on
+    MySQL and the product_fts table on SQLite; the other filters use the composite indexes.
+    Paginated with the same cursors and ETags as the dashboard.
+    """
+
+    page_request = CatalogPage.search(
+        current_user.id, limit, after, sort, order,
+        q=q, name_prefix=name_prefix, category=category,
+        min_price=min_price, max_price=max_price, min_margin=min_margin, max_margin=max_margin,
+        min_stock=min_stock, max_stock=max_stock, min_demand=min_demand, max_demand=max_demand,
+    )
+
+    try:
+        cached = page_request.cached(request.headers.get("if-none-match"), db.scalar(page_request.version_query))
+        if cached is not None:
+            return cached
+        return page_request.render((db.execute(page_request.rows_query(db.get_bind().dialect.name))).all())
+
+    except HTTPException:
+        raise
 
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 
+@router.get("/export")
+def export_products(
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson|parquet)$", description="csv, ndjson or parquet"),
+    columns: Optional[str] = Query(None, description="Comma-separated fields to include (default: all)"),
+    gzip: bool = Query(False, description="Gzip the file as it streams"),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Streams the logged-in user's whole catalog as a file download, in product_id order.
+    Rows are read from a server-side cursor and encoded batch by batch, so memory use
+    does not depend on catalog size. Parquet needs pyarrow installed.
+    """
+
+    fields, media_type, headers = export_download(export_format, columns, gzip)
+
+    user_id = current_user.id
+    session_factory = read_session_factory()
+
+    def chunks():
+        # Dependency sessions are closed before the body streams, so the export opens its own
+        export_db = session_factory()
+        try:
+            yield from stream_export(export_db, user_id, export_format, fields, gzip)
+        finally:
+            export_db.close()
+
+    return StreamingResponse(chunks(), media_type=media_type, headers=headers)
+
+
 @router.delete("/delete/{product_id}")
 def delete_product(
     product_id: int,
@@ -102,13 +317,17 @@ def delete_product(
 ):
     
     try:
-        print("user_id: ",Product.user_id)
         product = db.query(Product).filter(Product.product_id == product_id, Product.user_id == current_user.id).first()
 
         if not product:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or unauthorized.")
 
         
+        record_product_change(db, current_user.id, old=product_snapshot(product))
+        bump_catalog_version(db, current_user.id)
+        # Not left to ON DELETE CASCADE: SQLite can reuse the id, and the next product would inherit them
+        for model in (PriceHistory, ProductElasticity, ProductSalesDaily, ProductForecast):
+            db.execute(delete(model).where(model.product_id == product_id))
         db.delete(product)
         db.commit()
 
@@ -118,6 +337,29 @@ def delete_product(
         db.rollback()
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
+@router.patch("/batch", response_model=ProductBatchReport)
+def batch_update_products(
+    batch: ProductBatchUpdate,
+    db: Session = Depends(get_db),
+    current_user: dict = Depends(get_current_user)
+):
+    """
+    Updates many products in one transaction. Each item is checked like PATCH /update;
+    items that fail are reported and skipped, the rest are written together. 409 (and
+    nothing written) if one of them changes while the batch is applied.
+    """
+
+    try:
+        return apply_batch_update(db, current_user.id, [item.dict(exclude_unset=True) for item in batch.items])
+
+    except BatchConflictError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+
+
 @router.patch("/update/{product_id}", response_model=ProductResponse)
 def update_product(
     product_id: int,
@@ -125,51 +367,56 @@ def update_product(
     db: Session = Depends(get_db),
     current_user: dict = Depends(get_current_user)
 ):
+    """
+    Updates a product with one conditional UPDATE ... WHERE version = <version read>,
+    returning the new row where the database supports RETURNING. Sends 409 if the product
+    changed since it was read, or since the client read the version it sent.
+    """
     try:
-        
-        product = db.query(Product).filter(Product.product_id == product_id, Product.user_id == current_user.id).first()
-        print("ProductName: ",product)
-        if not product:
+
+        current = db.execute(
+            select(*UPDATE_READ_COLUMNS)
+            .outerjoin(ProductElasticity, ProductElasticity.product_id == Product.product_id)
+            .outerjoin(ProductForecast, ProductForecast.product_id == Product.product_id)
+            .where(Product.product_id == product_id, Product.user_id == current_user.id)
+        ).mappings().first()
+        if not current:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Product not found or unauthorized.")
 
-        
         update_fields = product_data.dict(exclude_unset=True)
+        expected_version = update_fields.pop("version", None)
+        if expected_version is not None and expected_version != current["version"]:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail=f"Product was modified (version {current['version']}, not {expected_version}). Reload and retry.")
+
+        error = check_update(current, update_fields)
+        if error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+
+        [new_values] = apply_updates(db, current_user.id, [(current, update_fields)])
+        values = {field: new_values[field] for field in (*update_fields, "demand_forecast", "optimised_price")}
+
+        statement = (
+            update(Product)
+            .where(Product.product_id == product_id, Product.user_id == current_user.id, Product.version == current["version"])
+            .values(**values, version=Product.version + 1)
+        )
+        returning = db.get_bind().dialect.update_returning
+        if returning:
+            statement = statement.returning(*PRODUCT_RESPONSE_COLUMNS)
+        result = db.execute(statement)
+        updated = result.first() if returning else None
+        if (updated is None) if returning else result.rowcount != 1:
+            db.rollback()
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Product was modified concurrently. Reload and retry.")
+        if not returning:
+            updated = db.execute(select(*PRODUCT_RESPONSE_COLUMNS).where(Product.product_id == product_id)).first()
+
+        record_product_change(db, current_user.id, old=product_snapshot(current), new=product_snapshot(new_values))
+        bump_catalog_version(db, current_user.id)
+        db.commit()
 
-        print("update_fields: ",update_fields)
-        new_units_sold = update_fields.get("units_sold", product.units_sold)
-        new_stock_available = update_fields.get("stock_available", product.stock_available)
-
-        if "units_sold" in update_fields and "stock_available" in update_fields:
-            if new_units_sold > new_stock_available:
-                print("Yo")
-                db.rollback() 
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                                    detail="Units sold cannot be greater than stock available.")
-        elif "units_sold" in update_fields:  
-            if new_units_sold > product.stock_available:
-                db.rollback()  
-                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
-                                    detail=f"Units sold ({new_units_sold}) cannot exceed current stock available ({product.stock_available}).")
-
-        
-        if "units_sold" in update_fields or "selling_price" in update_fields:
-            new_selling_price = update_fields.get("selling_price", product.selling_price)
-            product.demand_forecast = calculate_demand_forecast(new_units_sold, new_selling_price)
-
-        
-        if "cost_price" in update_fields or "selling_price" in update_fields:
-            new_cost_price = update_fields.get("cost_price", product.cost_price)
-            new_selling_price = update_fields.get("selling_price", product.selling_price)
-            product.optimised_price = calculate_optimised_price(new_cost_price, new_selling_price, product.demand_forecast)
-
-        
-        for field, value in update_fields.items():
-            setattr(product, field, value)
-
-        db.commit()  
-        db.refresh(product)
-
-        return product
+        return updated._asdict()
         # # # Convert SQLAlchemy ORM Object to Dictionary
         # product["updated_at"] = datetime.utcnow().isoformat()
         # product["created_at"] = datetime.utcnow().isoformat()
@@ -186,23 +433,24 @@ def update_product(
 
 
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         db.rollback()
-        return HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
     
 @router.get("/last-id", response_model=int)
 def get_last_product_id(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: dict = Depends(get_current_user)
 ):
     
     try:
-        last_product = db.query(Product).order_by(Product.product_id.desc()).first()
-
-        if not last_product:
-            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No products found for the user.")
+        return check_last_id(db.scalar(last_id_query(current_user.id)))
 
-        return last_product.product_id
+    except HTTPException:
+        raise
 
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, confloat, validator
-from typing import Optional,Dict, Any
+from typing import Optional,Dict, Any, List
 from datetime import datetime
 
 
@@ -27,9 +27,11 @@ class ProductResponse(ProductCreate):
     customer_rating: float = Field(4.5, description="Default customer rating of 4.5.")
     demand_forecast: Optional[float] = Field(None, description="Auto-calculated demand forecast based on sales & price.")
     optimised_price: Optional[float] = Field(None, description="Auto-calculated optimized price based on demand & cost.")
+    constrained_price: Optional[float] = Field(None, description="Price from the last catalog optimisation (POST /product/optimise).")
     user_id: int
     created_at: datetime
     updated_at: datetime
+    version: int = Field(1, description="Send back with an update to reject it if the product changed meanwhile.")
 
     class Config:
         from_attributes = True  
@@ -42,9 +44,93 @@ class ProductUpdate(BaseModel):
     category: Optional[str] = Field(None, max_length=25)
     stock_available: Optional[int] = Field(None, ge=0)
     units_sold: Optional[int] = Field(None, ge=0)
+    version: Optional[int] = Field(None, ge=1, description="The version last read; the update fails with 409 if it no longer matches.")
 
 class ProductResponseBody(BaseModel):
     status_code: Optional[int]
     status: Optional[str]
     data: Optional[Dict[str, Any]] 
-    message: Optional[str]
\ No newline at end of file
+    message: Optional[str]
+
+class ProductImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+class ProductImportReport(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[ProductImportError] = Field(default_factory=list, description="Per-row errors (first 1000 only).")
+
+class RepriceReport(BaseModel):
+    scanned: int = Field(..., description="Products read.")
+    repriced: int = Field(..., description="Products whose forecast or optimised price changed.")
+
+class CategoryAnalytics(BaseModel):
+    category: str
+    sku_count: int
+    total_revenue: float = Field(..., description="Sum of selling_price * units_sold.")
+    avg_margin: float = Field(..., description="Average of selling_price - cost_price.")
+    avg_demand_forecast: float
+    stock_value: float = Field(..., description="Sum of cost_price * stock_available.")
+
+class SimulationRequest(BaseModel):
+    product_ids: Optional[List[int]] = Field(None, min_length=1, max_length=10000, description="Products to simulate (or give category).")
+    category: Optional[str] = Field(None, min_length=1, max_length=25, description="Simulate every product in this category.")
+    prices: Optional[List[confloat(gt=0)]] = Field(None, min_length=1, max_length=200, description="Candidate selling prices, the same for every product.")
+    multipliers: Optional[List[confloat(gt=0)]] = Field(None, min_length=1, max_length=200, description="Candidate prices as multiples of each product's current selling price.")
+
+    @validator("category", always=True)
+    def check_selection(cls, category, values):
+        """Exactly one of product_ids and category."""
+        if (values.get("product_ids") is None) == (category is None):
+            raise ValueError("Give either product_ids or category.")
+        return category
+
+    @validator("multipliers", always=True)
+    def check_grid(cls, multipliers, values):
+        """Exactly one of prices and multipliers."""
+        if (values.get("prices") is None) == (multipliers is None):
+            raise ValueError("Give either prices or multipliers.")
+        return multipliers
+
+class ProductBatchItem(ProductUpdate):
+    product_id: int
+
+class ProductBatchUpdate(BaseModel):
+    items: List[ProductBatchItem] = Field(..., min_length=1, max_length=5000, description="One entry per product; only the fields given are changed.")
+
+class ProductBatchResult(BaseModel):
+    product_id: int
+    status: str = Field(..., description="updated, not_found, invalid, conflict or duplicate.")
+    detail: Optional[str] = None
+
+class ProductBatchReport(BaseModel):
+    updated: int
+    failed: int
+    results: List[ProductBatchResult]
+
+class OptimiseRequest(BaseModel):
+    category: Optional[str] = Field(None, min_length=1, max_length=25, description="Only optimise this category (default: the whole catalog).")
+    margin_targets: Dict[str, confloat(ge=0, lt=1)] = Field(default_factory=dict, description="Minimum demand-weighted margin, (price - cost) / price, per category.")
+    default_margin_target: Optional[confloat(ge=0, lt=1)] = Field(None, description="Margin target for categories not in margin_targets.")
+    min_margin: confloat(ge=0) = Field(0, description="Price floor as a markup on cost: price >= cost * (1 + min_margin).")
+    max_change: Optional[confloat(gt=0, le=5)] = Field(None, description="Largest price move as a fraction of the selling price (default from settings).")
+    dry_run: bool = Field(False, description="Solve and report without writing constrained_price.")
+
+class OptimiseCategoryResult(BaseModel):
+    category: str
+    margin_target: Optional[float] = None
+    margin: Optional[float] = Field(None, description="Demand-weighted margin at the optimised prices.")
+    multiplier: float = Field(..., description="Shadow price of the margin target (0 when not binding).")
+    feasible: bool = Field(..., description="False if the target can't be met within the price bounds.")
+
+class OptimiseReport(BaseModel):
+    products: int
+    updated: int = Field(..., description="Products whose constrained price changed.")
+    iterations: int
+    converged: bool
+    floor_infeasible: int = Field(..., description="Products whose margin floor is above the max_change cap; priced at the cap.")
+    stock_infeasible: int = Field(..., description="Products whose stock can't cover demand at any price up to the cap; priced at the cap.")
+    expected_profit_before: float = Field(..., description="Expected profit at the current selling prices.")
+    expected_profit_after: float = Field(..., description="Expected profit at the optimised prices.")
+    categories: List[OptimiseCategoryResult]
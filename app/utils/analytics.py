@@ -0,0 +1,155 @@
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.orm import Session
+
+from app.models.category_summary import CategorySummary
+from app.models.product import Product
+from app.utils.upsert import upsert_increment
+
+SUMMARY_FIELDS = ("sku_count", "total_revenue", "margin_sum", "demand_forecast_sum", "stock_value")
+
+# Product fields the summary is derived from
+PRODUCT_FIELDS = ("category", "cost_price", "selling_price", "stock_available", "units_sold", "demand_forecast")
+
+# Summed totals may differ from a rebuild by float rounding
+CHECK_TOLERANCE = 1e-6
+
+
+def product_snapshot(product) -> Dict[str, Any]:
+    """Copies the summary-relevant fields of a Product (or row dict) before it changes."""
+    if isinstance(product, Mapping):
+        return {field: product.get(field) for field in PRODUCT_FIELDS}
+    return {field: getattr(product, field) for field in PRODUCT_FIELDS}
+
+
+def _contribution(snapshot: Mapping[str, Any]) -> Dict[str, float]:
+    selling_price = snapshot["selling_price"]
+    cost_price = snapshot["cost_price"]
+    return {
+        "sku_count": 1,
+        "total_revenue": selling_price * (snapshot["units_sold"] or 0),
+        "margin_sum": selling_price - cost_price,
+        "demand_forecast_sum": snapshot["demand_forecast"] or 0,
+        "stock_value": cost_price * (snapshot["stock_available"] or 0),
+    }
+
+
+def collect_deltas(removed: Iterable[Mapping[str, Any]] = (), added: Iterable[Mapping[str, Any]] = ()) -> Dict[str, Dict[str, float]]:
+    """Sums the summary changes for removing and adding product snapshots, per category."""
+    deltas: Dict[str, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(SUMMARY_FIELDS, 0))
+    for sign, snapshots in ((-1, removed), (1, added)):
+        for snapshot in snapshots:
+            totals = deltas[snapshot["category"]]
+            for field, value in _contribution(snapshot).items():
+                totals[field] += sign * value
+    return deltas
+
+
+def apply_deltas(db: Session, user_id: int, deltas: Mapping[str, Mapping[str, float]]):
+    """
+    Adds per-category deltas to the user's summary rows in the current transaction.
+    Categories whose last product went away are removed.
+    """
+    deltas = {category: totals for category, totals in deltas.items() if any(totals.values())}
+    if not deltas:
+        return
+
+    upsert_increment(
+        db, CategorySummary, ("user_id", "category"), SUMMARY_FIELDS,
+        [{"user_id": user_id, "category": category, **totals} for category, totals in deltas.items()],
+    )
+
+    # Only a category that lost a product can have dropped to zero
+    if not any(totals["sku_count"] < 0 for totals in deltas.values()):
+        return
+
+    db.execute(
+        delete(CategorySummary).where(
+            CategorySummary.user_id == user_id,
+            CategorySummary.category.in_(list(deltas)),
+            CategorySummary.sku_count <= 0,
+        )
+    )
+
+
+def record_product_change(db: Session, user_id: int, old: Optional[Mapping[str, Any]] = None,
+                          new: Optional[Mapping[str, Any]] = None):
+    """Updates the summary for one product being added (old=None), changed, or deleted (new=None)."""
+    apply_deltas(db, user_id, collect_deltas([old] if old else [], [new] if new else []))
+
+
+def _aggregate_query(user_id: Optional[int]):
+    query = select(
+        Product.user_id,
+        Product.category,
+        func.count().label("sku_count"),
+        func.coalesce(func.sum(Product.selling_price * func.coalesce(Product.units_sold, 0)), 0).label("total_revenue"),
+        func.coalesce(func.sum(Product.selling_price - Product.cost_price), 0).label("margin_sum"),
+        func.coalesce(func.sum(func.coalesce(Product.demand_forecast, 0)), 0).label("demand_forecast_sum"),
+        func.coalesce(func.sum(Product.cost_price * func.coalesce(Product.stock_available, 0)), 0).label("stock_value"),
+    ).group_by(Product.user_id, Product.category)
+    if user_id is not None:
+        query = query.where(Product.user_id == user_id)
+    return query
+
+
+def rebuild_summary(db: Session, user_id: Optional[int] = None) -> int:
+    """Recomputes the summary from Product_Data for one user (or everyone) and commits."""
+    clear = delete(CategorySummary)
+    if user_id is not None:
+        clear = clear.where(CategorySummary.user_id == user_id)
+    db.execute(clear)
+
+    columns = ("user_id", "category", *SUMMARY_FIELDS)
+    result = db.execute(
+        CategorySummary.__table__.insert().from_select(columns, _aggregate_query(user_id))
+    )
+    db.commit()
+    return result.rowcount
+
+
+def check_summary(db: Session, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Compares the summary with a fresh aggregate and returns the rows that disagree."""
+    expected = {(row.user_id, row.category): row._asdict() for row in db.execute(_aggregate_query(user_id))}
+
+    stored_query = select(CategorySummary)
+    if user_id is not None:
+        stored_query = stored_query.where(CategorySummary.user_id == user_id)
+    stored = {(row.user_id, row.category): row for row in db.scalars(stored_query)}
+
+    mismatches = []
+    for key in expected.keys() | stored.keys():
+        want, have = expected.get(key), stored.get(key)
+        differs = [
+            field for field in SUMMARY_FIELDS
+            if want is None or have is None
+            or abs((want[field] or 0) - getattr(have, field)) > CHECK_TOLERANCE * max(1, abs(want[field] or 0))
+        ]
+        if differs:
+            mismatches.append({"user_id": key[0], "category": key[1], "fields": differs})
+    return mismatches
+
+
+def summary_query(user_id: int):
+    return select(CategorySummary).where(CategorySummary.user_id == user_id).order_by(CategorySummary.category)
+
+
+def get_summary(db: Session, user_id: int) -> List[CategorySummary]:
+    return db.scalars(summary_query(user_id)).all()
+
+
+def category_analytics(summary: Iterable[CategorySummary]) -> List[Dict[str, Any]]:
+    """The GET /product/analytics rows (CategoryAnalytics fields) for a user's summary rows."""
+    return [
+        {
+            "category": row.category,
+            "sku_count": row.sku_count,
+            "total_revenue": round(row.total_revenue, 2),
+            "avg_margin": round(row.margin_sum / row.sku_count, 2),
+            "avg_demand_forecast": round(row.demand_forecast_sum / row.sku_count, 2),
+            "stock_value": round(row.stock_value, 2),
+        }
+        for row in summary
+    ]
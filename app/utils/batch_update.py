@@ -0,0 +1,205 @@
+from typing import Any, Dict, List, Mapping, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.models.forecast import ProductForecast
+from app.models.price_history import ProductElasticity
+from app.models.product import Product
+from app.utils.analytics import apply_deltas, collect_deltas, product_snapshot
+from app.utils.catalog import bump_catalog_version
+from app.utils.elasticity import STAT_FIELDS, fit_arrays, observation_terms, record_observations
+from app.utils.forecast import record_sales
+from app.utils.pricing import calculate_demand_forecast_array, calculate_optimised_price_array
+
+# Fields a batch item may set, in the order they are written back
+UPDATABLE_FIELDS = ("name", "description", "cost_price", "selling_price", "category", "stock_available", "units_sold")
+
+# Columns that may not be set to null
+_REQUIRED_FIELDS = ("name", "cost_price", "selling_price", "category")
+
+# What an update needs to know about a product: its current values, version, elasticity
+# sums (NULL without statistics) and cached forecast (NULL without one). Select from
+# Product outer-joined to ProductElasticity and ProductForecast.
+UPDATE_READ_COLUMNS = (
+    Product.product_id,
+    *(getattr(Product, field) for field in UPDATABLE_FIELDS),
+    Product.demand_forecast,
+    Product.optimised_price,
+    Product.version,
+    *(getattr(ProductElasticity, field) for field in STAT_FIELDS),
+    ProductForecast.forecast,
+)
+
+# Every target row gets the full set of columns, so one executemany covers the whole batch.
+# The version condition makes a row that changed since it was read match nothing.
+_BULK_PRODUCT_UPDATE = (
+    update(Product.__table__)
+    .where(
+        Product.__table__.c.product_id == bindparam("b_product_id"),
+        Product.__table__.c.user_id == bindparam("b_user_id"),
+        Product.__table__.c.version == bindparam("b_version"),
+    )
+    .values(
+        **{field: bindparam(f"b_{field}") for field in UPDATABLE_FIELDS},
+        demand_forecast=bindparam("b_demand_forecast"),
+        optimised_price=bindparam("b_optimised_price"),
+        version=Product.__table__.c.version + 1,
+    )
+)
+
+
+class BatchConflictError(Exception):
+    """Raised when a product changed between the batch reading and writing it; nothing is written."""
+
+
+def check_update(current: Mapping[str, Any], fields: Mapping[str, Any]) -> str | None:
+    """The checks PATCH /product/update and /product/batch apply to each product; returns the error, if any."""
+    for field in _REQUIRED_FIELDS:
+        if field in fields and fields[field] is None:
+            return f"{field} cannot be null."
+
+    if "units_sold" in fields and "stock_available" in fields:
+        if fields["units_sold"] is not None and fields["stock_available"] is not None \
+                and fields["units_sold"] > fields["stock_available"]:
+            return "Units sold cannot be greater than stock available."
+    elif "units_sold" in fields and fields["units_sold"] is not None:
+        if fields["units_sold"] > (current["stock_available"] or 0):
+            return f"Units sold ({fields['units_sold']}) cannot exceed current stock available ({current['stock_available']})."
+    return None
+
+
+def apply_updates(db: Session, user_id: int, targets: List[Tuple[Mapping[str, Any], Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    The new rows for (current row, set fields) pairs, current rows as read with UPDATE_READ_COLUMNS.
+
+    Records the observations and sales snapshots the changes imply, then recomputes
+    demand_forecast (when units_sold or selling_price change) and optimised_price (when
+    cost_price or selling_price do) as arrays. Nothing is written to Product_Data.
+    """
+    new_rows = [{**row, **fields} for row, fields in targets]
+    demand_changed = np.array([bool({"units_sold", "selling_price"} & fields.keys()) for _, fields in targets])
+    sales_changed = ["units_sold" in fields for _, fields in targets]
+    price_changed = np.array([bool({"cost_price", "selling_price"} & fields.keys()) for _, fields in targets])
+
+    record_observations(db, [
+        (row["product_id"], user_id, row["selling_price"], row["units_sold"])
+        for row, changed in zip(new_rows, demand_changed.tolist()) if changed
+    ])
+    # New sales data invalidates the cached forecast, here and in the table
+    record_sales(db, [
+        (row["product_id"], user_id, row["units_sold"]) for row, changed in zip(new_rows, sales_changed) if changed
+    ])
+    for row, changed in zip(new_rows, sales_changed):
+        if changed:
+            row["forecast"] = None
+
+    # Fits include the observations just recorded
+    sums = []
+    for row, changed in zip(new_rows, demand_changed.tolist()):
+        stats = {field: row[field] or 0 for field in STAT_FIELDS}
+        for field, value in ((observation_terms(row["selling_price"], row["units_sold"]) or {}) if changed else {}).items():
+            stats[field] += value
+        sums.append(tuple(stats[field] for field in STAT_FIELDS))
+    columns = np.array(
+        [(row["units_sold"], row["selling_price"], row["cost_price"], row["demand_forecast"], row["optimised_price"], *stats, row["forecast"])
+         for row, stats in zip(new_rows, sums)],
+        dtype=np.float64,
+    )
+    units_sold, selling_price, cost_price = np.nan_to_num(columns[:, 0]), columns[:, 1], columns[:, 2]
+    intercept, elasticity = fit_arrays(*columns[:, 5:10].T)
+
+    demand_forecast = np.where(
+        demand_changed,
+        calculate_demand_forecast_array(units_sold, selling_price, intercept, elasticity, columns[:, 10]),
+        columns[:, 3],
+    )
+    optimised_price = np.where(
+        price_changed,
+        calculate_optimised_price_array(cost_price, selling_price, demand_forecast),
+        columns[:, 4],
+    )
+
+    for row, demand, price in zip(new_rows, demand_forecast.tolist(), optimised_price.tolist()):
+        # NaN is a forecast/price that was NULL and stays unchanged
+        row["demand_forecast"] = None if demand != demand else demand
+        row["optimised_price"] = None if price != price else price
+
+    return new_rows
+
+
+def apply_batch_update(db: Session, user_id: int, items: List[Dict[str, Any]]) -> dict:
+    """
+    Applies PATCH /product/update semantics to many products at once.
+
+    items are {"product_id": ..., <set fields>, optionally "version"}. Targets are loaded with one IN query
+    scoped to the user, checked one by one, repriced as arrays (demand when units_sold or
+    selling_price change, optimised price when cost_price or selling_price do), written
+    with one bulk UPDATE and committed once. Returns a per-item status report; raises
+    BatchConflictError if a product changed between the read and the write.
+    """
+    results = []
+    seen = set()
+    for item in items:
+        status = "duplicate" if item["product_id"] in seen else None
+        results.append({"product_id": item["product_id"], "status": status, "detail": None})
+        seen.add(item["product_id"])
+
+    current = {
+        row.product_id: row._asdict()
+        for row in db.execute(
+            select(*UPDATE_READ_COLUMNS)
+            .outerjoin(ProductElasticity, ProductElasticity.product_id == Product.product_id)
+            .outerjoin(ProductForecast, ProductForecast.product_id == Product.product_id)
+            .where(Product.user_id == user_id, Product.product_id.in_(list(seen)))
+        )
+    }
+
+    targets = []
+    for item, result in zip(items, results):
+        if result["status"] == "duplicate":
+            result["detail"] = "Product appears earlier in this batch."
+            continue
+        row = current.get(item["product_id"])
+        if row is None:
+            result["status"], result["detail"] = "not_found", "Product not found or unauthorized."
+            continue
+        fields = {field: value for field, value in item.items() if field not in ("product_id", "version")}
+        if item.get("version") is not None and item["version"] != row["version"]:
+            result["status"], result["detail"] = "conflict", f"Product was modified (version {row['version']}, not {item['version']})."
+            continue
+        error = check_update(row, fields)
+        if error:
+            result["status"], result["detail"] = "invalid", error
+            continue
+        result["status"] = "updated"
+        targets.append((row, fields))
+
+    if not targets:
+        return _report(results)
+
+    new_rows = apply_updates(db, user_id, targets)
+
+    written = db.execute(_BULK_PRODUCT_UPDATE, [
+        {"b_product_id": row["product_id"], "b_user_id": user_id, "b_version": row["version"],
+         **{f"b_{field}": row[field] for field in (*UPDATABLE_FIELDS, "demand_forecast", "optimised_price")}}
+        for row in new_rows
+    ])
+    if db.get_bind().dialect.supports_sane_multi_rowcount and written.rowcount != len(new_rows):
+        db.rollback()
+        raise BatchConflictError("Some products were modified while the batch was applied. Reload and retry.")
+
+    apply_deltas(db, user_id, collect_deltas(
+        removed=[product_snapshot(row) for row, _ in targets],
+        added=[product_snapshot(row) for row in new_rows],
+    ))
+    bump_catalog_version(db, user_id)
+    db.commit()
+
+    return _report(results)
+
+
+def _report(results: List[dict]) -> dict:
+    updated = sum(result["status"] == "updated" for result in results)
+    return {"updated": updated, "failed": len(results) - updated, "results": results}
@@ -0,0 +1,64 @@
+import hashlib
+import json
+from typing import Iterable, Optional
+
+import orjson
+from fastapi import Response, status
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.user import User
+from app.utils.cache import SizedLRUCache
+from app.utils.pagination import PRODUCT_RESPONSE_FIELDS
+
+# Rendered dashboard pages: (user_id, catalog_version, page params) -> (body, next_cursor).
+# Entries for old versions are never read again and age out of the LRU.
+page_cache = SizedLRUCache(settings.DASHBOARD_CACHE_MAX_ENTRIES, settings.DASHBOARD_CACHE_MAX_BYTES)
+
+
+def bump_catalog_version(db: Session, user_id: Optional[int] = None):
+    """
+    Marks the user's catalog (every catalog when user_id is None) as changed, in the
+    current transaction. Call on every write to Product_Data.
+    """
+    statement = update(User).values(catalog_version=User.catalog_version + 1)
+    if user_id is not None:
+        statement = statement.where(User.id == user_id)
+    db.execute(statement)
+
+
+def catalog_version_query(user_id: int):
+    """SELECT of the user's catalog version; a primary key lookup on users."""
+    return select(User.catalog_version).where(User.id == user_id)
+
+
+def page_etag(user_id: int, version: int, *params) -> str:
+    """Strong ETag for a page: same user, catalog version and parameters means the same body."""
+    key = json.dumps([user_id, version, *params], separators=(",", ":"))
+    return '"' + hashlib.sha256(key.encode()).hexdigest()[:32] + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def render_products(rows: Iterable) -> bytes:
+    """
+    Serializes dashboard_query rows to the same JSON the ProductResponse response_model
+    produces. Rows come straight from the database, so the model's validation is skipped.
+    """
+    return orjson.dumps([dict(zip(PRODUCT_RESPONSE_FIELDS, row)) for row in rows])
+
+
+def page_response(body: Optional[bytes], etag: str, next_cursor: Optional[str] = None) -> Response:
+    """200 with the rendered page, or 304 Not Modified when body is None."""
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if body is None:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,98 @@
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.price_history import PriceHistory, ProductElasticity
+from app.utils.upsert import upsert_increment
+
+STAT_FIELDS = ("observations", "sum_x", "sum_y", "sum_xx", "sum_xy")
+
+# Below this spread of ln(price) the slope is not identifiable
+_MIN_PRICE_VARIANCE = 1e-6
+
+
+def observation_terms(price: float, units: int) -> Optional[dict]:
+    """One observation's contribution to the fit sums, or None if it can't be fitted."""
+    if price <= 0 or not units or units <= 0:
+        return None
+    x, y = math.log(price), math.log(units)
+    return {"observations": 1, "sum_x": x, "sum_y": y, "sum_xx": x * x, "sum_xy": x * y}
+
+
+def record_observations(db: Session, observations: Iterable[Tuple[int, int, float, int]]):
+    """
+    Appends (product_id, user_id, selling_price, units_sold) observations to the price history
+    and folds them into each product's running fit sums, in the current transaction.
+    Observations with a non-positive price or zero sales are logged but not fitted.
+    """
+    observations = list(observations)
+    if not observations:
+        return
+
+    now = datetime.utcnow()
+    db.execute(insert(PriceHistory), [
+        {"product_id": product_id, "user_id": user_id, "selling_price": price, "units_sold": units, "recorded_at": now}
+        for product_id, user_id, price, units in observations
+    ])
+
+    sums = defaultdict(lambda: dict.fromkeys(STAT_FIELDS, 0))
+    for product_id, _, price, units in observations:
+        terms = observation_terms(price, units)
+        if terms is None:
+            continue
+        stats = sums[product_id]
+        for field, value in terms.items():
+            stats[field] += value
+
+    upsert_increment(db, ProductElasticity, ("product_id",), STAT_FIELDS,
+                     [{"product_id": product_id, **stats} for product_id, stats in sums.items()])
+
+
+def fit_from_sums(observations: int, sum_x: float, sum_y: float, sum_xx: float, sum_xy: float) -> Optional[Tuple[float, float]]:
+    """
+    Returns (intercept, elasticity) of ln(q) = intercept + elasticity * ln(p), or None when
+    there are too few observations, the prices never varied, or demand did not fall with price.
+    """
+    if observations < settings.ELASTICITY_MIN_OBSERVATIONS:
+        return None
+    variance = observations * sum_xx - sum_x * sum_x
+    if variance <= _MIN_PRICE_VARIANCE * observations * observations:
+        return None
+    slope = (observations * sum_xy - sum_x * sum_y) / variance
+    if not slope < 0:
+        return None
+    return (sum_y - slope * sum_x) / observations, slope
+
+
+def fit_arrays(observations, sum_x, sum_y, sum_xx, sum_xy) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized fit_from_sums. Returns (intercept, elasticity) arrays with NaN where there is
+    no usable fit (including products with no statistics, passed as NaN).
+    """
+    n = np.nan_to_num(np.asarray(observations, dtype=np.float64))
+    sum_x, sum_y, sum_xx, sum_xy = (np.asarray(values, dtype=np.float64) for values in (sum_x, sum_y, sum_xx, sum_xy))
+
+    variance = n * sum_xx - sum_x * sum_x
+    usable = (n >= settings.ELASTICITY_MIN_OBSERVATIONS) & (variance > _MIN_PRICE_VARIANCE * n * n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = np.where(usable, (n * sum_xy - sum_x * sum_y) / np.where(usable, variance, 1.0), np.nan)
+        usable &= slope < 0
+        intercept = np.where(usable, (sum_y - slope * sum_x) / np.where(usable, n, 1.0), np.nan)
+    return intercept, np.where(usable, slope, np.nan)
+
+
+def get_fit(db: Session, product_id: int) -> Optional[Tuple[float, float]]:
+    # Read the row rather than the identity map, which would miss an upsert made in this transaction
+    stats = db.execute(
+        select(*(getattr(ProductElasticity, field) for field in STAT_FIELDS))
+        .where(ProductElasticity.product_id == product_id)
+    ).first()
+    if stats is None:
+        return None
+    return fit_from_sums(*stats)
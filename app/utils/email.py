@@ -1,23 +1,92 @@
 import smtplib
+import time
+from datetime import datetime
 from email.message import EmailMessage
+from sqlalchemy.orm import Session
 from app.core.config import settings
+from app.models.email_outbox import EmailOutbox
 
-def send_verification_email(email: str, token: str):
-    try:
-        verification_link = f"{settings.BACKEND_URL}/auth/verify-email/{token}"
-        
-        msg = EmailMessage()
-        msg["Subject"] = "Verify Your Email"
-        msg["From"] = settings.EMAIL_SENDER
-        msg["To"] = email
-        msg.set_content(f"Click the link to verify your email: {verification_link}")
-
-        with smtplib.SMTP(settings.SMTP_SERVER, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.EMAIL_SENDER, settings.EMAIL_PASSWORD)
-            server.send_message(msg)
-
-        print(f"Verification email sent to {email}")
-
-    except Exception as e:
-        print(f"Error sending email: {e}")
+# Reconnection check (NOOP) for connections idle longer than this
+SMTP_IDLE_CHECK_SECONDS = 30
+
+
+def build_message(recipient: str, subject: str, body: str) -> EmailMessage:
+    msg = EmailMessage()
+    msg["Subject"] = subject
+    msg["From"] = settings.EMAIL_SENDER
+    msg["To"] = recipient
+    msg.set_content(body)
+    return msg
+
+
+def enqueue_verification_email(db: Session, email: str, token: str) -> EmailOutbox:
+    """
+    Adds the verification email to the outbox. The caller commits it together with the
+    user row; the outbox worker sends it.
+    """
+    verification_link = f"{settings.BACKEND_URL}/auth/verify-email/{token}"
+
+    message = EmailOutbox(
+        recipient=email,
+        subject="Verify Your Email",
+        body=f"Click the link to verify your email: {verification_link}",
+        # The worker compares against utcnow; the server default would be in the database's time zone
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(message)
+    return message
+
+
+class SMTPConnection:
+    """
+    One authenticated SMTP connection, opened on first send and reused afterwards.
+    A connection the server dropped is re-opened once before the send fails.
+    """
+
+    def __init__(self, host: str = None, port: int = None):
+        self.host = host or settings.SMTP_SERVER
+        self.port = port or settings.SMTP_PORT
+        self._server: smtplib.SMTP | None = None
+        self._last_used = 0.0
+
+    def _connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=settings.SMTP_TIMEOUT_SECONDS)
+        try:
+            if settings.SMTP_STARTTLS:
+                server.starttls()
+            if settings.EMAIL_PASSWORD:
+                server.login(settings.EMAIL_SENDER, settings.EMAIL_PASSWORD)
+        except Exception:
+            server.close()
+            raise
+        self._server = server
+
+    def _is_alive(self) -> bool:
+        if time.monotonic() - self._last_used < SMTP_IDLE_CHECK_SECONDS:
+            return True
+        try:
+            return self._server.noop()[0] == 250
+        except smtplib.SMTPException:
+            return False
+
+    def send(self, msg: EmailMessage):
+        if self._server is not None and not self._is_alive():
+            self.close()
+        if self._server is None:
+            self._connect()
+
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            self.close()
+            self._connect()
+            self._server.send_message(msg)
+        self._last_used = time.monotonic()
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except Exception:
+                self._server.close()
+            self._server = None
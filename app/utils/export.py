@@ -0,0 +1,194 @@
+import csv
+import io
+import zlib
+from collections import deque
+from datetime import datetime
+from typing import AsyncIterator, Iterable, Iterator, List, Optional, Sequence
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.utils.pagination import PRODUCT_RESPONSE_COLUMNS, PRODUCT_RESPONSE_FIELDS
+
+# Rows fetched from the server-side cursor and encoded per step; also the Parquet row group size
+EXPORT_BATCH_SIZE = 10000
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+_COLUMNS = dict(zip(PRODUCT_RESPONSE_FIELDS, PRODUCT_RESPONSE_COLUMNS))
+
+
+def export_fields(columns: Optional[str]) -> List[str]:
+    """
+    Parses the comma-separated `columns` projection (default: every ProductResponse field).
+    Raises ValueError on unknown names.
+    """
+    if not columns:
+        return list(PRODUCT_RESPONSE_FIELDS)
+    fields = [name.strip() for name in columns.split(",") if name.strip()]
+    unknown = [name for name in fields if name not in _COLUMNS]
+    if unknown or not fields:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown) or columns}. Choose from {', '.join(PRODUCT_RESPONSE_FIELDS)}.")
+    return list(dict.fromkeys(fields))
+
+
+def export_query(user_id: int, fields: Sequence[str], batch_size: int = EXPORT_BATCH_SIZE):
+    return (
+        select(*(_COLUMNS[field] for field in fields))
+        .where(Product.user_id == user_id)
+        .order_by(Product.product_id)
+        .execution_options(stream_results=True, yield_per=batch_size)
+    )
+
+
+def iter_batches(db: Session, user_id: int, fields: Sequence[str], batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[list]:
+    """
+    Yields the user's products in product_id order, batch_size rows at a time, from a
+    server-side cursor so the full result is never buffered by the driver or the ORM.
+    """
+    result = db.execute(export_query(user_id, fields, batch_size))
+    try:
+        yield from result.partitions()
+    finally:
+        result.close()
+
+
+def encode_csv(fields: Sequence[str], batches: Iterable[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    # Header only for an empty catalog
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def encode_ndjson(fields: Sequence[str], batches: Iterable[list]) -> Iterator[bytes]:
+    for rows in batches:
+        # Appending as we go frees each line's buffer right away; joining a list of them
+        # kept every (over-allocated) buffer alive until the end of the batch
+        chunk = bytearray()
+        for row in rows:
+            chunk += orjson.dumps(dict(zip(fields, row)), option=orjson.OPT_APPEND_NEWLINE)
+        yield bytes(chunk)
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands back what was written since the last drain()."""
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def encode_parquet(fields: Sequence[str], batches: Iterable[list]) -> Iterator[bytes]:
+    """One row group per batch, streamed as each is written. Requires pyarrow."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _ChunkSink()
+    schema = pa.schema([(field, _arrow_type(pa, field)) for field in fields])
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        for rows in batches:
+            writer.write_table(pa.Table.from_pylist([dict(zip(fields, row)) for row in rows], schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _arrow_type(pa, field: str):
+    column = _COLUMNS[field]
+    python_type = column.type.python_type
+    if python_type is int:
+        return pa.int64()
+    if python_type is float:
+        return pa.float64()
+    if python_type is datetime:
+        return pa.timestamp("us")
+    return pa.string()
+
+
+def gzip_stream(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Compresses a byte stream into a gzip member on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+_ENCODERS = {"csv": encode_csv, "ndjson": encode_ndjson, "parquet": encode_parquet}
+
+
+def stream_export(db: Session, user_id: int, export_format: str, fields: Sequence[str], gzip: bool = False) -> Iterator[bytes]:
+    chunks = _ENCODERS[export_format](fields, iter_batches(db, user_id, fields))
+    return gzip_stream(chunks) if gzip else chunks
+
+
+class _BatchFeed:
+    """
+    Batches for an encoder, handed over one at a time by stream_export_async. Every encoder
+    yields once per batch it reads, so each next() on it consumes exactly the batch just added.
+    """
+
+    def __init__(self):
+        self.batches = deque()
+
+    def __iter__(self):
+        while self.batches:
+            yield self.batches.popleft()
+
+
+async def stream_export_async(db: AsyncSession, user_id: int, export_format: str, fields: Sequence[str],
+                              gzip: bool = False) -> AsyncIterator[bytes]:
+    """stream_export on an async session: batches are awaited from the server-side cursor and encoded as they arrive."""
+    feed = _BatchFeed()
+    chunks = _ENCODERS[export_format](fields, feed)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if gzip else None
+
+    def encoded(chunk: bytes) -> bytes:
+        return compressor.compress(chunk) if compressor else chunk
+
+    result = await db.stream(export_query(user_id, fields))
+    try:
+        async for rows in result.partitions():
+            feed.batches.append(rows)
+            data = encoded(next(chunks))
+            if data:
+                yield data
+    finally:
+        await result.close()
+    # What the encoder writes after the last batch (the CSV header of an empty export, Parquet's footer)
+    tail = b"".join(encoded(chunk) for chunk in chunks) + (compressor.flush() if compressor else b"")
+    if tail:
+        yield tail
@@ -0,0 +1,160 @@
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import String, delete, select, type_coerce
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.forecast import ProductForecast, ProductSalesDaily
+from app.models.product import Product
+from app.utils.pricing import round_prices
+from app.utils.upsert import upsert_replace
+
+FORECAST_CHUNK_SIZE = 5000
+
+
+def record_sales(db: Session, sales: Iterable[Tuple[int, int, Optional[int]]], day: Optional[date] = None):
+    """
+    Stores (product_id, user_id, units_sold) as the products' snapshot for `day` (today, UTC)
+    and drops their cached forecasts, in the current transaction.
+    """
+    day = day or datetime.utcnow().date()
+    rows = [
+        {"product_id": product_id, "day": day, "user_id": user_id, "units_sold": units}
+        for product_id, user_id, units in sales if units is not None
+    ]
+    if not rows:
+        return
+    upsert_replace(db, ProductSalesDaily, ("product_id", "day"), ("units_sold",), rows)
+    db.execute(delete(ProductForecast).where(ProductForecast.product_id.in_([row["product_id"] for row in rows])))
+
+
+def snapshot_sales(db: Session, user_id: int | None = None, day: Optional[date] = None,
+                   chunk_size: int = FORECAST_CHUNK_SIZE) -> int:
+    """Records every product's current units_sold as its snapshot for `day`; the daily job. Returns how many."""
+    recorded = 0
+    last_id = 0
+    while True:
+        query = (
+            select(Product.product_id, Product.user_id, Product.units_sold)
+            .where(Product.product_id > last_id)
+            .order_by(Product.product_id)
+            .limit(chunk_size)
+        )
+        if user_id is not None:
+            query = query.where(Product.user_id == user_id)
+        rows = db.execute(query).all()
+        if not rows:
+            return recorded
+        record_sales(db, rows, day)
+        db.commit()
+        recorded += len(rows)
+        last_id = rows[-1].product_id
+
+
+def holt_smooth(values: np.ndarray, alpha: float, beta: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Holt's linear trend smoothing of many series at once: `values` is products x days with
+    NaN for days without a snapshot. Each series starts at its first snapshot with zero
+    trend; a missing day advances the level by the trend. Returns the final (level, trend)
+    and each series' number of snapshots (level is NaN for a series with none).
+    """
+    products, steps = values.shape
+    level = np.full(products, np.nan)
+    trend = np.zeros(products)
+    for step in range(steps):
+        observed_value = values[:, step]
+        observed = ~np.isnan(observed_value)
+        started = ~np.isnan(level)
+
+        predicted = level + trend
+        smoothed = alpha * observed_value + (1 - alpha) * predicted
+        updating = observed & started
+        trend = np.where(updating, beta * (smoothed - level) + (1 - beta) * trend, trend)
+        level = np.where(updating, smoothed, np.where(started, predicted, observed_value))
+    return level, trend, (~np.isnan(values)).sum(axis=1)
+
+
+def forecast_arrays(level: np.ndarray, trend: np.ndarray, days: np.ndarray,
+                    horizon: int | None = None, min_days: int | None = None) -> np.ndarray:
+    """Demand `horizon` days past the last step, rounded like the price fields; NaN without enough history."""
+    horizon = settings.FORECAST_HORIZON_DAYS if horizon is None else horizon
+    min_days = settings.FORECAST_MIN_DAYS if min_days is None else min_days
+    forecast = np.maximum(level + horizon * trend, 0)
+    return np.where(days >= min_days, round_prices(np.nan_to_num(forecast)), np.nan)
+
+
+def _stale_products(db: Session, user_id: int | None):
+    """(user_id, product_id) of products with snapshots but no cached forecast, grouped by user."""
+    query = (
+        select(ProductSalesDaily.user_id, ProductSalesDaily.product_id)
+        .outerjoin(ProductForecast, ProductForecast.product_id == ProductSalesDaily.product_id)
+        .where(ProductForecast.product_id.is_(None))
+        .distinct()
+        .order_by(ProductSalesDaily.user_id, ProductSalesDaily.product_id)
+    )
+    if user_id is not None:
+        query = query.where(ProductSalesDaily.user_id == user_id)
+    return db.execute(query).all()
+
+
+def refresh_forecasts(db: Session, user_id: int | None = None, today: Optional[date] = None,
+                      chunk_size: int = FORECAST_CHUNK_SIZE) -> dict:
+    """
+    Recomputes the cached forecast of every product that has none (new sales since the last
+    run), for one user or everyone. Each user's stale products are smoothed together as one
+    products x days array, chunk_size products at a time, and each chunk is committed on its own.
+    """
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=settings.FORECAST_HISTORY_DAYS)
+    users = fitted = forecasted = 0
+
+    for owner, stale in groupby(_stale_products(db, user_id), key=lambda row: row.user_id):
+        users += 1
+        product_ids = [row.product_id for row in stale]
+        for offset in range(0, len(product_ids), chunk_size):
+            chunk = product_ids[offset:offset + chunk_size]
+            sales = ProductSalesDaily.__table__.c
+            # Days are left as the driver returns them (ISO strings on SQLite, dates on MySQL)
+            # and parsed by NumPy in one go, rather than one date object per row
+            rows = db.execute(
+                select(sales.product_id, type_coerce(sales.day, String), sales.units_sold)
+                .where(sales.product_id.in_(chunk), sales.day >= start, sales.day <= today)
+            ).all()
+
+            values = np.full((len(chunk), (today - start).days + 1), np.nan)
+            if rows:
+                ids, days, units = zip(*rows)
+                product_index = np.searchsorted(chunk, ids)
+                day_index = (np.array(days, dtype="datetime64[D]") - np.datetime64(start, "D")).astype(np.int64)
+                values[product_index, day_index] = units
+                # Stop at the latest snapshot, so the horizon counts from the data
+                values = values[:, :int(day_index.max()) + 1]
+
+            level, trend, observed = holt_smooth(values, settings.FORECAST_ALPHA, settings.FORECAST_BETA)
+            forecast = forecast_arrays(level, trend, observed)
+            last_column = np.where(observed > 0, values.shape[1] - 1 - np.argmax(~np.isnan(values[:, ::-1]), axis=1), -1)
+
+            now = datetime.utcnow()
+            upsert_replace(db, ProductForecast, ("product_id",), ("forecast", "level", "trend", "days", "last_day", "computed_at"), [
+                {
+                    "product_id": product_id,
+                    "user_id": owner,
+                    "forecast": None if value != value else value,
+                    "level": None if count == 0 else lvl,
+                    "trend": None if count == 0 else slope,
+                    "days": count,
+                    "last_day": start + timedelta(days=column) if column >= 0 else None,
+                    "computed_at": now,
+                }
+                for product_id, value, lvl, slope, count, column in zip(
+                    chunk, forecast.tolist(), level.tolist(), trend.tolist(), observed.tolist(), last_column.tolist())
+            ])
+            db.commit()
+
+            fitted += len(chunk)
+            forecasted += int((~np.isnan(forecast)).sum())
+
+    return {"users": users, "fitted": fitted, "forecasted": forecasted}
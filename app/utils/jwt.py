@@ -1,3 +1,4 @@
+import uuid
 from datetime import datetime, timedelta
 from jose import JWTError, jwt
 from app.core.config import settings
@@ -9,13 +10,13 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 60  # Token expires in 1 hour
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
+    # jti identifies the token for revocation (see app/utils/revocation.py)
+    to_encode.update({"exp": expire, "jti": uuid.uuid4().hex})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def verify_token(token: str):
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print("payload: ",payload)
         return payload
     except JWTError:
         return None
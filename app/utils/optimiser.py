@@ -0,0 +1,261 @@
+from typing import Dict, Optional
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.price_history import ProductElasticity
+from app.models.product import Product
+from app.utils.catalog import bump_catalog_version
+from app.utils.elasticity import STAT_FIELDS, fit_arrays
+from app.utils.pricing import REPRICE_CHUNK_SIZE, round_prices
+
+# Lowest price the optimiser will set
+_MIN_PRICE = 0.01
+# Elasticities closer to zero are clamped to this; the bounds divide by the elasticity
+_MAX_ELASTICITY = -0.01
+
+_BULK_CONSTRAINED_PRICE_UPDATE = (
+    update(Product.__table__)
+    .where(Product.__table__.c.product_id == bindparam("b_product_id"))
+    .values(constrained_price=bindparam("b_constrained_price"), version=Product.__table__.c.version + 1)
+)
+
+
+def load_catalog(db: Session, user_id: int, category: Optional[str] = None,
+                 chunk_size: int = REPRICE_CHUNK_SIZE) -> dict:
+    """
+    Reads what the optimiser needs about one user's catalog (or one category of it) as
+    arrays, chunk_size rows at a time: ids, category names and codes, cost, price, stock,
+    demand forecast, fitted elasticity (NaN without a fit) and the current constrained price.
+    """
+    chunks = []
+    categories = []
+    last_id = 0
+    while True:
+        query = (
+            select(
+                Product.product_id,
+                Product.cost_price,
+                Product.selling_price,
+                Product.stock_available,
+                Product.units_sold,
+                Product.demand_forecast,
+                Product.constrained_price,
+                *(getattr(ProductElasticity, field) for field in STAT_FIELDS),
+                Product.category,
+            )
+            .outerjoin(ProductElasticity, ProductElasticity.product_id == Product.product_id)
+            .where(Product.user_id == user_id, Product.product_id > last_id)
+            .order_by(Product.product_id)
+            .limit(chunk_size)
+        )
+        if category is not None:
+            query = query.where(Product.category == category)
+
+        rows = db.execute(query).all()
+        if not rows:
+            break
+        chunks.append(np.array([tuple(row)[:-1] for row in rows], dtype=np.float64))
+        categories.extend(row.category for row in rows)
+        last_id = rows[-1].product_id
+
+    columns = np.concatenate(chunks) if chunks else np.empty((0, 12))
+    names, codes = np.unique(np.array(categories, dtype=object), return_inverse=True)
+    _, elasticity = fit_arrays(*columns[:, 7:12].T)
+    units_sold = np.nan_to_num(columns[:, 4])
+    return {
+        "product_id": columns[:, 0].astype(np.int64),
+        "category_names": names.tolist(),
+        "category_codes": codes.astype(np.int64),
+        "cost_price": columns[:, 1],
+        "selling_price": columns[:, 2],
+        "stock_available": np.nan_to_num(columns[:, 3]),
+        # Products never repriced have no forecast yet; their sales stand in for it
+        "demand": np.where(np.isnan(columns[:, 5]), units_sold, columns[:, 5]),
+        "elasticity": elasticity,
+        "constrained_price": columns[:, 6],
+    }
+
+
+def solve_prices(cost_price: np.ndarray, selling_price: np.ndarray, demand: np.ndarray,
+                 elasticity: np.ndarray, stock_available: np.ndarray, category_codes: np.ndarray,
+                 margin_targets: np.ndarray, min_margin: float = 0.0, max_change: float | None = None) -> dict:
+    """
+    Maximises expected profit over every product's price at once, subject to:
+
+    - within max_change of selling_price, which is never relaxed;
+    - a floor: price >= cost_price * (1 + min_margin);
+    - stock: expected demand <= stock_available;
+    - per category c with a target m_c (margin_targets[c], NaN for none): the demand-weighted
+      margin sum(q * (p - cost)) >= m_c * sum(q * p), weights q being the current demand.
+
+    Demand is linear around the current point, q(p) = demand * (1 + elasticity * (p / selling_price - 1)),
+    so each product's profit (p - cost) * q(p) is a concave quadratic and the floor and stock
+    constraints are bounds on p. Only the category targets couple products. They are dualised:
+    for multipliers lambda >= 0 each price is the clipped closed-form maximiser of its profit plus
+    lambda_c times its share of the constraint, and L-BFGS-B minimises the dual over the
+    multipliers (one per category with a target). Categories whose target can't be met even at
+    the highest allowed prices get those prices and are reported infeasible. Likewise, a
+    product whose floor or stock level needs a price above the max_change cap gets the cap
+    and is counted in floor_infeasible / stock_infeasible.
+
+    Elasticities (fitted or the default) are clamped to at most -0.01, so inelastic fits
+    give large but finite bounds. Products without demand keep their price, clipped to the bounds.
+    """
+    from scipy.optimize import minimize  # Imported here to keep it off the app's startup path
+
+    max_change = settings.OPTIMISER_MAX_CHANGE if max_change is None else max_change
+    cost = np.asarray(cost_price, dtype=np.float64)
+    p0 = np.asarray(selling_price, dtype=np.float64)
+    q = np.maximum(np.nan_to_num(np.asarray(demand, dtype=np.float64)), 0)
+    stock = np.maximum(np.asarray(stock_available, dtype=np.float64), 0)
+    codes = np.asarray(category_codes, dtype=np.int64)
+    targets = np.asarray(margin_targets, dtype=np.float64)
+    eps = np.minimum(np.where(np.isnan(elasticity), settings.OPTIMISER_DEFAULT_ELASTICITY, elasticity), _MAX_ELASTICITY)
+
+    priced = (q > 0) & (p0 > 0)
+    q_safe = np.where(priced, q, 1.0)
+    p0_safe = np.where(p0 > 0, p0, 1.0)
+
+    # profit(p) = (p - cost) * (A + B * p)
+    slope = q * eps / p0_safe
+    intercept = q * (1 - eps)
+    zero_demand_price = p0_safe * (1 - 1 / eps)
+
+    cap = p0 * (1 + max_change)
+    floor = np.maximum.reduce([cost * (1 + min_margin), p0 * (1 - max_change), np.full_like(p0, _MIN_PRICE)])
+    # Price at which demand falls to the stock on hand (at most zero_demand_price)
+    stock_price = np.where(priced, p0_safe * (1 + (stock / q_safe - 1) / eps), 0)
+    # Above zero_demand_price demand would be negative, unless the floor is higher still
+    upper = np.where(priced, np.minimum(cap, np.maximum(zero_demand_price, floor)), cap)
+    # The cap wins over floors and stock it can't reach; those products are reported
+    floor_infeasible = floor > upper
+    stock_infeasible = priced & (stock_price > upper)
+    lower = np.minimum(np.maximum(floor, stock_price), upper)
+
+    # Constraint c: sum over its products of h_i(p) = q_i * ((1 - m_c) * p_i - cost_i) >= 0
+    product_target = targets[codes] if len(targets) else np.full(len(codes), np.nan)
+    constrained = ~np.isnan(product_target)
+    retained = np.where(constrained, 1 - product_target, 0)
+    weight = np.where(constrained, q * retained, 0)
+    offset = np.where(constrained, q * cost, 0)
+
+    def category_sums(values):
+        return np.bincount(codes, weights=values, minlength=len(targets))
+
+    feasible = category_sums(weight * upper - offset) >= 0
+    active = np.flatnonzero(~np.isnan(targets) & feasible)
+    infeasible = np.flatnonzero(~np.isnan(targets) & ~feasible)
+    variable = np.full(len(targets), -1)
+    variable[active] = np.arange(len(active))
+    product_variable = variable[codes] if len(targets) else np.full(len(codes), -1)
+
+    safe_slope = np.where(priced, slope, -1.0)
+    scale = max(float(np.sum(q * p0)), 1.0)
+
+    def prices_for(multipliers):
+        lam = np.where(product_variable >= 0, multipliers[np.maximum(product_variable, 0)], 0.0) if len(active) else 0.0
+        best = (safe_slope * cost - intercept - lam * weight) / (2 * safe_slope)
+        prices = np.clip(np.where(priced, best, p0), lower, upper)
+        # Infeasible categories get as close to their target as the bounds allow
+        if len(infeasible):
+            prices = np.where(np.isin(codes, infeasible), upper, prices)
+        return prices
+
+    def dual(multipliers):
+        prices = prices_for(multipliers)
+        profit = (prices - cost) * (intercept + slope * prices)
+        constraint = category_sums(weight * prices - offset)[active]
+        return (profit.sum() + multipliers @ constraint) / scale, constraint / scale
+
+    if len(active):
+        result = minimize(dual, np.zeros(len(active)), jac=True, method="L-BFGS-B",
+                          bounds=[(0, None)] * len(active), options={"gtol": 1e-10, "ftol": 1e-15, "maxiter": 500})
+        multipliers, iterations, converged = result.x, int(result.nit), bool(result.success)
+    else:
+        multipliers, iterations, converged = np.zeros(0), 0, True
+
+    # Rounded to cents within the bounds; the cap wins when both round into the same cent
+    prices = np.maximum(round_prices(prices_for(multipliers)), np.ceil(lower * 100 - 1e-9) / 100)
+    prices = np.minimum(prices, np.floor(upper * 100 + 1e-9) / 100)
+    revenue_weight = category_sums(q * prices)
+    margin = np.divide(category_sums(q * (prices - cost)), revenue_weight,
+                       out=np.full(len(targets), np.nan), where=revenue_weight > 0)
+    lam = np.zeros(len(targets))
+    lam[active] = multipliers
+
+    def expected_profit(p):
+        return float(np.sum(np.where(priced, (p - cost) * np.maximum(intercept + slope * p, 0), 0)))
+
+    return {
+        "prices": prices,
+        "multipliers": lam,
+        "margins": margin,
+        "feasible": ~np.isin(np.arange(len(targets)), infeasible),
+        "iterations": iterations,
+        "converged": converged,
+        "floor_infeasible": int(floor_infeasible.sum()),
+        "stock_infeasible": int(stock_infeasible.sum()),
+        "expected_profit_before": expected_profit(p0),
+        "expected_profit_after": expected_profit(prices),
+    }
+
+
+def optimise_catalog(db: Session, user_id: int, category: Optional[str] = None,
+                     margin_targets: Optional[Dict[str, float]] = None, default_margin_target: Optional[float] = None,
+                     min_margin: float = 0.0, max_change: float | None = None, write: bool = True) -> Optional[dict]:
+    """
+    Solves for the optimised prices of a user's catalog, or one category, in one solve (see
+    solve_prices) and writes the changed ones to constrained_price with one bulk UPDATE.
+    margin_targets maps categories to their minimum margin; default_margin_target applies to
+    the others. Returns None if there are no products.
+    """
+    catalog = load_catalog(db, user_id, category)
+    if not len(catalog["product_id"]):
+        return None
+
+    margin_targets = margin_targets or {}
+    names = catalog["category_names"]
+    targets = np.array([
+        margin_targets.get(name, default_margin_target if default_margin_target is not None else np.nan)
+        for name in names
+    ], dtype=np.float64)
+
+    solution = solve_prices(
+        catalog["cost_price"], catalog["selling_price"], catalog["demand"], catalog["elasticity"],
+        catalog["stock_available"], catalog["category_codes"], targets, min_margin, max_change,
+    )
+
+    prices = solution["prices"]
+    changed = prices != catalog["constrained_price"]
+    if write and changed.any():
+        db.execute(_BULK_CONSTRAINED_PRICE_UPDATE, [
+            {"b_product_id": product_id, "b_constrained_price": price}
+            for product_id, price in zip(catalog["product_id"][changed].tolist(), prices[changed].tolist())
+        ])
+        bump_catalog_version(db, user_id)
+        db.commit()
+
+    return {
+        "products": len(prices),
+        "updated": int(changed.sum()) if write else 0,
+        "iterations": solution["iterations"],
+        "converged": solution["converged"],
+        "floor_infeasible": solution["floor_infeasible"],
+        "stock_infeasible": solution["stock_infeasible"],
+        "expected_profit_before": round(solution["expected_profit_before"], 2),
+        "expected_profit_after": round(solution["expected_profit_after"], 2),
+        "categories": [
+            {
+                "category": name,
+                "margin_target": None if np.isnan(target) else float(target),
+                "margin": None if np.isnan(margin) else round(float(margin), 4),
+                "multiplier": float(multiplier),
+                "feasible": bool(feasible),
+            }
+            for name, target, margin, multiplier, feasible in zip(
+                names, targets.tolist(), solution["margins"].tolist(), solution["multipliers"].tolist(), solution["feasible"].tolist())
+        ],
+    }
@@ -0,0 +1,126 @@
+import logging
+import smtplib
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.utils.email import SMTPConnection, build_message
+
+logger = logging.getLogger(__name__)
+
+# Longest wait between two attempts at the same message
+MAX_BACKOFF_SECONDS = 3600
+
+# Failures of the server or connection rather than of one message; they end the batch early
+_CONNECTION_ERRORS = (
+    smtplib.SMTPServerDisconnected,
+    smtplib.SMTPConnectError,
+    smtplib.SMTPAuthenticationError,
+    ConnectionError,
+    TimeoutError,
+)
+
+
+class OutboxWorker:
+    """
+    Background thread that drains email_outbox.
+
+    Each pass claims up to `batch_size` due messages (SKIP LOCKED, so several app workers
+    can drain the same table) and sends them over one reused SMTP connection. A failed
+    message is retried with exponential backoff and marked failed after `max_attempts`.
+    """
+
+    def __init__(self, session_factory=SessionLocal, connection: SMTPConnection | None = None,
+                 batch_size: int = None, poll_interval: float = None,
+                 max_attempts: int = None, backoff_seconds: float = None):
+        self.session_factory = session_factory
+        self.connection = connection or SMTPConnection()
+        self.batch_size = batch_size or settings.EMAIL_OUTBOX_BATCH_SIZE
+        self.poll_interval = poll_interval or settings.EMAIL_OUTBOX_POLL_SECONDS
+        self.max_attempts = max_attempts or settings.EMAIL_OUTBOX_MAX_ATTEMPTS
+        self.backoff_seconds = backoff_seconds or settings.EMAIL_OUTBOX_BACKOFF_SECONDS
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="email-outbox", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        self.connection.close()
+
+    def wake(self):
+        """Asks the worker to drain now instead of at its next poll."""
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                sent = self.run_once()
+            except Exception as e:
+                logger.exception("Email outbox pass failed: %s", e)
+                sent = 0
+            # A full batch means more may be waiting
+            if sent < self.batch_size:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _backoff(self, attempts: int) -> timedelta:
+        return timedelta(seconds=min(self.backoff_seconds * 2 ** (attempts - 1), MAX_BACKOFF_SECONDS))
+
+    def run_once(self) -> int:
+        """Sends one batch of due messages and returns how many were processed."""
+        db = self.session_factory()
+        try:
+            now = datetime.utcnow()
+            messages = db.scalars(
+                select(EmailOutbox)
+                .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            ).all()
+
+            processed = 0
+            for message in messages:
+                processed += 1
+                message.attempts += 1
+                try:
+                    self.connection.send(build_message(message.recipient, message.subject, message.body))
+                    message.status = "sent"
+                    message.sent_at = datetime.utcnow()
+                    message.last_error = None
+                except Exception as e:
+                    message.last_error = str(e)[:500]
+                    if message.attempts >= self.max_attempts:
+                        message.status = "failed"
+                        logger.error("Giving up on email %s to %s: %s", message.id, message.recipient, e)
+                    else:
+                        message.next_attempt_at = datetime.utcnow() + self._backoff(message.attempts)
+                    if isinstance(e, _CONNECTION_ERRORS):
+                        self.connection.close()
+                        break
+
+            db.commit()
+            return processed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+
+outbox_worker = OutboxWorker()
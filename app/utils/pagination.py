@@ -0,0 +1,127 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select
+
+from app.models.product import Product
+
+# Sort keys accepted by the dashboard, mapped to the column/expression they order by.
+# Every key is backed by a (user_id, <key>, product_id) index on Product_Data.
+SORT_KEYS = {
+    "product_id": Product.product_id,
+    "price": Product.selling_price,
+    "margin": Product.selling_price - Product.cost_price,
+    "updated_at": Product.updated_at,
+}
+
+
+# Columns of a dashboard row, in ProductResponse field order
+PRODUCT_RESPONSE_COLUMNS = (
+    Product.name,
+    Product.description,
+    Product.cost_price,
+    Product.selling_price,
+    Product.category,
+    Product.stock_available,
+    Product.units_sold,
+    Product.product_id,
+    func.coalesce(Product.customer_rating, 4.5).label("customer_rating"),  # ProductResponse default
+    Product.demand_forecast,
+    Product.optimised_price,
+    Product.constrained_price,
+    Product.user_id,
+    Product.created_at,
+    Product.updated_at,
+    Product.version,
+)
+PRODUCT_RESPONSE_FIELDS = tuple(column.key for column in PRODUCT_RESPONSE_COLUMNS)
+
+
+def _to_json_value(value: Any) -> Any:
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def sort_value(product, sort: str) -> Any:
+    """Returns the value a product (ORM object or row) is ordered by under the given sort key."""
+    if sort == "margin":
+        return product.selling_price - product.cost_price
+    if sort == "price":
+        return product.selling_price
+    return getattr(product, sort)
+
+
+def encode_cursor(sort: str, order: str, value: Any, product_id: int) -> str:
+    """Builds the opaque `after` token pointing just past the given row."""
+    payload = json.dumps([sort, order, _to_json_value(value), product_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str, sort: str, order: str) -> Tuple[Any, int]:
+    """
+    Returns (sort_value, product_id) from an `after` token.
+    Raises ValueError if the token is malformed or was issued for another sort/order.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        token_sort, token_order, value, product_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise ValueError("Invalid pagination cursor.")
+
+    if (token_sort, token_order) != (sort, order) or not isinstance(product_id, int):
+        raise ValueError("Pagination cursor does not match the requested sort order.")
+    if value is None and sort != "product_id":
+        raise ValueError("Invalid pagination cursor.")
+
+    if sort == "updated_at":
+        value = datetime.fromisoformat(value)
+    return value, product_id
+
+
+def dashboard_query(user_id: int, sort: str, order: str, limit: int,
+                    cursor: Optional[Tuple[Any, int]] = None, skip: int = 0, filters: Iterable = ()):
+    """
+    Builds the SELECT for one dashboard page, returning PRODUCT_RESPONSE_COLUMNS rows.
+    filters are extra WHERE clauses (see app/utils/search.py).
+
+    With a cursor the page starts right after the (sort_value, product_id) it points to,
+    which the composite indexes resolve with a range seek, so the cost does not grow with
+    page depth. Without one it falls back to OFFSET for legacy `page` numbers.
+    """
+    sort_column = SORT_KEYS[sort]
+    descending = order == "desc"
+
+    query = select(*PRODUCT_RESPONSE_COLUMNS).where(Product.user_id == user_id, *filters)
+
+    if cursor is not None:
+        value, last_id = cursor
+        if sort == "product_id":
+            query = query.where(Product.product_id < last_id if descending else Product.product_id > last_id)
+        elif descending:
+            query = query.where(or_(sort_column < value, and_(sort_column == value, Product.product_id < last_id)))
+        else:
+            query = query.where(or_(sort_column > value, and_(sort_column == value, Product.product_id > last_id)))
+    elif skip:
+        query = query.offset(skip)
+
+    if sort == "product_id":
+        order_by = (Product.product_id.desc(),) if descending else (Product.product_id,)
+    elif descending:
+        order_by = (sort_column.desc(), Product.product_id.desc())
+    else:
+        order_by = (sort_column, Product.product_id)
+
+    return query.order_by(*order_by).limit(limit)
+
+
+def split_page(products: List[Any], limit: int, sort: str, order: str) -> Tuple[List[Any], Optional[str]]:
+    """
+    Trims a result fetched with limit + 1 rows to one page.
+    Returns the page and the cursor of the next page, or None on the last page.
+    """
+    if len(products) <= limit:
+        return products, None
+    products = products[:limit]
+    last = products[-1]
+    return products, encode_cursor(sort, order, sort_value(last, sort), last.product_id)
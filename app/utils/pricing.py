@@ -0,0 +1,198 @@
+import math
+from typing import Optional, Tuple
+
+import numpy as np
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.orm import Session
+
+from app.models.forecast import ProductForecast
+from app.models.price_history import ProductElasticity
+from app.models.product import Product
+from app.utils.analytics import rebuild_summary
+from app.utils.catalog import bump_catalog_version
+from app.utils.elasticity import fit_arrays
+
+REPRICE_CHUNK_SIZE = 50000
+
+# Distance from a .5 tie (in hundredths) under which the vectorized rounding defers to round()
+_TIE_TOLERANCE = 1e-6
+
+
+def calculate_demand_forecast(units_sold: int, selling_price: float,
+                              elasticity: Optional[Tuple[float, float]] = None,
+                              cached_forecast: Optional[float] = None) -> float:
+    if selling_price <= 0:
+        return 0  
+
+    # Cached time-series forecast (app/utils/forecast.py), when the product has enough sales history
+    if cached_forecast is not None:
+        return round(cached_forecast, 2)
+
+    # Fitted log-log demand curve, ln(q) = intercept + elasticity * ln(p), when the product has one
+    if elasticity is not None:
+        intercept, slope = elasticity
+        return round(math.exp(intercept + slope * math.log(selling_price)), 2)
+
+    base_demand = max(units_sold * 1.2, 10)  
+    price_factor = 1 - (selling_price / 1000)  
+    
+    return round(base_demand * price_factor, 2)
+
+def calculate_optimised_price(cost_price: float, selling_price: float, demand_forecast: float) -> float:
+
+    profit_margin = (selling_price - cost_price) / cost_price if cost_price > 0 else 0
+    price_adjustment = demand_forecast * 0.02  
+    
+    optimised_price = max(cost_price * (1 + profit_margin) + price_adjustment, cost_price)
+    return round(optimised_price, 2)
+
+
+def round_prices(values: np.ndarray) -> np.ndarray:
+    """
+    Array version of round(value, 2) that returns exactly what the builtin returns.
+
+    np.round scales by 100 and rounds half to even, which only disagrees with round()
+    when the scaled value lands on (or within float error of) a .5 tie. Those few
+    elements are re-rounded with the builtin.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    scaled = values * 100
+    rounded = np.rint(scaled) / 100
+
+    ties = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < _TIE_TOLERANCE
+    if ties.any():
+        rounded[ties] = [round(value, 2) for value in values[ties].tolist()]
+    return rounded
+
+
+def calculate_demand_forecast_array(units_sold: np.ndarray, selling_price: np.ndarray,
+                                    intercept: Optional[np.ndarray] = None,
+                                    elasticity: Optional[np.ndarray] = None,
+                                    cached_forecast: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Vectorized calculate_demand_forecast: same formula and rounding, one value per product.
+    intercept/elasticity hold each product's fit and cached_forecast its cached forecast, NaN where it has none.
+    """
+    units_sold = np.asarray(units_sold, dtype=np.float64)
+    selling_price = np.asarray(selling_price, dtype=np.float64)
+
+    base_demand = np.maximum(units_sold * 1.2, 10)
+    price_factor = 1 - (selling_price / 1000)
+    forecast = round_prices(base_demand * price_factor)
+
+    if elasticity is not None:
+        fitted = ~np.isnan(elasticity) & (selling_price > 0)
+        if fitted.any():
+            # math.exp/log rather than NumPy's, whose last bit can differ, so values match the scalar path
+            forecast[fitted] = [
+                round(math.exp(a + b * math.log(p)), 2)
+                for a, b, p in zip(intercept[fitted].tolist(), elasticity[fitted].tolist(), selling_price[fitted].tolist())
+            ]
+
+    if cached_forecast is not None:
+        cached_forecast = np.asarray(cached_forecast, dtype=np.float64)
+        forecast = np.where(np.isnan(cached_forecast), forecast, round_prices(np.nan_to_num(cached_forecast)))
+
+    return np.where(selling_price <= 0, 0.0, forecast)
+
+
+def calculate_optimised_price_array(cost_price: np.ndarray, selling_price: np.ndarray, demand_forecast: np.ndarray) -> np.ndarray:
+    """Vectorized calculate_optimised_price: same formula and rounding, one value per product."""
+    cost_price = np.asarray(cost_price, dtype=np.float64)
+    selling_price = np.asarray(selling_price, dtype=np.float64)
+    demand_forecast = np.asarray(demand_forecast, dtype=np.float64)
+
+    has_cost = cost_price > 0
+    profit_margin = np.where(has_cost, (selling_price - cost_price) / np.where(has_cost, cost_price, 1.0), 0.0)
+    price_adjustment = demand_forecast * 0.02
+
+    optimised_price = np.maximum(cost_price * (1 + profit_margin) + price_adjustment, cost_price)
+    return round_prices(optimised_price)
+
+
+# Core executemany UPDATE; skips the ORM's per-row bookkeeping of update(Product) with a parameter list
+_BULK_PRICE_UPDATE = (
+    update(Product.__table__)
+    .where(Product.__table__.c.product_id == bindparam("b_product_id"))
+    .values(
+        demand_forecast=bindparam("b_demand_forecast"),
+        optimised_price=bindparam("b_optimised_price"),
+        # A client holding the old version must get a 409 rather than overwrite the new prices
+        version=Product.__table__.c.version + 1,
+    )
+)
+
+
+def reprice_catalog(db: Session, user_id: int | None = None, chunk_size: int = REPRICE_CHUNK_SIZE) -> dict:
+    """
+    Recomputes demand_forecast and optimised_price for one user's catalog, or every catalog
+    when user_id is None.
+
+    Rows are read in product_id order, chunk_size at a time, priced as arrays and only the
+    rows whose stored values changed are written back with a bulk UPDATE. Each chunk is
+    committed on its own.
+    """
+    scanned = 0
+    repriced = 0
+    last_id = 0
+
+    while True:
+        query = (
+            select(
+                Product.product_id,
+                Product.units_sold,
+                Product.selling_price,
+                Product.cost_price,
+                Product.demand_forecast,
+                Product.optimised_price,
+                *(getattr(ProductElasticity, field) for field in ("observations", "sum_x", "sum_y", "sum_xx", "sum_xy")),
+                ProductForecast.forecast,
+            )
+            .outerjoin(ProductElasticity, ProductElasticity.product_id == Product.product_id)
+            .outerjoin(ProductForecast, ProductForecast.product_id == Product.product_id)
+            .where(Product.product_id > last_id)
+            .order_by(Product.product_id)
+            .limit(chunk_size)
+        )
+        if user_id is not None:
+            query = query.where(Product.user_id == user_id)
+
+        rows = db.execute(query).all()
+        if not rows:
+            break
+
+        # NULLs (including products without elasticity statistics or a forecast) become NaN, except
+        # units_sold which the model defaults to 0
+        columns = np.array([tuple(row) for row in rows], dtype=np.float64)
+        product_ids = columns[:, 0].astype(np.int64)
+        units_sold = np.nan_to_num(columns[:, 1])
+
+        intercept, elasticity = fit_arrays(*columns[:, 6:11].T)
+        demand_forecast = calculate_demand_forecast_array(units_sold, columns[:, 2], intercept, elasticity, columns[:, 11])
+        optimised_price = calculate_optimised_price_array(columns[:, 3], columns[:, 2], demand_forecast)
+
+        changed = (demand_forecast != columns[:, 4]) | (optimised_price != columns[:, 5])
+        if changed.any():
+            db.execute(
+                _BULK_PRICE_UPDATE,
+                [
+                    {"b_product_id": product_id, "b_demand_forecast": demand, "b_optimised_price": price}
+                    for product_id, demand, price in zip(
+                        product_ids[changed].tolist(),
+                        demand_forecast[changed].tolist(),
+                        optimised_price[changed].tolist(),
+                    )
+                ],
+            )
+            db.commit()
+
+        scanned += len(rows)
+        repriced += int(changed.sum())
+        last_id = int(product_ids[-1])
+
+    if repriced:
+        bump_catalog_version(db, user_id)
+        # Forecasts feed the category analytics; a bulk change is cheaper to re-aggregate
+        rebuild_summary(db, user_id)
+
+    return {"scanned": scanned, "repriced": repriced}
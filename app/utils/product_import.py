@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.schemas.product import ProductCreate
+from app.utils.analytics import apply_deltas, collect_deltas
+from app.utils.catalog import bump_catalog_version
+from app.utils.elasticity import record_observations
+from app.utils.forecast import record_sales
+from app.utils.pricing import calculate_demand_forecast, calculate_optimised_price
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+def iter_csv_records(stream) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yields (row_number, record) pairs from a binary CSV stream, one line at a time."""
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    try:
+        reader = csv.DictReader(text)
+        for row_number, row in enumerate(reader, start=1):
+            # Empty cells mean "not provided", so optional fields fall back to their defaults
+            yield row_number, {key: value for key, value in row.items() if key and value != ""}
+    finally:
+        text.detach()
+
+
+def iter_ndjson_records(stream) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yields (line_number, record) pairs from a binary NDJSON stream, skipping blank lines."""
+    for row_number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield row_number, record
+
+
+def _format_validation_errors(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(part) for part in err['loc']) or 'row'}: {err['msg']}" for err in error.errors()]
+
+
+def _build_row(product: ProductCreate, user_id: int, now: datetime) -> Dict[str, Any]:
+    demand_forecast = calculate_demand_forecast(product.units_sold, product.selling_price)
+    return {
+        "name": product.name,
+        "description": product.description,
+        "cost_price": product.cost_price,
+        "selling_price": product.selling_price,
+        "category": product.category,
+        "stock_available": product.stock_available,
+        "units_sold": product.units_sold,
+        "customer_rating": 4.5,  # Default value, same as /product/add
+        "demand_forecast": demand_forecast,
+        "optimised_price": calculate_optimised_price(product.cost_price, product.selling_price, demand_forecast),
+        "user_id": user_id,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def import_products(db: Session, user_id: int, records, batch_size: int = IMPORT_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Validates and inserts products from an iterable of (row_number, record) pairs.
+
+    Rows are inserted with one multi-row INSERT per batch and each batch is committed
+    on its own, so a failing batch only loses its own rows. Only the current batch is
+    held in memory.
+    """
+    report = {"inserted": 0, "failed": 0, "errors": []}
+
+    def record_error(row_number: int, messages: List[str]):
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": row_number, "errors": messages})
+
+    def flush(batch: List[Tuple[int, Dict[str, Any]]]):
+        if not batch:
+            return
+        try:
+            rows = [row for _, row in batch]
+            # Locks the user's row until commit, so none of the user's other writes interleave
+            bump_catalog_version(db, user_id)
+            # The batch's own ids, for the first price history observation of each product
+            if db.get_bind().dialect.insert_executemany_returning:
+                product_ids = db.scalars(insert(Product).returning(Product.product_id, sort_by_parameter_order=True), rows).all()
+            else:
+                # No RETURNING (MySQL): the user's rows above their previous highest id are this batch's
+                last_id = db.scalar(select(func.max(Product.product_id)).where(Product.user_id == user_id)) or 0
+                db.execute(insert(Product), rows)
+                product_ids = db.scalars(
+                    select(Product.product_id)
+                    .where(Product.user_id == user_id, Product.product_id > last_id)
+                    .order_by(Product.product_id)
+                ).all()
+                if len(product_ids) != len(rows):
+                    raise RuntimeError(f"expected {len(rows)} new product ids, found {len(product_ids)}")
+            record_observations(db, [
+                (product_id, user_id, row["selling_price"], row["units_sold"]) for product_id, row in zip(product_ids, rows)
+            ])
+            record_sales(db, [(product_id, user_id, row["units_sold"]) for product_id, row in zip(product_ids, rows)])
+            apply_deltas(db, user_id, collect_deltas(added=rows))
+            db.commit()
+            report["inserted"] += len(batch)
+        except Exception as e:
+            db.rollback()
+            for row_number, _ in batch:
+                record_error(row_number, [f"database error: {e}"])
+
+    batch: List[Tuple[int, Dict[str, Any]]] = []
+    now = datetime.utcnow()
+    for row_number, record in records:
+        if not isinstance(record, dict):
+            record_error(row_number, ["row is not a valid JSON object"])
+            continue
+        try:
+            product = ProductCreate(**record)
+        except ValidationError as e:
+            record_error(row_number, _format_validation_errors(e))
+            continue
+
+        batch.append((row_number, _build_row(product, user_id, now)))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+            now = datetime.utcnow()
+
+    flush(batch)
+    return report
@@ -0,0 +1,105 @@
+"""
+Request handling shared by the sync read routes (app/routers/product.py) and their async
+versions (app/routers/async_reads.py): parameter checks, ETags and the page cache, and
+building responses. The routes only run the queries, with or without await.
+"""
+import importlib.util
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import select
+
+from app.models.product import Product
+from app.utils.catalog import catalog_version_query, etag_matches, page_cache, page_etag, page_response, render_products
+from app.utils.export import EXPORT_FORMATS, export_fields
+from app.utils.pagination import dashboard_query, decode_cursor, split_page
+from app.utils.search import search_filters
+
+
+class CatalogPage:
+    """
+    One GET /product/dashboard or /product/search page. The route runs version_query and
+    passes the result to cached(); on a miss it runs rows_query() and passes the rows to render().
+    """
+
+    def __init__(self, user_id: int, limit: int, after: Optional[str], sort: str, order: str, params: tuple,
+                 page: int = 1, filter_params: Optional[Dict[str, Any]] = None):
+        try:
+            self.cursor = decode_cursor(after, sort, order) if after else None
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        self.user_id, self.limit, self.sort, self.order, self.params = user_id, limit, sort, order, params
+        self.skip = 0 if self.cursor else (page - 1) * limit
+        self.filter_params = filter_params
+        self.version_query = catalog_version_query(user_id)
+        self.etag = self.cache_key = None
+
+    @classmethod
+    def dashboard(cls, user_id: int, page: int, limit: int, after: Optional[str], sort: str, order: str) -> "CatalogPage":
+        return cls(user_id, limit, after, sort, order, (page, limit, after, sort, order), page=page)
+
+    @classmethod
+    def search(cls, user_id: int, limit: int, after: Optional[str], sort: str, order: str, **filter_params) -> "CatalogPage":
+        params = ("search", limit, after, sort, order, tuple(sorted(filter_params.items())))
+        return cls(user_id, limit, after, sort, order, params, filter_params=filter_params)
+
+    def cached(self, if_none_match: Optional[str], version: Optional[int]) -> Optional[Response]:
+        """A 304 or the cached page for this catalog version, or None when the page must be read."""
+        version = version or 0
+        self.etag = page_etag(self.user_id, version, *self.params)
+        if etag_matches(if_none_match, self.etag):
+            return page_response(None, self.etag)
+
+        self.cache_key = (self.user_id, version, self.params)
+        cached = page_cache.get(self.cache_key)
+        if cached is not None:
+            return page_response(cached[0], self.etag, cached[1])
+        return None
+
+    def rows_query(self, dialect: str):
+        filters = search_filters(dialect, **self.filter_params) if self.filter_params is not None else ()
+        # One extra row tells whether another page follows
+        return dashboard_query(self.user_id, self.sort, self.order, self.limit + 1, self.cursor, self.skip, filters=filters)
+
+    def render(self, rows: List[Any]) -> Response:
+        # An empty search is a valid result; an empty dashboard page is not
+        if not rows and self.filter_params is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No products found for the user.")
+
+        products, next_cursor = split_page(rows, self.limit, self.sort, self.order)
+        body = render_products(products)
+        page_cache.set(self.cache_key, body, next_cursor)
+        return page_response(body, self.etag, next_cursor)
+
+
+def check_simulated(count: Optional[int]):
+    """404 when a simulation selects no products."""
+    if not count:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No matching products found.")
+
+
+def export_download(export_format: str, columns: Optional[str], gzip: bool) -> Tuple[List[str], str, Dict[str, str]]:
+    """The fields, media type and headers of a GET /product/export download; 400 for bad parameters."""
+    try:
+        fields = export_fields(columns)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if export_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Parquet export is not available on this server (pyarrow is not installed).")
+
+    media_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"products.{extension}"
+    if gzip:
+        media_type, filename = "application/gzip", filename + ".gz"
+    return fields, media_type, {"Content-Disposition": f'attachment; filename="{filename}"'}
+
+
+def last_id_query(user_id: int):
+    return select(Product.product_id).where(Product.user_id == user_id).order_by(Product.product_id.desc()).limit(1)
+
+
+def check_last_id(product_id: Optional[int]) -> int:
+    if product_id is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No products found for the user.")
+    return product_id
@@ -0,0 +1,189 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.revoked_token import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+# Entries revoked this long before the previous sync are fetched again, to cover
+# clock skew between workers and transactions that committed late
+_SYNC_OVERLAP = timedelta(seconds=30)
+
+
+class BloomFilter:
+    """
+    Fixed-size bloom filter over strings: no false negatives, false positives at about
+    `error_rate` once `capacity` items are in. Items can't be removed; rebuild instead.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: the i-th position is h1 + i * h2
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """
+    Revoked token ids with their expiry. Lookups check the bloom filter first, so the
+    common case (a token that was never revoked) never touches the exact map; expired
+    entries are dropped, and the filter rebuilt, by purge().
+    """
+
+    def __init__(self, capacity: int = None, error_rate: float = None):
+        self.capacity = capacity or settings.TOKEN_REVOCATION_BLOOM_CAPACITY
+        self.error_rate = error_rate or settings.TOKEN_REVOCATION_BLOOM_ERROR_RATE
+        self._expiry: Dict[str, float] = {}
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._lock = threading.Lock()
+
+    def add(self, jti: str, expires_at: float):
+        with self._lock:
+            if jti not in self._expiry:
+                self._bloom.add(jti)
+            self._expiry[jti] = expires_at
+            if self._bloom.count > self._bloom.capacity:
+                self._rebuild(time.time())
+
+    def add_many(self, entries: Iterable[Tuple[str, float]]):
+        for jti, expires_at in entries:
+            self.add(jti, expires_at)
+
+    def is_revoked(self, jti: str) -> bool:
+        if jti not in self._bloom:
+            return False
+        expires_at = self._expiry.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def purge(self) -> int:
+        """Drops expired entries and rebuilds the filter without them. Returns how many."""
+        now = time.time()
+        with self._lock:
+            expired = sum(expires_at <= now for expires_at in self._expiry.values())
+            if expired:
+                self._rebuild(now)
+            return expired
+
+    def _rebuild(self, now: float):
+        self._expiry = {jti: expires_at for jti, expires_at in self._expiry.items() if expires_at > now}
+        # Room to grow before the next rebuild
+        bloom = BloomFilter(max(self.capacity, 2 * len(self._expiry)), self.error_rate)
+        for jti in self._expiry:
+            bloom.add(jti)
+        self._bloom = bloom
+
+    def __len__(self):
+        return len(self._expiry)
+
+
+revocation_list = RevocationList()
+
+
+def _timestamp(value: datetime) -> float:
+    # Stored naive in UTC, like the rest of the schema
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def revoke_token(db: Session, payload: dict):
+    """
+    Revokes a decoded token (one carrying jti and exp) in the database, in the current
+    transaction, and in this worker's list right away. Other workers pick it up at their
+    next sync.
+    """
+    jti, exp = payload.get("jti"), payload.get("exp")
+    if not jti or not exp:
+        return
+    if db.get(RevokedToken, jti) is None:
+        # revoked_at from the same clock as RevocationSync's cursor, not the database's CURRENT_TIMESTAMP
+        db.add(RevokedToken(jti=jti, expires_at=datetime.utcfromtimestamp(exp), revoked_at=datetime.utcnow()))
+    revocation_list.add(jti, float(exp))
+
+
+class RevocationSync:
+    """
+    Background thread that copies newly revoked tokens from revoked_tokens into
+    revocation_list every TOKEN_REVOCATION_SYNC_SECONDS, and deletes expired rows.
+    """
+
+    def __init__(self, session_factory=SessionLocal, interval: float = None, tokens: RevocationList = None):
+        self.session_factory = session_factory
+        self.interval = interval or settings.TOKEN_REVOCATION_SYNC_SECONDS
+        self.tokens = revocation_list if tokens is None else tokens
+        self._since: datetime | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="token-revocation-sync", daemon=True)
+        self._thread.start()
+        # The first pass runs in the caller; if it fails the thread retries on its schedule
+        return self.sync_once()
+
+    def stop(self, timeout: float = 10):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.sync_once()
+            except Exception as e:
+                logger.exception("Token revocation sync failed: %s", e)
+
+    def sync_once(self) -> int:
+        """Loads entries revoked since the last pass (all live ones the first time). Returns how many."""
+        now = datetime.utcnow()
+        db = self.session_factory()
+        try:
+            query = select(RevokedToken.jti, RevokedToken.expires_at).where(RevokedToken.expires_at > now)
+            if self._since is not None:
+                query = query.where(RevokedToken.revoked_at >= self._since - _SYNC_OVERLAP)
+            rows = db.execute(query).all()
+
+            db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+            db.commit()
+        finally:
+            db.close()
+
+        self.tokens.add_many((jti, _timestamp(expires_at)) for jti, expires_at in rows)
+        self.tokens.purge()
+        self._since = now
+        return len(rows)
+
+
+revocation_sync = RevocationSync()
@@ -0,0 +1,101 @@
+import re
+import sys
+from typing import List, Optional
+
+from sqlalchemy import and_, or_, select, text
+from sqlalchemy.dialects.mysql import match
+from sqlalchemy.engine import Connection
+
+from app.models.product import Product, SQLITE_SEARCH_DDL
+
+# Search terms are runs of word characters; everything else (including the
+# FULLTEXT/FTS5 query operators) is treated as a separator
+_TERM = re.compile(r"\w+")
+
+
+def search_terms(q: str) -> List[str]:
+    return _TERM.findall(q)
+
+
+def fulltext_clause(dialect: str, terms: List[str]):
+    """
+    WHERE clause matching products whose name, description or category contain every
+    term as a word prefix, using the dialect's full-text index.
+    """
+    if dialect == "mysql":
+        return match(Product.name, Product.description, Product.category,
+                     against=" ".join(f"+{term}*" for term in terms)).in_boolean_mode()
+
+    if dialect == "sqlite":
+        fts_query = " ".join(f'"{term}"*' for term in terms)
+        return Product.product_id.in_(
+            select(text("rowid")).select_from(text("product_fts"))
+            .where(text("product_fts MATCH :fts_query").bindparams(fts_query=fts_query))
+        )
+
+    # No full-text index on other backends: substring scan
+    return and_(*(
+        or_(Product.name.ilike(f"%{term}%"), Product.description.ilike(f"%{term}%"), Product.category.ilike(f"%{term}%"))
+        for term in terms
+    ))
+
+
+def _like_prefix(prefix: str):
+    escaped = prefix.replace("/", "//").replace("%", "/%").replace("_", "/_")
+    return Product.name.like(escaped + "%", escape="/")
+
+
+def prefix_clause(dialect: str, prefix: str):
+    """
+    name starts with prefix, case-insensitively on MySQL and SQLite. Served by the
+    (user_id, name) index: on SQLite as a LIKE, which it turns into a range on the NOCASE
+    index; elsewhere as a range, case-insensitive only where the column collation is.
+    """
+    # No character sorts after U+10FFFF to bound a range with
+    if dialect == "sqlite" or ord(prefix[-1]) == sys.maxunicode:
+        return _like_prefix(prefix)
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+    return and_(Product.name >= prefix, Product.name < upper)
+
+
+def _range(column, low, high) -> list:
+    clauses = []
+    if low is not None:
+        clauses.append(column >= low)
+    if high is not None:
+        clauses.append(column <= high)
+    return clauses
+
+
+def search_filters(dialect: str, q: Optional[str] = None, name_prefix: Optional[str] = None, category: Optional[str] = None,
+                   min_price: Optional[float] = None, max_price: Optional[float] = None,
+                   min_margin: Optional[float] = None, max_margin: Optional[float] = None,
+                   min_stock: Optional[int] = None, max_stock: Optional[int] = None,
+                   min_demand: Optional[float] = None, max_demand: Optional[float] = None) -> list:
+    """WHERE clauses for GET /product/search, on top of the user_id filter."""
+    filters = []
+    terms = search_terms(q) if q else []
+    if terms:
+        filters.append(fulltext_clause(dialect, terms))
+    if name_prefix:
+        filters.append(prefix_clause(dialect, name_prefix))
+    if category is not None:
+        filters.append(Product.category == category)
+    filters += _range(Product.selling_price, min_price, max_price)
+    filters += _range(Product.selling_price - Product.cost_price, min_margin, max_margin)
+    filters += _range(Product.stock_available, min_stock, max_stock)
+    filters += _range(Product.demand_forecast, min_demand, max_demand)
+    return filters
+
+
+def rebuild_search_index(connection: Connection):
+    """
+    Creates the SQLite full-text table and triggers if missing (databases created before
+    they existed) and reindexes every product. Nothing to do on MySQL, whose FULLTEXT
+    index is maintained by the server.
+    """
+    if connection.dialect.name != "sqlite":
+        return
+    for statement in SQLITE_SEARCH_DDL:
+        connection.execute(text(statement))
+    connection.execute(text("INSERT INTO product_fts(product_fts) VALUES ('rebuild')"))
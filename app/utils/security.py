@@ -1,7 +1,16 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import bcrypt
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import settings
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 # hash passwords
 def hash_password(password: str) -> str:
@@ -10,3 +19,83 @@ def hash_password(password: str) -> str:
 # verify password
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
+
+# True when the hash was made with other settings (e.g. a different BCRYPT_ROUNDS)
+def password_needs_rehash(hashed_password: str) -> bool:
+    return pwd_context.needs_update(hashed_password)
+
+
+class HashingBusyError(Exception):
+    """Raised when HASH_QUEUE_LIMIT hashing jobs are already waiting for the pool."""
+
+
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+# Jobs running in the pool plus jobs queued for it
+_slots = threading.BoundedSemaphore(settings.HASH_POOL_SIZE + settings.HASH_QUEUE_LIMIT)
+
+
+def get_hashing_executor() -> ProcessPoolExecutor:
+    """Returns the bcrypt process pool, starting it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn, not fork: workers must not inherit the server's sockets and locks
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.HASH_POOL_SIZE,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def shutdown_hashing_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+async def _run_in_pool(func, *args):
+    if not _slots.acquire(blocking=False):
+        raise HashingBusyError("Too many password hashing requests in progress.")
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_hashing_executor(), func, *args)
+    except BrokenProcessPool:
+        # A worker died; drop the pool so the next call starts a fresh one
+        shutdown_hashing_executor()
+        raise
+    finally:
+        _slots.release()
+
+
+def _warm_worker() -> int:
+    # Loads passlib's bcrypt backend and runs the cheapest valid hash
+    pwd_context.handler("bcrypt").get_backend()
+    bcrypt.hashpw(b"warm-up", bcrypt.gensalt(4))
+    return os.getpid()
+
+
+async def warm_hashing_pool() -> int:
+    """
+    Starts every hashing worker and loads bcrypt in it, so the first logins don't pay for
+    process spawn and imports. Returns the number of workers that answered.
+    """
+    _warm_worker()
+    loop = asyncio.get_running_loop()
+    executor = get_hashing_executor()
+    # The pool spawns a process per submission while none is idle, up to HASH_POOL_SIZE
+    pids = await asyncio.gather(*(loop.run_in_executor(executor, _warm_worker) for _ in range(settings.HASH_POOL_SIZE)))
+    return len(set(pids))
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the hashing pool, leaving the event loop and threadpool free."""
+    return await _run_in_pool(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the hashing pool, leaving the event loop and threadpool free."""
+    return await _run_in_pool(verify_password, plain_password, hashed_password)
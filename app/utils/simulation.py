@@ -0,0 +1,160 @@
+from typing import AsyncIterator, Iterator, List, Optional
+
+import numpy as np
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.forecast import ProductForecast
+from app.models.price_history import ProductElasticity
+from app.models.product import Product
+from app.utils.elasticity import STAT_FIELDS, fit_arrays
+from app.utils.pricing import calculate_demand_forecast_array, calculate_optimised_price_array, round_prices
+
+# Products evaluated per query; each chunk holds a handful of (chunk x grid) float64 arrays,
+# about 1.6 MB apiece at 200 price points
+SIMULATION_CHUNK_SIZE = 1000
+
+_LINE_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_APPEND_NEWLINE
+
+
+def simulation_filter(user_id: int, product_ids: Optional[List[int]] = None, category: Optional[str] = None):
+    """WHERE clauses selecting the simulated products."""
+    clauses = [Product.user_id == user_id]
+    if product_ids is not None:
+        clauses.append(Product.product_id.in_(product_ids))
+    if category is not None:
+        clauses.append(Product.category == category)
+    return clauses
+
+
+def simulation_count_query(user_id: int, product_ids: Optional[List[int]] = None, category: Optional[str] = None):
+    return select(func.count()).select_from(Product).where(*simulation_filter(user_id, product_ids, category))
+
+
+def simulate_grid(units_sold: np.ndarray, cost_price: np.ndarray, price_grid: np.ndarray,
+                  intercept: np.ndarray, elasticity: np.ndarray,
+                  selling_price: Optional[np.ndarray] = None, cached_forecast: Optional[np.ndarray] = None) -> dict:
+    """
+    Demand, revenue and profit for every (product, candidate price) pair.
+
+    price_grid is (products x prices). Demand follows calculate_demand_forecast, evaluated
+    on the whole grid at once (fitted products on their log-log curve, others on the
+    heuristic), clipped at zero so prices past the heuristic's range don't show negative sales,
+    and rounded to 2 decimals like the stored forecasts. Revenue and profit use the rounded demand.
+    A product with a cached forecast (NaN for none) keeps that curve's shape, scaled to
+    pass through the forecast at its current selling_price.
+    """
+    units_sold = units_sold[:, None]
+    cost_price = cost_price[:, None]
+    intercept = intercept[:, None]
+    elasticity = elasticity[:, None]
+
+    def curve(price):
+        heuristic = np.maximum(units_sold * 1.2, 10) * (1 - price / 1000)
+        fitted = np.exp(intercept + elasticity * np.log(price))
+        return np.where(np.isnan(elasticity), heuristic, fitted)
+
+    demand = curve(price_grid)
+    if cached_forecast is not None:
+        cached_forecast = cached_forecast[:, None]
+        current = curve(selling_price[:, None])
+        scaled = cached_forecast * demand / np.where(current > 0, current, 1.0)
+        demand = np.where(np.isnan(cached_forecast), demand, np.where(current > 0, scaled, cached_forecast))
+    demand = round_prices(np.maximum(demand, 0))
+
+    revenue = price_grid * demand
+    profit = (price_grid - cost_price) * demand
+    return {"demand": demand, "revenue": revenue, "profit": profit}
+
+
+def _chunk_query(clauses, last_id: int, chunk_size: int):
+    return (
+        select(
+            Product.product_id,
+            Product.units_sold,
+            Product.selling_price,
+            Product.cost_price,
+            *(getattr(ProductElasticity, field) for field in STAT_FIELDS),
+            ProductForecast.forecast,
+        )
+        .outerjoin(ProductElasticity, ProductElasticity.product_id == Product.product_id)
+        .outerjoin(ProductForecast, ProductForecast.product_id == Product.product_id)
+        .where(*clauses, Product.product_id > last_id)
+        .order_by(Product.product_id)
+        .limit(chunk_size)
+    )
+
+
+def _render_chunk(rows, prices: Optional[List[float]], grid: np.ndarray) -> bytes:
+    """The NDJSON lines for one chunk of _chunk_query rows."""
+    columns = np.array([tuple(row) for row in rows], dtype=np.float64)
+    product_ids = columns[:, 0].astype(np.int64)
+    units_sold = np.nan_to_num(columns[:, 1])
+    selling_price, cost_price = columns[:, 2], columns[:, 3]
+    intercept, elasticity = fit_arrays(*columns[:, 4:9].T)
+    cached_forecast = columns[:, 9]
+
+    if prices is not None:
+        price_grid = np.broadcast_to(grid, (len(rows), len(grid)))
+    else:
+        price_grid = selling_price[:, None] * grid
+    curves = {name: np.round(values, 2) for name, values in simulate_grid(units_sold, cost_price, price_grid, intercept, elasticity, selling_price, cached_forecast).items()}
+    price_grid = np.ascontiguousarray(np.round(price_grid, 2))
+    best_price = price_grid[np.arange(len(rows)), np.argmax(curves["profit"], axis=1)]
+
+    demand_forecast = calculate_demand_forecast_array(units_sold, selling_price, intercept, elasticity, cached_forecast)
+    optimised_price = calculate_optimised_price_array(cost_price, selling_price, demand_forecast)
+
+    return b"".join(
+        orjson.dumps({
+            "product_id": int(product_ids[i]),
+            "selling_price": selling_price[i],
+            "cost_price": cost_price[i],
+            "elasticity": None if np.isnan(elasticity[i]) else round(float(elasticity[i]), 4),
+            "optimised_price": optimised_price[i],
+            "best_price": best_price[i],
+            "prices": price_grid[i],
+            "demand": curves["demand"][i],
+            "revenue": curves["revenue"][i],
+            "profit": curves["profit"][i],
+        }, option=_LINE_OPTIONS)
+        for i in range(len(rows))
+    )
+
+
+def stream_simulation(db: Session, user_id: int, product_ids: Optional[List[int]] = None, category: Optional[str] = None,
+                      prices: Optional[List[float]] = None, multipliers: Optional[List[float]] = None,
+                      chunk_size: int = SIMULATION_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Yields one NDJSON line per product with its price grid, demand, revenue and profit
+    curves, the profit-maximising grid price and the current optimised price.
+    Products are read and evaluated chunk_size at a time, in product_id order.
+    """
+    clauses = simulation_filter(user_id, product_ids, category)
+    grid = np.asarray(prices if prices is not None else multipliers, dtype=np.float64)
+    last_id = 0
+
+    while True:
+        rows = db.execute(_chunk_query(clauses, last_id, chunk_size)).all()
+        if not rows:
+            return
+        yield _render_chunk(rows, prices, grid)
+        last_id = rows[-1].product_id
+
+
+async def stream_simulation_async(db: AsyncSession, user_id: int, product_ids: Optional[List[int]] = None, category: Optional[str] = None,
+                                  prices: Optional[List[float]] = None, multipliers: Optional[List[float]] = None,
+                                  chunk_size: int = SIMULATION_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """stream_simulation on an async session."""
+    clauses = simulation_filter(user_id, product_ids, category)
+    grid = np.asarray(prices if prices is not None else multipliers, dtype=np.float64)
+    last_id = 0
+
+    while True:
+        rows = (await db.execute(_chunk_query(clauses, last_id, chunk_size))).all()
+        if not rows:
+            return
+        yield _render_chunk(rows, prices, grid)
+        last_id = rows[-1].product_id
@@ -0,0 +1,79 @@
+from typing import Any, Dict, List, Sequence
+
+from sqlalchemy import and_, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import Session
+
+
+def upsert_increment(db: Session, model, key_fields: Sequence[str], increment_fields: Sequence[str],
+                     rows: List[Dict[str, Any]]):
+    """
+    Inserts each row, or adds its increment_fields onto the existing row with the same key.
+
+    Uses one INSERT ... ON CONFLICT DO UPDATE (SQLite) or ON DUPLICATE KEY UPDATE (MySQL)
+    statement; other databases fall back to an UPDATE per row and an INSERT for the misses.
+    """
+    if not rows:
+        return
+
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        statement = sqlite.insert(table).values(rows)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[table.c[field] for field in key_fields],
+            set_={field: table.c[field] + statement.excluded[field] for field in increment_fields},
+        ))
+        return
+
+    if dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(table).values(rows)
+        db.execute(statement.on_duplicate_key_update(
+            {field: table.c[field] + statement.inserted[field] for field in increment_fields}
+        ))
+        return
+
+    for row in rows:
+        result = db.execute(
+            update(table)
+            .where(and_(*(table.c[field] == row[field] for field in key_fields)))
+            .values({field: table.c[field] + row[field] for field in increment_fields})
+        )
+        if result.rowcount == 0:
+            db.execute(table.insert().values(row))
+
+
+def upsert_replace(db: Session, model, key_fields: Sequence[str], replace_fields: Sequence[str],
+                   rows: List[Dict[str, Any]]):
+    """
+    upsert_increment, but the existing row's replace_fields are overwritten rather than added to.
+    The statement takes the rows as executemany parameters, so its size doesn't grow with them.
+    """
+    if not rows:
+        return
+
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+
+    if dialect == "sqlite":
+        statement = sqlite.insert(table)
+        db.execute(statement.on_conflict_do_update(
+            index_elements=[table.c[field] for field in key_fields],
+            set_={field: statement.excluded[field] for field in replace_fields},
+        ), rows)
+        return
+
+    if dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(table)
+        db.execute(statement.on_duplicate_key_update({field: statement.inserted[field] for field in replace_fields}), rows)
+        return
+
+    for row in rows:
+        result = db.execute(
+            update(table)
+            .where(and_(*(table.c[field] == row[field] for field in key_fields)))
+            .values({field: row[field] for field in replace_fields})
+        )
+        if result.rowcount == 0:
+            db.execute(table.insert().values(row))
@@ -0,0 +1,49 @@
+"""
+Shared setup for the benchmark scripts.
+
+Importing this module points the app settings at a throwaway SQLite database
+(unless the variables are already set) so the scripts run without a `.env`.
+Run benchmarks from the repository root, e.g. `python -m benchmarks.bench_import`.
+"""
+import os
+import tempfile
+
+BENCH_DIR = tempfile.mkdtemp(prefix="price_opt_bench_")
+
+_DEFAULTS = {
+    "DATABASE_URL": f"sqlite:///{os.path.join(BENCH_DIR, 'bench.db')}",
+    "SMTP_SERVER": "localhost",
+    "SMTP_PORT": "1025",
+    "EMAIL_SENDER": "bench@example.com",
+    "EMAIL_PASSWORD": "",
+    "BACKEND_URL": "http://127.0.0.1:8000",
+    "FRONTEND_URL": "http://127.0.0.1:5173",
+    "JWT_SECRET_KEY": "bench-secret",
+}
+
+for key, value in _DEFAULTS.items():
+    os.environ.setdefault(key, value)
+
+
+def create_schema():
+    """Creates all tables on the configured database and returns the engine."""
+    from app.core.database import Base, engine
+
+    Base.metadata.create_all(engine)
+    return engine
+
+
+def create_user(db, email: str = "bench@example.com"):
+    from app.models.user import User
+
+    user = User(
+        first_name="Bench",
+        last_name="User",
+        email=email,
+        hashed_password="not-a-real-hash",
+        is_verified=True,
+    )
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
@@ -0,0 +1,79 @@
+"""
+Compares rows/sec of the per-item `/product/add` path against the batched importer.
+
+    python -m benchmarks.bench_import --rows 20000
+"""
+import argparse
+import io
+import json
+import random
+import time
+
+from benchmarks import _env
+
+
+def make_rows(count: int):
+    rng = random.Random(42)
+    for i in range(count):
+        cost = round(rng.uniform(1, 500), 2)
+        stock = rng.randint(0, 1000)
+        yield {
+            "name": f"Product {i}",
+            "description": "Synthetic benchmark product",
+            "cost_price": cost,
+            "selling_price": round(cost * rng.uniform(1.05, 2.0), 2),
+            "category": rng.choice(["Electronics", "Grocery", "Toys", "Apparel"]),
+            "stock_available": stock,
+            "units_sold": rng.randint(0, stock),
+        }
+
+
+def bench_per_item(db, user, rows):
+    from app.routers.product import add_new_product
+    from app.schemas.product import ProductCreate
+
+    start = time.perf_counter()
+    for row in rows:
+        add_new_product(ProductCreate(**row), db=db, current_user=user)
+    return time.perf_counter() - start
+
+
+def bench_import(db, user, rows, batch_size):
+    from app.utils.product_import import import_products, iter_ndjson_records
+
+    payload = io.BytesIO("".join(json.dumps(row) + "\n" for row in rows).encode())
+    start = time.perf_counter()
+    report = import_products(db, user.id, iter_ndjson_records(payload), batch_size=batch_size)
+    elapsed = time.perf_counter() - start
+    assert report["failed"] == 0, report["errors"][:5]
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--per-item-rows", type=int, default=2000, help="The per-item path is slow; bench a smaller sample")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    _env.create_schema()
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        user = _env.create_user(db)
+        per_item = bench_per_item(db, user, list(make_rows(args.per_item_rows)))
+        batched = bench_import(db, user, list(make_rows(args.rows)), args.batch_size)
+    finally:
+        db.close()
+
+    results = {
+        "per_item_rows_per_sec": round(args.per_item_rows / per_item, 1),
+        "import_rows_per_sec": round(args.rows / batched, 1),
+    }
+    results["speedup"] = round(results["import_rows_per_sec"] / results["per_item_rows_per_sec"], 1)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
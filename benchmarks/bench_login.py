@@ -0,0 +1,81 @@
+"""
+Concurrent login throughput with bcrypt on the shared threadpool (how sync handlers ran it)
+versus the dedicated hashing process pool, plus the latency a trivial sync endpoint sees
+while the logins are in flight.
+
+    python -m benchmarks.bench_login --logins 200 --concurrency 50
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from benchmarks import _env
+
+
+async def _probe(stop: asyncio.Event, latencies: list):
+    from fastapi.concurrency import run_in_threadpool
+
+    while not stop.is_set():
+        start = time.perf_counter()
+        await run_in_threadpool(lambda: None)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.01)
+
+
+async def run_storm(verify, logins: int, concurrency: int, hashed: str):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one_login():
+        async with semaphore:
+            assert await verify("correct horse battery", hashed)
+
+    stop = asyncio.Event()
+    probe_latencies: list = []
+    probe = asyncio.create_task(_probe(stop, probe_latencies))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one_login() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe
+    return {
+        "logins_per_sec": round(logins / elapsed, 1),
+        "threadpool_probe_p50_ms": round(statistics.median(probe_latencies) * 1000, 2),
+        "threadpool_probe_max_ms": round(max(probe_latencies) * 1000, 2),
+    }
+
+
+async def main_async(args):
+    from fastapi.concurrency import run_in_threadpool
+
+    from app.utils.security import hash_password, shutdown_hashing_executor, verify_password, verify_password_async
+
+    hashed = hash_password("correct horse battery")
+
+    async def threadpool_verify(plain, hashed_password):
+        return await run_in_threadpool(verify_password, plain, hashed_password)
+
+    # Start the pool outside the timed run
+    await verify_password_async("correct horse battery", hashed)
+
+    results = {
+        "threadpool": await run_storm(threadpool_verify, args.logins, args.concurrency, hashed),
+        "process_pool": await run_storm(verify_password_async, args.logins, args.concurrency, hashed),
+    }
+    shutdown_hashing_executor()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main_async(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
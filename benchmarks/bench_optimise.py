@@ -0,0 +1,104 @@
+"""
+Times the constrained catalog optimiser at several catalog sizes: the solve alone on
+in-memory arrays, and the full load + solve + bulk write through the database.
+
+    python -m benchmarks.bench_optimise --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks import _env
+
+CATEGORIES = 20
+
+
+def synthetic_catalog(rows: int, seed: int = 5):
+    rng = np.random.default_rng(seed)
+    cost = np.round(rng.uniform(1, 500, rows), 2)
+    selling = np.round(cost * rng.uniform(1.05, 2.0, rows), 2)
+    elasticity = np.where(rng.random(rows) < 0.5, np.nan, rng.uniform(-4, -0.3, rows))
+    return {
+        "cost_price": cost,
+        "selling_price": selling,
+        "demand": rng.uniform(0, 600, rows),
+        "elasticity": elasticity,
+        "stock_available": rng.integers(0, 1000, rows).astype(np.float64),
+        "category_codes": rng.integers(0, CATEGORIES, rows),
+    }
+
+
+def time_solve(rows: int, repeats: int = 3):
+    from app.utils.optimiser import solve_prices
+
+    catalog = synthetic_catalog(rows)
+    targets = np.linspace(0.2, 0.6, CATEGORIES)
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        solution = solve_prices(**catalog, margin_targets=targets, min_margin=0.05)
+        timings.append(time.perf_counter() - start)
+    return min(timings), solution
+
+
+def seed_categories(db, user_id: int, rows: int):
+    from sqlalchemy import update
+
+    from app.models.product import Product
+    from benchmarks.bench_reprice import seed_catalog
+
+    seed_catalog(db, user_id, rows)
+    # seed_catalog puts everything in one category; spread it over CATEGORIES
+    db.execute(
+        update(Product)
+        .where(Product.user_id == user_id)
+        .values(category="Bench " + (Product.product_id % CATEGORIES).cast(Product.category.type))
+    )
+    db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--skip-db", action="store_true", help="Only time the solve on in-memory arrays")
+    args = parser.parse_args()
+
+    # The first solve imports SciPy; keep that out of the timings
+    time_solve(10, repeats=1)
+
+    results = []
+    for rows in args.sizes:
+        solve_seconds, solution = time_solve(rows)
+        result = {
+            "rows": rows,
+            "solve_seconds": round(solve_seconds, 3),
+            "iterations": solution["iterations"],
+            "converged": solution["converged"],
+            "infeasible_categories": int((~solution["feasible"]).sum()),
+        }
+
+        if not args.skip_db:
+            _env.create_schema()
+            from app.core.database import SessionLocal
+            from app.utils.optimiser import optimise_catalog
+
+            db = SessionLocal()
+            try:
+                user = _env.create_user(db, email=f"optimise-{rows}@example.com")
+                seed_categories(db, user.id, rows)
+                start = time.perf_counter()
+                report = optimise_catalog(db, user.id, default_margin_target=0.3, min_margin=0.05)
+                result["end_to_end_seconds"] = round(time.perf_counter() - start, 3)
+                result["updated"] = report["updated"]
+            finally:
+                db.close()
+
+        results.append(result)
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Times whole-catalog repricing and checks the vectorized pricing against the scalar functions.
+
+    python -m benchmarks.bench_reprice --rows 1000000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks import _env
+
+
+def check_exact(rows: int, seed: int = 7):
+    from app.utils.pricing import (
+        calculate_demand_forecast,
+        calculate_demand_forecast_array,
+        calculate_optimised_price,
+        calculate_optimised_price_array,
+    )
+
+    rng = np.random.default_rng(seed)
+    units_sold = rng.integers(0, 5000, rows)
+    selling_price = np.round(rng.uniform(0.01, 1500, rows), 2)
+    cost_price = np.round(selling_price * rng.uniform(0.3, 1.2, rows), 2)
+
+    demand = calculate_demand_forecast_array(units_sold, selling_price)
+    price = calculate_optimised_price_array(cost_price, selling_price, demand)
+
+    mismatches = 0
+    for i in range(rows):
+        expected_demand = calculate_demand_forecast(int(units_sold[i]), float(selling_price[i]))
+        expected_price = calculate_optimised_price(float(cost_price[i]), float(selling_price[i]), expected_demand)
+        mismatches += bool(expected_demand != demand[i] or expected_price != price[i])
+    return mismatches
+
+
+def seed_catalog(db, user_id: int, rows: int, batch_size: int = 50000):
+    from sqlalchemy import insert
+
+    from app.models.product import Product
+
+    rng = np.random.default_rng(11)
+    for start in range(0, rows, batch_size):
+        size = min(batch_size, rows - start)
+        cost = np.round(rng.uniform(1, 500, size), 2)
+        selling = np.round(cost * rng.uniform(1.05, 2.0, size), 2)
+        stock = rng.integers(0, 1000, size)
+        db.execute(
+            insert(Product),
+            [
+                {
+                    "name": f"Product {start + i}",
+                    "cost_price": float(cost[i]),
+                    "selling_price": float(selling[i]),
+                    "category": "Bench",
+                    "stock_available": int(stock[i]),
+                    "units_sold": int(stock[i] // 2),
+                    "customer_rating": 4.5,
+                    "user_id": user_id,
+                }
+                for i in range(size)
+            ],
+        )
+        db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--check-rows", type=int, default=200000)
+    args = parser.parse_args()
+
+    mismatches = check_exact(args.check_rows)
+
+    _env.create_schema()
+    from app.core.database import SessionLocal
+    from app.utils.pricing import reprice_catalog
+
+    db = SessionLocal()
+    try:
+        user = _env.create_user(db)
+        seed_catalog(db, user.id, args.rows)
+        start = time.perf_counter()
+        report = reprice_catalog(db, user.id)
+        elapsed = time.perf_counter() - start
+    finally:
+        db.close()
+
+    print(json.dumps({
+        "exactness_checked_rows": args.check_rows,
+        "exactness_mismatches": mismatches,
+        "reprice_rows": report["scanned"],
+        "reprice_seconds": round(elapsed, 3),
+        "reprice_rows_per_sec": round(report["scanned"] / elapsed, 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Per-row cost of a dashboard page: ORM objects validated through ProductResponse and
+encoded with the stdlib JSON encoder, versus Core rows encoded directly with orjson.
+
+    python -m benchmarks.bench_serialization
+"""
+import argparse
+import json
+import time
+
+from benchmarks import _env
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    _env.create_schema()
+    from fastapi.encoders import jsonable_encoder
+    from sqlalchemy import select
+
+    from app.core.database import SessionLocal
+    from app.models.product import Product
+    from app.schemas.product import ProductResponse
+    from app.utils.catalog import render_products
+    from app.utils.pagination import PRODUCT_RESPONSE_COLUMNS
+    from benchmarks.bench_reprice import seed_catalog
+
+    db = SessionLocal()
+    user = _env.create_user(db)
+    seed_catalog(db, user.id, max(args.page_sizes))
+    db.query(Product).update({"demand_forecast": 12.5, "optimised_price": 99.99, "customer_rating": 4.5})
+    db.commit()
+
+    def orm_path(size):
+        products = db.scalars(select(Product).where(Product.user_id == user.id).order_by(Product.product_id).limit(size)).all()
+        body = json.dumps(jsonable_encoder([ProductResponse.model_validate(product) for product in products])).encode()
+        db.expunge_all()
+        return body
+
+    def fast_path(size):
+        rows = db.execute(select(*PRODUCT_RESPONSE_COLUMNS).where(Product.user_id == user.id).order_by(Product.product_id).limit(size)).all()
+        return render_products(rows)
+
+    results = {}
+    for size in args.page_sizes:
+        assert json.loads(orm_path(size)) == json.loads(fast_path(size)), "paths disagree"
+        timings = {}
+        for name, path in (("orm_pydantic_json", orm_path), ("core_rows_orjson", fast_path)):
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                path(size)
+            timings[f"{name}_us_per_row"] = round((time.perf_counter() - start) / (args.repeat * size) * 1e6, 2)
+        timings["speedup"] = round(timings["orm_pydantic_json_us_per_row"] / timings["core_rows_orjson_us_per_row"], 1)
+        results[size] = timings
+
+    db.close()
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Cold-start time of a fresh worker: interpreter start, imports, create_app() and the
+lifespan warm-up, until /health/ready answers 200. Each run is a new process.
+Exits with status 1 when the slowest run exceeds the budget, so CI can gate on it.
+
+    python -m benchmarks.cold_start --runs 5 --budget-ms 4000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+def child():
+    started = time.perf_counter()
+    from benchmarks import _env  # noqa: F401  (test settings; the schema exists already)
+
+    import main
+    from fastapi.testclient import TestClient
+
+    app = main.create_app()
+    created = time.perf_counter()
+    with TestClient(app) as client:
+        ready = client.get("/health/ready")
+        finished = time.perf_counter()
+        from app.core.startup import startup_state
+
+        print(json.dumps({
+            "ready_status": ready.status_code,
+            "create_app_seconds": round(created - started, 4),
+            "import_seconds": startup_state["import_seconds"],
+            "startup_seconds": startup_state["startup_seconds"],
+            "in_process_seconds": round(finished - started, 4),
+            "steps": startup_state["steps"],
+        }), flush=True)
+
+
+def run_once() -> dict:
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-m", "benchmarks.cold_start", "--child"],
+                               stdout=subprocess.PIPE, text=True, env=os.environ.copy())
+    line = process.stdout.readline()
+    ready_seconds = time.perf_counter() - started
+    process.wait()
+    if not line:
+        raise RuntimeError(f"Worker exited with {process.returncode} before reporting ready")
+    return {**json.loads(line), "wall_seconds": round(ready_seconds, 4)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=4000, help="Maximum wall time from process start to ready")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child()
+        return
+
+    os.environ.setdefault("EMAIL_OUTBOX_ENABLED", "false")
+    from benchmarks import _env
+
+    _env.create_schema()
+
+    runs = [run_once() for _ in range(args.runs)]
+    walls = [run["wall_seconds"] for run in runs]
+    report = {
+        "budget_ms": args.budget_ms,
+        "wall_ms": {
+            "median": round(statistics.median(walls) * 1000, 1),
+            "max": round(max(walls) * 1000, 1),
+        },
+        "within_budget": max(walls) * 1000 <= args.budget_ms and all(run["ready_status"] == 200 for run in runs),
+        "runs": runs,
+    }
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["within_budget"] else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""
+In-process load test of the API.
+
+Seeds synthetic users and catalogs, then drives signup, login, dashboard pagination, add,
+update and delete through the FastAPI app with a pool of client threads and reports
+p50/p95/p99 latency and throughput per operation as JSON. Emails are only queued (the
+outbox worker is off), so no SMTP server is needed.
+
+    python -m benchmarks.load_test --users 8 --products 5000 --requests 400 --output run.json
+
+Point DATABASE_URL at a MySQL instance to test against MySQL instead of SQLite; the schema
+is created on it if missing.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+OPERATIONS = ("signup", "login", "dashboard", "add", "update", "delete")
+PASSWORD = "load-test-password"
+
+
+def percentile(sorted_values, pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, wall_seconds: float, errors: int) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else 0.0,
+        "throughput_rps": round(len(latencies) / wall_seconds, 1) if wall_seconds else 0.0,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+class Worker:
+    """One simulated client: a TestClient logged in as one seeded user."""
+
+    def __init__(self, app, email: str, product_ids):
+        from fastapi.testclient import TestClient
+
+        self.client = TestClient(app)
+        self.email = email
+        self.product_ids = list(product_ids)
+        self.added_ids = []
+        self.cursor = None
+        self.counter = itertools.count()
+        response = self.client.post("/auth/login/", json={"email": email, "password": PASSWORD})
+        response.raise_for_status()
+
+    def signup(self):
+        n = next(self.counter)
+        return self.client.post("/auth/signup/", json={
+            "first_name": "Load", "last_name": "Test",
+            "email": f"signup-{threading.get_ident()}-{n}-{time.time_ns()}@example.com",
+            "password": PASSWORD,
+        })
+
+    def login(self):
+        return self.client.post("/auth/login/", json={"email": self.email, "password": PASSWORD})
+
+    def dashboard(self):
+        params = {"limit": 50}
+        if self.cursor:
+            params["after"] = self.cursor
+        response = self.client.get("/product/dashboard", params=params)
+        self.cursor = response.headers.get("x-next-cursor")
+        return response
+
+    def add(self):
+        response = self.client.post("/product/add", json={
+            "name": f"Load product {next(self.counter)}", "description": "load test",
+            "cost_price": 10.0, "selling_price": 15.0, "category": "Load",
+            "stock_available": 100, "units_sold": 10,
+        })
+        if response.status_code == 200:
+            self.added_ids.append(response.json()["product_id"])
+        return response
+
+    def update(self):
+        product_id = self.product_ids[next(self.counter) % len(self.product_ids)]
+        return self.client.patch(f"/product/update/{product_id}", json={"selling_price": 20.0 + next(self.counter) % 50})
+
+    def delete(self):
+        if not self.added_ids:
+            return self.add()
+        return self.client.delete(f"/product/delete/{self.added_ids.pop()}")
+
+
+def run_operation(workers, operation: str, requests: int) -> dict:
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    per_worker = [requests // len(workers) + (i < requests % len(workers)) for i in range(len(workers))]
+
+    def drive(worker, count):
+        nonlocal errors
+        local, failed = [], 0
+        for _ in range(count):
+            start = time.perf_counter()
+            response = getattr(worker, operation)()
+            local.append(time.perf_counter() - start)
+            failed += response.status_code >= 400
+        with lock:
+            latencies.extend(local)
+            errors += failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(workers)) as pool:
+        list(pool.map(drive, workers, per_worker))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+def seed(users: int, products: int):
+    from sqlalchemy import select
+
+    from app.core.database import SessionLocal
+    from app.models.product import Product
+    from app.models.user import User
+    from app.utils.security import hash_password
+    from benchmarks.bench_reprice import seed_catalog
+
+    hashed = hash_password(PASSWORD)
+    db = SessionLocal()
+    try:
+        seeded = []
+        for i in range(users):
+            user = User(first_name="Load", last_name=f"User {i}", email=f"load-{i}-{time.time_ns()}@example.com",
+                        hashed_password=hashed, is_verified=True)
+            db.add(user)
+            db.commit()
+            seed_catalog(db, user.id, products)
+            ids = db.scalars(select(Product.product_id).where(Product.user_id == user.id).limit(1000)).all()
+            seeded.append((user.email, ids))
+        return seeded
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=4, help="Seeded users; also the number of client threads")
+    parser.add_argument("--products", type=int, default=2000, help="Products per seeded user")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per operation")
+    parser.add_argument("--operations", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument("--bcrypt-rounds", type=int, default=10)
+    parser.add_argument("--no-page-cache", action="store_true", help="Disable the rendered dashboard page cache")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("EMAIL_OUTBOX_ENABLED", "false")
+    os.environ.setdefault("BCRYPT_ROUNDS", str(args.bcrypt_rounds))
+    # Every simulated client shares one address and account set, which login throttling would reject
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    if args.no_page_cache:
+        os.environ["DASHBOARD_CACHE_MAX_ENTRIES"] = "0"
+
+    from benchmarks import _env
+
+    _env.create_schema()
+    from main import app
+    from app.utils.security import shutdown_hashing_executor
+
+    seed_start = time.perf_counter()
+    seeded = seed(args.users, args.products)
+    seed_seconds = time.perf_counter() - seed_start
+
+    workers = [Worker(app, email, ids) for email, ids in seeded]
+    results = {operation: run_operation(workers, operation, args.requests) for operation in args.operations}
+    shutdown_hashing_executor()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "database": os.environ["DATABASE_URL"].split("://")[0],
+        "config": {**vars(args), "seed_seconds": round(seed_seconds, 2)},
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Checks the email outbox worker against a local SMTP server.
+
+Starts aiosmtpd (`pip install aiosmtpd`) on a free port, queues --messages verification
+emails plus one the server rejects once and one it always rejects, and drains the
+outbox with OutboxWorker.run_once:
+
+- the first pass sends every good message over one SMTP connection, and leaves the
+  rejected ones pending with attempts 1, last_error set and next_attempt_at pushed
+  back by the backoff;
+- a pass before the backoff is up sends nothing;
+- after the backoff the message rejected once is sent on its second attempt, and the
+  one always rejected is marked failed at --max-attempts.
+
+Prints a JSON report and exits with status 1 if any check fails.
+
+    python -m benchmarks.outbox_check
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+from datetime import datetime
+
+FAIL_ONCE = "fail-once@example.com"
+FAIL_ALWAYS = "fail-always@example.com"
+
+
+class RecordingHandler:
+    """aiosmtpd handler that records deliveries and rejects FAIL_ONCE once and FAIL_ALWAYS always."""
+
+    def __init__(self):
+        self.delivered = []
+        self.rejected = []
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.sessions.add(id(session))
+        recipient = envelope.rcpt_tos[0]
+        if recipient == FAIL_ALWAYS or (recipient == FAIL_ONCE and FAIL_ONCE not in self.rejected):
+            self.rejected.append(recipient)
+            return "550 Mailbox unavailable"
+        self.delivered.append(recipient)
+        return "250 Message accepted for delivery"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=5, help="Messages the server accepts first time")
+    parser.add_argument("--backoff-seconds", type=float, default=1, help="Wait before the first retry")
+    parser.add_argument("--max-attempts", type=int, default=2)
+    args = parser.parse_args()
+
+    from aiosmtpd.controller import Controller
+
+    port = free_port()
+    os.environ.update({"SMTP_SERVER": "127.0.0.1", "SMTP_PORT": str(port), "SMTP_STARTTLS": "false",
+                       "EMAIL_PASSWORD": "", "EMAIL_OUTBOX_ENABLED": "false"})
+    from benchmarks import _env
+
+    _env.create_schema()
+    from sqlalchemy import select
+
+    from app.core.database import SessionLocal
+    from app.models.email_outbox import EmailOutbox
+    from app.utils.email import SMTPConnection, enqueue_verification_email
+    from app.utils.outbox import OutboxWorker
+
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+
+    checks = []
+
+    def check(description: str, passed: bool, **details):
+        checks.append({"check": description, "passed": bool(passed), **details})
+
+    def rows():
+        with SessionLocal() as db:
+            return {row.recipient: row for row in db.scalars(select(EmailOutbox))}
+
+    worker = OutboxWorker(connection=SMTPConnection("127.0.0.1", port), batch_size=args.messages + 2,
+                          max_attempts=args.max_attempts, backoff_seconds=args.backoff_seconds)
+    good = [f"user{i}@example.com" for i in range(args.messages)]
+    try:
+        with SessionLocal() as db:
+            for recipient in [*good[:1], FAIL_ONCE, *good[1:], FAIL_ALWAYS]:
+                enqueue_verification_email(db, recipient, f"token-{recipient}")
+            db.commit()
+
+        started = datetime.utcnow()
+        processed = worker.run_once()
+        after_first = rows()
+        check("first pass processes every due message", processed == args.messages + 2, processed=processed)
+        check("good messages sent on the first attempt",
+              all(after_first[r].status == "sent" and after_first[r].attempts == 1 and after_first[r].sent_at for r in good),
+              statuses={r: after_first[r].status for r in good})
+        check("messages after a rejected one are still sent", sorted(handler.delivered) == sorted(good),
+              delivered=handler.delivered)
+        check("one SMTP connection for the batch", len(handler.sessions) == 1, connections=len(handler.sessions))
+        for recipient in (FAIL_ONCE, FAIL_ALWAYS):
+            row = after_first[recipient]
+            delay = (row.next_attempt_at - started).total_seconds()
+            check(f"{recipient} pending after its first rejection",
+                  row.status == "pending" and row.attempts == 1 and bool(row.last_error),
+                  status=row.status, attempts=row.attempts, last_error=row.last_error)
+            check(f"{recipient} next_attempt_at pushed back by the backoff",
+                  args.backoff_seconds <= delay < args.backoff_seconds + 5, delay_seconds=round(delay, 3))
+
+        processed = worker.run_once()
+        check("nothing is retried before the backoff is up", processed == 0, processed=processed)
+
+        time.sleep(args.backoff_seconds + 0.2)
+        processed = worker.run_once()
+        final = rows()
+        check("retry pass processes the two rejected messages", processed == 2, processed=processed)
+        row = final[FAIL_ONCE]
+        check("message rejected once is sent on the second attempt",
+              row.status == "sent" and row.attempts == 2 and row.last_error is None and row.sent_at is not None,
+              status=row.status, attempts=row.attempts)
+        row = final[FAIL_ALWAYS]
+        check("message always rejected is failed at max_attempts",
+              row.status == "failed" and row.attempts == args.max_attempts and row.sent_at is None,
+              status=row.status, attempts=row.attempts)
+        check("good messages were not sent again", sorted(handler.delivered) == sorted(good + [FAIL_ONCE]),
+              delivered=len(handler.delivered))
+    finally:
+        worker.connection.close()
+        controller.stop()
+
+    failures = sum(not c["passed"] for c in checks)
+    print(json.dumps({"failures": failures, "checks": checks}, indent=2, default=str))
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,310 @@
+"""
+Checks that no API endpoint runs a query that scans a large table.
+
+Builds the schema with the Alembic migrations (so the indexes checked are the ones
+deployments get), seeds every table past --min-rows, drives each router endpoint once
+through the app and records the statements it runs. Each distinct SELECT, UPDATE and
+DELETE is then explained: on SQLite a plan step "SCAN <table>" of a large table fails,
+on MySQL an access type of ALL or index does. Prints a JSON report and exits with
+status 1 if any query fails, so CI can run it after adding or changing a query.
+
+    python -m benchmarks.plan_check --users 1500 --products 20000
+
+Point DATABASE_URL at an empty MySQL database to check MySQL's plans instead.
+"""
+import argparse
+import io
+import json
+import os
+import re
+import sys
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+PASSWORD = "plan-check-password"
+EMAIL = "plan-check@example.com"
+CATEGORIES = ("Electronics", "Grocery", "Toys", "Garden", "Books")
+
+_CHECKED = re.compile(r"^\s*(SELECT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+
+def migrate():
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "alembic.ini")), "head")
+
+
+def seed_products(db, user_ids, per_user: int, rng):
+    from sqlalchemy import insert
+
+    from app.models.product import Product
+
+    rows = []
+    for user_id in user_ids:
+        cost = np.round(rng.uniform(1, 500, per_user), 2)
+        selling = np.round(cost * rng.uniform(1.05, 2.0, per_user), 2)
+        stock = rng.integers(0, 1000, per_user)
+        categories = rng.integers(0, len(CATEGORIES), per_user)
+        rows.extend(
+            {
+                "name": f"Product {user_id}-{i}",
+                "description": f"{CATEGORIES[categories[i]].lower()} item {i}",
+                "cost_price": float(cost[i]),
+                "selling_price": float(selling[i]),
+                "category": CATEGORIES[categories[i]],
+                "stock_available": int(stock[i]),
+                "units_sold": int(stock[i] // 2),
+                "customer_rating": 4.5,
+                "demand_forecast": float(stock[i] // 2),
+                "user_id": user_id,
+            }
+            for i in range(per_user)
+        )
+    for start in range(0, len(rows), 50000):
+        db.execute(insert(Product), rows[start:start + 50000])
+    db.commit()
+
+
+def seed(db, users: int, products: int):
+    """Fills every table the API reads with other users' data, then the checked user's catalog."""
+    from sqlalchemy import insert, select, text
+
+    from app.models.forecast import ProductForecast, ProductSalesDaily
+    from app.models.email_outbox import EmailOutbox
+    from app.models.price_history import PriceHistory, ProductElasticity
+    from app.models.product import Product
+    from app.models.revoked_token import RevokedToken
+    from app.models.user import User
+    from app.utils.analytics import rebuild_summary
+
+    rng = np.random.default_rng(5)
+    db.execute(insert(User), [
+        {"first_name": "Plan", "last_name": f"User {i}", "email": f"plan-{i}@example.com", "hashed_password": "x",
+         "is_verified": i % 2 == 0, "verification_token": f"token-{i}"}
+        for i in range(users)
+    ])
+    db.commit()
+    user_ids = db.scalars(select(User.id).where(User.email != EMAIL)).all()
+    checked_user = db.scalar(select(User.id).where(User.email == EMAIL))
+
+    seed_products(db, user_ids, max(products // len(user_ids), 1), rng)
+    seed_products(db, [checked_user], max(products // 4, 1), rng)
+
+    now = datetime.utcnow()
+    product_rows = db.execute(select(Product.product_id, Product.user_id, Product.units_sold)).all()
+    db.execute(insert(PriceHistory), [
+        {"product_id": product_id, "user_id": user_id, "selling_price": 10.0 + day, "units_sold": units,
+         "recorded_at": now - timedelta(days=day)}
+        for product_id, user_id, units in product_rows for day in range(2)
+    ])
+    db.execute(insert(ProductElasticity), [
+        {"product_id": product_id, "observations": 2, "sum_x": 4.7, "sum_y": 6.0, "sum_xx": 11.1, "sum_xy": 14.2}
+        for product_id, _, _ in product_rows
+    ])
+    db.execute(insert(ProductSalesDaily), [
+        {"product_id": product_id, "day": (now - timedelta(days=day)).date(), "user_id": user_id, "units_sold": units}
+        for product_id, user_id, units in product_rows for day in range(2)
+    ])
+    db.execute(insert(ProductForecast), [
+        {"product_id": product_id, "user_id": user_id, "forecast": float(units), "days": 2}
+        for product_id, user_id, units in product_rows
+    ])
+    db.execute(insert(EmailOutbox), [
+        {"recipient": f"plan-{i}@example.com", "subject": "Verify", "body": "-", "status": "sent"}
+        for i in range(users)
+    ])
+    db.execute(insert(RevokedToken), [
+        {"jti": f"revoked-{i}", "expires_at": now + timedelta(days=1)} for i in range(users)
+    ])
+    db.commit()
+    rebuild_summary(db, None)
+    db.commit()
+
+    # Statistics, so the planner chooses as it would on a populated database
+    db.execute(text("ANALYZE"))
+    db.commit()
+    return checked_user
+
+
+def exercise(client, db, log):
+    """Calls every endpoint once or more, tagging the statements each one runs."""
+    from sqlalchemy import select
+
+    from app.models.product import Product
+    from app.models.user import User
+
+    def call(method, path, route=None, **kwargs):
+        log.endpoint = f"{method.upper()} {route or path.split('?')[0]}"
+        response = client.request(method, path, **kwargs)
+        log.endpoint = None
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method.upper()} {path} returned {response.status_code}: {response.text[:200]}")
+        return response
+
+    call("post", "/auth/signup/", json={"first_name": "Plan", "last_name": "Check", "email": EMAIL, "password": PASSWORD})
+    yield
+    token = db.scalar(select(User.verification_token).where(User.email == EMAIL))
+    call("get", f"/auth/verify-email/{token}", "/auth/verify-email/{token}")
+    call("post", "/auth/login/", json={"email": EMAIL, "password": PASSWORD})
+    call("get", "/profile/")
+    call("get", "/auth/get-token")
+
+    product_id = call("post", "/product/add", json={
+        "name": "Plan product", "description": "plan check", "cost_price": 10.0, "selling_price": 15.0,
+        "category": "Toys", "stock_available": 100, "units_sold": 10,
+    }).json()["product_id"]
+    csv_file = "name,cost_price,selling_price,category,stock_available,units_sold\n" + "".join(
+        f"Imported {i},5,9,Books,20,4\n" for i in range(50))
+    call("post", "/product/import", files={"file": ("products.csv", io.BytesIO(csv_file.encode()), "text/csv")})
+    call("patch", f"/product/update/{product_id}", "/product/update/{product_id}", json={"selling_price": 16.5, "units_sold": 12})
+    user_id = db.scalar(select(User.id).where(User.email == EMAIL))
+    some_ids = db.scalars(select(Product.product_id).where(Product.user_id == user_id).limit(20)).all()
+    call("patch", "/product/batch", json={"items": [{"product_id": pid, "stock_available": 50} for pid in some_ids]})
+
+    for sort in ("product_id", "price", "margin", "updated_at"):
+        for order in ("asc", "desc"):
+            cursor = call("get", f"/product/dashboard?sort={sort}&order={order}&limit=50").headers.get("x-next-cursor")
+            call("get", f"/product/dashboard?sort={sort}&order={order}&limit=50&after={cursor}")
+            call("get", f"/product/search?category=Toys&sort={sort}&order={order}")
+    call("get", "/product/dashboard?page=3&limit=50")
+    for filters in ("q=toys", "q=item&category=Books", "name_prefix=Product", "min_price=50&max_price=100",
+                    "min_margin=20&max_margin=40", "min_stock=10&max_stock=20", "min_demand=100&max_demand=120"):
+        call("get", f"/product/search?{filters}")
+
+    call("get", "/product/analytics")
+    call("post", "/product/simulate", json={"category": "Garden", "multipliers": [0.9, 1.1]})
+    call("post", "/product/simulate", json={"product_ids": some_ids, "prices": [10.0, 20.0]})
+    call("get", "/product/export?format=csv")
+    call("get", "/product/export?format=ndjson&columns=product_id,name")
+    call("get", "/product/last-id")
+    call("post", "/product/reprice")
+    call("post", "/product/optimise", json={"default_margin_target": 0.2})
+    call("post", "/product/optimise", json={"category": "Toys", "dry_run": True})
+    call("delete", f"/product/delete/{product_id}", "/product/delete/{product_id}")
+
+    call("post", "/auth/refresh/")
+    call("post", "/auth/logout/")
+    call("get", "/health/live")
+    call("get", "/health/ready")
+    call("get", "/metrics")
+
+
+def explain(connection, statement: str, parameters) -> list:
+    if connection.dialect.name == "sqlite":
+        rows = connection.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+        return [row[-1] for row in rows]
+    result = connection.exec_driver_sql("EXPLAIN " + statement, parameters)
+    return [dict(zip(result.keys(), row)) for row in result.all()]
+
+
+def full_scans(dialect: str, plan: list, large_tables: set) -> list:
+    def is_large(name):
+        name = (name or "").strip("`\"")
+        return any(name == table or name.startswith(f"{table}_") for table in large_tables)
+
+    if dialect == "sqlite":
+        scans = []
+        for detail in plan:
+            match = re.match(r"SCAN (?!VIRTUAL TABLE)(\S+)", detail)
+            if match and is_large(match.group(1)):
+                scans.append(detail)
+        return scans
+    return [f"{row.get('table')}: type {row.get('type')}" for row in plan
+            if row.get("type") in ("ALL", "index") and is_large(row.get("table"))]
+
+
+class StatementLog:
+    def __init__(self):
+        self.endpoint = None
+        # statement -> (first parameters seen, endpoints that ran it)
+        self.statements = {}
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if self.endpoint is None or not _CHECKED.match(statement):
+            return
+        if executemany:
+            parameters = parameters[0]
+        entry = self.statements.setdefault(statement, (parameters, set()))
+        entry[1].add(self.endpoint)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1500, help="Other users seeded")
+    parser.add_argument("--products", type=int, default=20000, help="Products seeded across the other users")
+    parser.add_argument("--min-rows", type=int, default=1000, help="Tables with at least this many rows must not be scanned")
+    parser.add_argument("--bcrypt-rounds", type=int, default=4)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("BCRYPT_ROUNDS", str(args.bcrypt_rounds))
+    os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+    os.environ["DASHBOARD_CACHE_MAX_ENTRIES"] = "0"
+
+    from benchmarks import _env  # noqa: F401  (settings defaults)
+
+    migrate()
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event, func, inspect, select, table
+    from sqlalchemy.engine import Engine
+
+    from main import app
+    from app.core.database import SessionLocal, engine
+    from app.utils.security import shutdown_hashing_executor
+
+    log = StatementLog()
+    event.listen(Engine, "before_cursor_execute", log.before_cursor_execute)
+
+    db = SessionLocal()
+    client = TestClient(app)
+    try:
+        steps = exercise(client, db, log)
+        next(steps)  # signed up; the rest runs against the seeded tables
+        seed(db, args.users, args.products)
+        for _ in steps:
+            pass
+    finally:
+        shutdown_hashing_executor()
+
+    event.remove(Engine, "before_cursor_execute", log.before_cursor_execute)
+    with engine.connect() as connection:
+        counts = {
+            name: connection.scalar(select(func.count()).select_from(table(name)))
+            for name in inspect(connection).get_table_names() if not name.startswith("product_fts")
+        }
+        large_tables = {name for name, count in counts.items() if count >= args.min_rows}
+
+        queries, failures = [], 0
+        for statement, (parameters, endpoints) in log.statements.items():
+            plan = explain(connection, statement, parameters)
+            scans = full_scans(connection.dialect.name, plan, large_tables)
+            failures += bool(scans)
+            queries.append({"endpoints": sorted(endpoints), "statement": " ".join(statement.split()),
+                            "plan": plan, "full_scans": scans})
+        db.close()
+
+    by_endpoint = defaultdict(int)
+    for query in queries:
+        for endpoint in query["endpoints"]:
+            by_endpoint[endpoint] += 1
+    report = {
+        "database": engine.dialect.name,
+        "table_rows": counts,
+        "large_tables": sorted(large_tables),
+        "queries_per_endpoint": dict(sorted(by_endpoint.items())),
+        "failures": failures,
+        "queries": sorted(queries, key=lambda query: (not query["full_scans"], query["endpoints"])),
+    }
+    output = json.dumps(report, indent=2, default=str)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as handle:
+            handle.write(output)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
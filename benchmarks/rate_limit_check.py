@@ -0,0 +1,121 @@
+"""
+Checks the login/signup rate limiter's token buckets on both backends.
+
+Runs the same checks against the in-process MemoryBackend and the RedisBackend (its
+_REDIS_TAKE Lua script): a full bucket allows `burst` takes and then reports the wait,
+the bucket refills at the configured rate but never past its capacity, keys are
+independent, and enforce_rate_limit answers 429 with a Retry-After of the wait rounded
+up. Redis buckets must also expire. Prints a JSON report and exits with status 1 if
+any check fails.
+
+    python -m benchmarks.rate_limit_check
+
+The Redis checks use fakeredis (`pip install "fakeredis[lua]"`) unless --redis-url points
+at a real server; they are skipped when neither is available.
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+import uuid
+
+# Buckets small and fast enough that refills are seen within a fraction of a second
+BURST = 3
+PER_SECOND = 20.0
+
+
+async def check_backend(backend, name: str, client=None) -> list:
+    from fastapi import HTTPException
+
+    from app.core import rate_limit
+
+    results = []
+
+    def check(description: str, passed: bool, **details):
+        results.append({"backend": name, "check": description, "passed": bool(passed), **details})
+
+    key = f"check:{uuid.uuid4().hex}"
+    waits = [await backend.take(key, BURST, PER_SECOND) for _ in range(BURST + 1)]
+    check("full bucket allows burst takes", waits[:BURST] == [0.0] * BURST, waits=waits)
+    check("empty bucket reports the wait for one token", 0 < waits[BURST] <= 1 / PER_SECOND, wait=waits[BURST])
+
+    await asyncio.sleep(waits[BURST] + 0.01)
+    refilled = [await backend.take(key, BURST, PER_SECOND) for _ in range(2)]
+    check("one token back after the wait", refilled[0] == 0 and refilled[1] > 0, waits=refilled)
+
+    other = await backend.take(f"{key}:other", BURST, PER_SECOND)
+    check("other keys have their own bucket", other == 0, wait=other)
+
+    await asyncio.sleep(3 * BURST / PER_SECOND)
+    capped = [await backend.take(key, BURST, PER_SECOND) for _ in range(BURST + 1)]
+    check("refill stops at capacity", capped[:BURST] == [0.0] * BURST and capped[BURST] > 0, waits=capped)
+
+    if client is not None:
+        ttl = await client.ttl(backend.prefix + key)
+        check("bucket expires once it would be full", 0 < ttl <= math.ceil(BURST / PER_SECOND) + 1, ttl=ttl)
+
+    # Through enforce_rate_limit: burst 2 at 30 per minute leaves a wait of about 2s
+    previous, rate_limit.rate_limit_backend = rate_limit.rate_limit_backend, backend
+    try:
+        key = f"check:{uuid.uuid4().hex}"
+        for _ in range(2):
+            await rate_limit.enforce_rate_limit(key, 2, 30)
+        try:
+            await rate_limit.enforce_rate_limit(key, 2, 30)
+            check("429 once the bucket is empty", False)
+        except HTTPException as e:
+            retry_after = e.headers.get("Retry-After")
+            check("429 once the bucket is empty", e.status_code == 429, status=e.status_code)
+            check("Retry-After is the wait rounded up", retry_after == "2", retry_after=retry_after)
+    finally:
+        rate_limit.rate_limit_backend = previous
+
+    return results
+
+
+async def run(redis_url=None) -> dict:
+    from app.core.rate_limit import MemoryBackend, RedisBackend
+
+    results = await check_backend(MemoryBackend(), "memory")
+
+    client, skipped = None, None
+    if redis_url:
+        import redis.asyncio as redis
+
+        client, name = redis.from_url(redis_url), "redis"
+    else:
+        try:
+            import fakeredis
+        except ImportError:
+            skipped = "fakeredis is not installed and no --redis-url was given"
+        else:
+            client, name = fakeredis.FakeAsyncRedis(), "fakeredis"
+    if client is not None:
+        try:
+            results += await check_backend(RedisBackend(client, prefix=f"ratelimit-check:{uuid.uuid4().hex}:"), name, client)
+        finally:
+            await client.aclose()
+
+    return {"skipped": skipped, "failures": sum(not result["passed"] for result in results), "checks": results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", help="Check this Redis server instead of fakeredis")
+    args = parser.parse_args()
+
+    os.environ["RATE_LIMIT_ENABLED"] = "true"
+    from benchmarks import _env  # noqa: F401  (settings defaults)
+
+    started = time.perf_counter()
+    report = asyncio.run(run(args.redis_url))
+    report["seconds"] = round(time.perf_counter() - started, 2)
+    print(json.dumps(report, indent=2))
+    sys.exit(1 if report["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,31 +1,68 @@
-from fastapi import FastAPI, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy.sql import text 
-from app.routers import auth,profile, product
-from app.core.database import get_db
+import time
+
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
 
+def create_app() -> FastAPI:
+    """
+    Builds the application. Settings, the engine and the routers are imported here rather
+    than at module import, and the pools are warmed by the lifespan hook before the worker
+    reports ready (see app/core/startup.py).
+
+    Run with `uvicorn main:create_app --factory`; `uvicorn main:app` still works.
+    """
+    started = time.perf_counter()
+    from app.core.config import settings
+    from app.core.metrics import MetricsMiddleware
+    from app.core.read_routing import ReadYourWritesMiddleware
+    from app.core.startup import lifespan, startup_state
+    from app.routers import auth, profile, product, async_reads, metrics, health
+    startup_state["import_seconds"] = round(time.perf_counter() - started, 4)
+
+    app = FastAPI(lifespan=lifespan)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://127.0.0.1:5173"],  # Allow all origins (change this for security)
+        allow_credentials=True,  # Allow sending cookies
+        allow_methods=["*"],  # Allow all HTTP methods (GET, POST, etc.)
+        allow_headers=["*"],  # Allow all headers
+        expose_headers=["X-Next-Cursor", "ETag"],  # Lets the frontend read the dashboard cursor and ETag
+    )
+    app.add_middleware(ReadYourWritesMiddleware)
+    app.add_middleware(MetricsMiddleware)
+
+    # @app.get("/test-db")
+    # def test_db_connection(db: Session = Depends(get_db)):
+    #     try:
+    #         db.execute(text("SELECT 1"))  # Simple query to check DB connection
+    #         return {"message": "Database connection successful!"}
+    #     except Exception as e:
+    #         return {"error": str(e)}
+
+    # Include authentication routes
+
+    app.include_router(auth.router)
+    if settings.DB_ASYNC_MODE:
+        # Registered first so these async routes take precedence over the sync ones
+        app.include_router(async_reads.router)
+    app.include_router(profile.router)
+    app.include_router(product.router)
+    app.include_router(metrics.router)
+    app.include_router(health.router)
+
+    return app
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://127.0.0.1:5173"],  # Allow all origins (change this for security)
-    allow_credentials=True,  # Allow sending cookies
-    allow_methods=["*"],  # Allow all HTTP methods (GET, POST, etc.)
-    allow_headers=["*"],  # Allow all headers
-)
 
-# @app.get("/test-db")
-# def test_db_connection(db: Session = Depends(get_db)):
-#     try:
-#         db.execute(text("SELECT 1"))  # Simple query to check DB connection
-#         return {"message": "Database connection successful!"}
-#     except Exception as e:
-#         return {"error": str(e)}
+_app = None
 
-# Include authentication routes
 
-app.include_router(auth.router)
-app.include_router(profile.router)
-app.include_router(product.router) 
\ No newline at end of file
+def __getattr__(name):
+    # `main.app` is built on first access, so importing main stays cheap
+    global _app
+    if name == "app":
+        if _app is None:
+            _app = create_app()
+        return _app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,100 @@
+"""
+Maintenance commands, run from the repository root:
+
+    python manage.py reprice [--user-id ID]
+    python manage.py rebuild-analytics [--user-id ID] [--check]
+    python manage.py rebuild-search
+    python manage.py snapshot-sales [--user-id ID]
+    python manage.py forecast [--user-id ID]
+"""
+import argparse
+import json
+
+from app.core.database import SessionLocal, engine
+
+
+def reprice(args):
+    from app.utils.pricing import reprice_catalog
+
+    db = SessionLocal()
+    try:
+        return reprice_catalog(db, args.user_id)
+    finally:
+        db.close()
+
+
+def rebuild_analytics(args):
+    from app.utils.analytics import check_summary, rebuild_summary
+
+    db = SessionLocal()
+    try:
+        if args.check:
+            mismatches = check_summary(db, args.user_id)
+            return {"consistent": not mismatches, "mismatches": mismatches}
+        return {"rebuilt_rows": rebuild_summary(db, args.user_id)}
+    finally:
+        db.close()
+
+
+def rebuild_search(args):
+    from app.utils.search import rebuild_search_index
+
+    with engine.begin() as connection:
+        rebuild_search_index(connection)
+    return {"dialect": engine.dialect.name, "rebuilt": engine.dialect.name == "sqlite"}
+
+
+def snapshot_sales(args):
+    from app.utils.forecast import snapshot_sales
+
+    db = SessionLocal()
+    try:
+        return {"recorded": snapshot_sales(db, args.user_id)}
+    finally:
+        db.close()
+
+
+def forecast(args):
+    from app.utils.forecast import refresh_forecasts
+    from app.utils.pricing import reprice_catalog
+
+    db = SessionLocal()
+    try:
+        report = refresh_forecasts(db, args.user_id)
+        # Only worth a pass over the catalog when some forecast was recomputed
+        report["reprice"] = reprice_catalog(db, args.user_id) if report["fitted"] else None
+        return report
+    finally:
+        db.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Price Optimization maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reprice_parser = commands.add_parser("reprice", help="Recompute demand forecasts and optimised prices")
+    reprice_parser.add_argument("--user-id", type=int, default=None, help="Only this user's catalog (default: every catalog)")
+    reprice_parser.set_defaults(handler=reprice)
+
+    analytics_parser = commands.add_parser("rebuild-analytics", help="Recompute the category analytics summary")
+    analytics_parser.add_argument("--user-id", type=int, default=None, help="Only this user (default: everyone)")
+    analytics_parser.add_argument("--check", action="store_true", help="Only report rows that differ from a fresh aggregate")
+    analytics_parser.set_defaults(handler=rebuild_analytics)
+
+    search_parser = commands.add_parser("rebuild-search", help="Create (if missing) and rebuild the SQLite full-text search table")
+    search_parser.set_defaults(handler=rebuild_search)
+
+    snapshot_parser = commands.add_parser("snapshot-sales", help="Record today's units_sold of every product (run daily)")
+    snapshot_parser.add_argument("--user-id", type=int, default=None, help="Only this user's catalog (default: every catalog)")
+    snapshot_parser.set_defaults(handler=snapshot_sales)
+
+    forecast_parser = commands.add_parser("forecast", help="Recompute stale demand forecasts from the daily snapshots, then reprice")
+    forecast_parser.add_argument("--user-id", type=int, default=None, help="Only this user's catalog (default: every catalog)")
+    forecast_parser.set_defaults(handler=forecast)
+
+    args = parser.parse_args()
+    print(json.dumps(args.handler(args), indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+from logging.config import fileConfig
+
+from alembic import context
+from sqlalchemy import create_engine
+
+from app.core.config import settings
+from app.core.database import Base
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+# Every model is imported by app.core.database, so the metadata is complete
+target_metadata = Base.metadata
+
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Keeps autogenerate away from search objects made outside the metadata's own DDL."""
+    if type_ == "table" and reflected and name.startswith("product_fts"):
+        return False  # SQLite FTS5 table and its shadow tables
+    if type_ == "index" and name in ("ix_product_data_fulltext", "ix_product_data_user_name", "ix_product_data_user_name_nocase"):
+        return False  # Per-dialect (Index.ddl_if), which autogenerate doesn't know about
+    return True
+
+
+def _url() -> str:
+    # A URL set on the Config (e.g. by a script calling alembic.command) wins over the settings
+    return config.get_main_option("sqlalchemy.url") or settings.DATABASE_URL
+
+
+def run_migrations_offline():
+    """Emits the SQL instead of running it: alembic upgrade head --sql"""
+    context.configure(
+        url=_url(),
+        target_metadata=target_metadata,
+        include_object=include_object,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+        render_as_batch=_url().startswith("sqlite"),
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    connectable = create_engine(_url())
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            # SQLite can't ALTER most things in place; batch mode copies the table instead
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+    connectable.dispose()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
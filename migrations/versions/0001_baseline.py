@@ -0,0 +1,60 @@
+"""Baseline: users and Product_Data as first deployed
+
+Revision ID: 0001
+Revises:
+Create Date: 2025-02-10 00:00:00
+
+The users string columns are VARCHAR(255), since MySQL needs a length. A database that
+already has these two tables is marked with `alembic stamp 0001` and then upgraded.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("first_name", sa.String(length=255), nullable=False),
+        sa.Column("last_name", sa.String(length=255), nullable=False),
+        sa.Column("email", sa.String(length=255), nullable=False),
+        sa.Column("hashed_password", sa.String(length=255), nullable=False),
+        sa.Column("is_verified", sa.Boolean(), nullable=True),
+        sa.Column("verification_token", sa.String(length=255), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "Product_Data",
+        sa.Column("product_id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("name", sa.String(length=100), nullable=False),
+        sa.Column("description", sa.String(length=500), nullable=True),
+        sa.Column("cost_price", sa.Float(), nullable=False),
+        sa.Column("selling_price", sa.Float(), nullable=False),
+        sa.Column("category", sa.String(length=25), nullable=False),
+        sa.Column("stock_available", sa.Integer(), nullable=True),
+        sa.Column("units_sold", sa.Integer(), nullable=True),
+        sa.Column("customer_rating", sa.Float(), nullable=True),
+        sa.Column("demand_forecast", sa.Float(), nullable=True),
+        sa.Column("optimised_price", sa.Float(), nullable=True),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=True),
+        sa.Column("updated_at", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("product_id"),
+    )
+
+
+def downgrade():
+    op.drop_table("Product_Data")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_index("ix_users_id", table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,130 @@
+"""Tables and columns for the outbox, analytics, elasticity, versioning, revocation and forecasts
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-03-01 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table("users") as batch:
+        batch.add_column(sa.Column("catalog_version", sa.Integer(), server_default="0", nullable=False))
+
+    with op.batch_alter_table("Product_Data") as batch:
+        batch.add_column(sa.Column("version", sa.Integer(), server_default="1", nullable=False))
+
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("recipient", sa.String(length=255), nullable=False),
+        sa.Column("subject", sa.String(length=255), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(length=10), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.String(length=500), nullable=True),
+        sa.Column("next_attempt_at", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=False),
+        sa.Column("created_at", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=True),
+        sa.Column("sent_at", sa.TIMESTAMP(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_email_outbox_status_next_attempt", "email_outbox", ["status", "next_attempt_at"])
+
+    op.create_table(
+        "category_summary",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("category", sa.String(length=25), nullable=False),
+        sa.Column("sku_count", sa.Integer(), nullable=False),
+        sa.Column("total_revenue", sa.Float(), nullable=False),
+        sa.Column("margin_sum", sa.Float(), nullable=False),
+        sa.Column("demand_forecast_sum", sa.Float(), nullable=False),
+        sa.Column("stock_value", sa.Float(), nullable=False),
+        sa.Column("updated_at", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("user_id", "category"),
+    )
+
+    op.create_table(
+        "product_price_history",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("selling_price", sa.Float(), nullable=False),
+        sa.Column("units_sold", sa.Integer(), nullable=False),
+        sa.Column("recorded_at", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=True),
+        sa.ForeignKeyConstraint(["product_id"], ["Product_Data.product_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_price_history_product_recorded", "product_price_history", ["product_id", "recorded_at"])
+
+    op.create_table(
+        "product_elasticity",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("observations", sa.Integer(), nullable=False),
+        sa.Column("sum_x", sa.Float(), nullable=False),
+        sa.Column("sum_y", sa.Float(), nullable=False),
+        sa.Column("sum_xx", sa.Float(), nullable=False),
+        sa.Column("sum_xy", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["Product_Data.product_id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("product_id"),
+    )
+
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("jti", sa.String(length=64), nullable=False),
+        sa.Column("expires_at", sa.TIMESTAMP(), nullable=False),
+        sa.Column("revoked_at", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=False),
+        sa.PrimaryKeyConstraint("jti"),
+    )
+    op.create_index("ix_revoked_tokens_revoked_at", "revoked_tokens", ["revoked_at"])
+    op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+
+    op.create_table(
+        "product_sales_daily",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("units_sold", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["product_id"], ["Product_Data.product_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("product_id", "day"),
+    )
+    op.create_index("ix_sales_daily_user_day", "product_sales_daily", ["user_id", "day"])
+
+    op.create_table(
+        "product_forecast",
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("forecast", sa.Float(), nullable=True),
+        sa.Column("level", sa.Float(), nullable=True),
+        sa.Column("trend", sa.Float(), nullable=True),
+        sa.Column("days", sa.Integer(), nullable=False),
+        sa.Column("last_day", sa.Date(), nullable=True),
+        sa.Column("computed_at", sa.TIMESTAMP(), server_default=sa.func.current_timestamp(), nullable=True),
+        sa.ForeignKeyConstraint(["product_id"], ["Product_Data.product_id"], ondelete="CASCADE"),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("product_id"),
+    )
+    op.create_index("ix_product_forecast_user", "product_forecast", ["user_id"])
+
+
+def downgrade():
+    op.drop_table("product_forecast")
+    op.drop_table("product_sales_daily")
+    op.drop_table("revoked_tokens")
+    op.drop_table("product_elasticity")
+    op.drop_table("product_price_history")
+    op.drop_table("category_summary")
+    op.drop_table("email_outbox")
+    with op.batch_alter_table("Product_Data") as batch:
+        batch.drop_column("version")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("catalog_version")
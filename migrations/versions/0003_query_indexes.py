@@ -0,0 +1,84 @@
+"""Indexes for the routers' query patterns
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-03-15 00:00:00
+
+Product_Data had only its primary key, so every per-user query scanned the table. Each
+index leads with user_id: keyset pagination per sort key, the search filters, and
+user_id itself for updates, deletes and exports. Full-text search gets a FULLTEXT index
+on MySQL and an FTS5 table kept in sync by triggers on SQLite. verify_email looks users
+up by verification_token.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+_PRODUCT_INDEXES = (
+    ("ix_product_data_user_product", ["user_id", "product_id"]),
+    ("ix_product_data_user_price", ["user_id", "selling_price", "product_id"]),
+    ("ix_product_data_user_margin", ["user_id", sa.text("(selling_price - cost_price)"), "product_id"]),
+    ("ix_product_data_user_updated", ["user_id", "updated_at", "product_id"]),
+    ("ix_product_data_user_name", ["user_id", "name"]),
+    ("ix_product_data_user_category", ["user_id", "category", "product_id"]),
+    ("ix_product_data_user_stock", ["user_id", "stock_available", "product_id"]),
+    ("ix_product_data_user_demand", ["user_id", "demand_forecast", "product_id"]),
+)
+
+# Same as SQLITE_SEARCH_DDL in app/models/product.py at this revision
+_SQLITE_SEARCH_DDL = (
+    """CREATE VIRTUAL TABLE IF NOT EXISTS product_fts USING fts5(
+        name, description, category, content='Product_Data', content_rowid='product_id', prefix='2 3'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_insert AFTER INSERT ON "Product_Data" BEGIN
+        INSERT INTO product_fts(rowid, name, description, category)
+        VALUES (new.product_id, new.name, new.description, new.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_delete AFTER DELETE ON "Product_Data" BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, category)
+        VALUES ('delete', old.product_id, old.name, old.description, old.category);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS product_fts_update AFTER UPDATE OF name, description, category ON "Product_Data" BEGIN
+        INSERT INTO product_fts(product_fts, rowid, name, description, category)
+        VALUES ('delete', old.product_id, old.name, old.description, old.category);
+        INSERT INTO product_fts(rowid, name, description, category)
+        VALUES (new.product_id, new.name, new.description, new.category);
+    END""",
+    # Index the rows that already exist
+    "INSERT INTO product_fts(product_fts) VALUES ('rebuild')",
+)
+
+
+def upgrade():
+    for name, columns in _PRODUCT_INDEXES:
+        op.create_index(name, "Product_Data", columns)
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        op.create_index("ix_product_data_fulltext", "Product_Data", ["name", "description", "category"], mysql_prefix="FULLTEXT")
+    elif dialect == "sqlite":
+        for statement in _SQLITE_SEARCH_DDL:
+            op.execute(statement)
+
+    op.create_index("ix_users_verification_token", "users", ["verification_token"])
+
+
+def downgrade():
+    op.drop_index("ix_users_verification_token", table_name="users")
+
+    dialect = op.get_bind().dialect.name
+    if dialect == "mysql":
+        op.drop_index("ix_product_data_fulltext", table_name="Product_Data")
+    elif dialect == "sqlite":
+        for trigger in ("product_fts_insert", "product_fts_delete", "product_fts_update"):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS product_fts")
+
+    for name, _ in reversed(_PRODUCT_INDEXES):
+        op.drop_index(name, table_name="Product_Data")
@@ -0,0 +1,26 @@
+"""Product_Data.constrained_price for the catalog optimiser
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-03-22 00:00:00
+
+POST /product/optimise wrote into optimised_price, which every reprice and product
+update recomputes with the heuristic. Its prices get their own column. A plain ADD
+COLUMN rather than a batch operation, so SQLite keeps the product_fts triggers.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("Product_Data", sa.Column("constrained_price", sa.Float(), nullable=True))
+
+
+def downgrade():
+    op.drop_column("Product_Data", "constrained_price")
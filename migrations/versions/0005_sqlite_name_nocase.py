@@ -0,0 +1,31 @@
+"""Case-insensitive name prefix index on SQLite
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2025-03-29 00:00:00
+
+The name_prefix search filter was a range on the binary (user_id, name) index, so on
+SQLite it was case-sensitive, unlike MySQL's collation. It is now a LIKE, which SQLite
+matches case-insensitively and can only serve from a NOCASE index. Other databases keep
+ix_product_data_user_name.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        op.drop_index("ix_product_data_user_name", table_name="Product_Data")
+        op.create_index("ix_product_data_user_name_nocase", "Product_Data", ["user_id", sa.text('name COLLATE "NOCASE"')])
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "sqlite":
+        op.drop_index("ix_product_data_user_name_nocase", table_name="Product_Data")
+        op.create_index("ix_product_data_user_name", "Product_Data", ["user_id", "name"])